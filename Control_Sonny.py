@@ -1,23 +1,43 @@
+import asyncio
 import logging
-import threading
 import time
-import difflib
-import json
+started_at = time.monotonic()  # before the heavy imports, so the startup timeline counts them
 import random
-import os
-import subprocess
 from datetime import datetime
 
 # --- NEW imports for this merged build ---
 import serial
 import cv2
-from gtts import gTTS
-from pydub import AudioSegment
-import simpleaudio as sa
 
-from vosk import Model, KaldiRecognizer
 import pyaudio
 
+from asr_server import load_model
+from audio_capture import AudioCapture
+from command_matcher import CommandMatcher
+from commands import SONNY_COMMANDS, bind
+from echo_gate import BargeInWatcher, EchoGate, GatedReader, PlaybackMonitor
+import lipsync
+from lipsync import phoneme_schedule, play_with_envelope, play_with_schedule
+from recognizer import RecognizerSession, hypotheses
+from runtime import Runtime
+from responses import (
+    jokes, creator_responses, greetings, status_responses, goodbyes, name_responses,
+    TIMER_INACTIVE, SWITCHED_TO_IGBO, SWITCHED_TO_ENGLISH, CENTERED,
+    EXIT_COMMAND_MODE, SHUTTING_DOWN, NOT_UNDERSTOOD,
+)
+from servo_channel import ServoChannel
+from speech_stream import speak_streaming
+from speech_synth import BACKENDS
+from speech_worker import LOW, NORMAL, SpeechWorker
+from startup import StartupGraph
+from supervisor import heartbeat, notify_ready
+from tracing import tracer
+from tts_cache import SpeechCache
+from vad import EnergyVAD
+from vision import FaceDetector, FaceFollower, FrameGrabber
+from vision_process import VisionProcess
+from wake_word import WakeWordSpotter
+
 # -----------------------------------------
 # Logging
 # -----------------------------------------
@@ -28,21 +48,42 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 # -----------------------------------------
 ARDUINO_PORT = "/dev/ttyACM0"  # change if needed
 BAUD = 9600
+SERVO_FRAMING = "text"  # "binary" needs the framed parser in the Arduino sketch (see servo_channel.py)
+SERIAL_READY_TIMEOUT = 2.0  # opening the port resets the board; longest we wait for the sketch
 
 arduino = None 
+servo = None  # ServoChannel: coalesces updates, owns all writes to the port
+
+def wait_serial_ready(port, timeout=SERIAL_READY_TIMEOUT):
+    """Poll until the sketch talks (boot banner, e.g. Serial.println("READY")
+    at the end of setup()) instead of always sleeping out the reset.
+    A sketch that prints nothing costs the full timeout, as before."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if port.in_waiting:
+            time.sleep(0.02)  # let the rest of the banner arrive
+            port.reset_input_buffer()
+            return True
+        time.sleep(0.02)
+    return False
+
 def init_serial():
-    global arduino
+    global arduino, servo
     try:
         arduino = serial.Serial(ARDUINO_PORT, BAUD, timeout=1)
-        time.sleep(2)  # allow Arduino to reset
+        start = time.monotonic()
+        ready = wait_serial_ready(arduino)
+        logging.info(f"Arduino {'ready' if ready else 'silent; assuming ready'} "
+                     f"after {time.monotonic() - start:.2f}s")
+        servo = ServoChannel(arduino, framing=SERVO_FRAMING).start()
+        move_head(pan_angle, tilt_angle)  # center
         logging.info(f"Connected to Arduino on {ARDUINO_PORT}")
     except Exception as e:
         logging.error(f"Serial open failed: {e}. Mouth/head will be disabled until fixed.")
 
 def set_servo(name, angle):
-    if arduino and arduino.is_open:
-        msg = f"{name}:{int(angle)}\n".encode()
-        arduino.write(msg)
+    if servo:
+        servo.set(name, angle)
 
 # Servo helpers
 MOUTH_CLOSED = 90
@@ -50,43 +91,84 @@ MOUTH_OPEN   = 120
 def mouth_open():  set_servo("mouth", MOUTH_OPEN)
 def mouth_close(): set_servo("mouth", MOUTH_CLOSED)
 def move_head(pan, tilt):
-    set_servo("pan", int(pan))
-    set_servo("tilt", int(tilt))
+    # One frame for both axes
+    if servo:
+        servo.set_many({"pan": pan, "tilt": tilt})
 
 # -----------------------------------------
-# CAMERA + Face Tracking (runs in a thread)
+# CAMERA + Face Tracking
+#   VISION_PROCESS: detection runs in a worker process (vision_process.py)
+#   and only results come back; otherwise it runs in a thread here.
 # -----------------------------------------
 cap = None
+grabber = None  # FrameGrabber: always hands out the newest camera frame
+vision = None   # VisionProcess when VISION_PROCESS is on
 face_enabled = True
 pan_angle = 90
 tilt_angle = 90
+VISION_PROCESS = True
+TRACK_MODE = "track"   # "track": cascade every few frames + cheap tracker; "detect": cascade every frame
+TRACKER = "template"   # or "mosse" / "kcf" with opencv-contrib installed
+TRACK_INTERVAL = 1 / 30 if TRACK_MODE == "track" else 0.05  # cap on tracking updates per second
+IDLE_TRACK_INTERVAL = 0.25  # s between frames looked at while nobody is in view
+
+face_detector = None
+face_follower = None
+last_frame_seq = 0
 
 def init_camera():
-    global cap, pan_angle, tilt_angle
+    global cap, grabber, vision, face_detector, face_follower
     try:
         cap = cv2.VideoCapture(0)
         if not cap.isOpened():
             logging.warning("Camera not found. Face tracking disabled.")
             return
-        move_head(pan_angle, tilt_angle)  # center
+        if VISION_PROCESS:
+            # Results are pushed to the tracking task as they arrive
+            vision = VisionProcess(cap, TRACK_MODE, TRACKER,
+                                   on_result=lambda r: rt.publish_threadsafe("vision", r)).start()
+        else:
+            face_detector = FaceDetector()
+            if TRACK_MODE == "track":
+                face_follower = FaceFollower(face_detector, TRACKER)
+            grabber = FrameGrabber(cap).start()
     except Exception as e:
         logging.warning(f"Camera init failed: {e}")
 
-face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+def track_in_process():
+    # Vision worker keeps dying: run detection on a thread here instead
+    global vision, grabber, face_detector, face_follower, last_frame_seq
+    logging.warning(f"Vision process failed ({vision.stats()}); tracking in-process")
+    vision.stop()
+    vision = None
+    face_detector = FaceDetector()
+    if TRACK_MODE == "track":
+        face_follower = FaceFollower(face_detector, TRACKER)
+    grabber = FrameGrabber(cap).start()
+    last_frame_seq = 0
+
+def next_face():
+    """In-process tracking: (face box or None, (frame width, height)) for the next new frame, or None."""
+    global last_frame_seq
+    if not grabber: return None
+    got = grabber.latest(last_frame_seq, timeout=0.5)
+    if not got: return None
+    last_frame_seq, _, frame = got
+    if face_follower:
+        face = face_follower.process(frame)
+    else:
+        face = face_detector.detect(frame)
+    return face, (frame.shape[1], frame.shape[0])
 
-def track_face_once():
+def follow_face(face, frame_size):
+    """Nudge the head towards ``face`` (None: no face); returns it."""
     global pan_angle, tilt_angle
-    if not cap: return
-    ok, frame = cap.read()
-    if not ok: return
-
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    faces = face_cascade.detectMultiScale(gray, 1.3, 5)
+    frame_w, frame_h = frame_size
 
-    if len(faces) > 0:
-        (x, y, w, h) = faces[0]
+    if face:
+        (x, y, w, h) = face
         cx, cy = x + w // 2, y + h // 2
-        fx, fy = frame.shape[1] // 2, frame.shape[0] // 2
+        fx, fy = frame_w // 2, frame_h // 2
 
         # Deadband 40px, then nudge
         if cx < fx - 40: pan_angle += 2
@@ -98,86 +180,142 @@ def track_face_once():
         pan_angle  = max(60, min(120, pan_angle))
         tilt_angle = max(70, min(110, tilt_angle))
         move_head(pan_angle, tilt_angle)
-
-def tracking_loop():
+    return face
+
+FACE_GONE_S = 3.0  # a face after this long without one is "face_seen"
+
+def camera_failed():
+    # The camera itself stopped delivering frames: in-process tracking would hit it too
+    if vision:
+        return vision.camera_failed
+    return grabber is not None and not grabber.running
+
+async def next_vision_result(results):
+    """(face box or None, frame size) for the next frame looked at, or None."""
+    if vision and vision.failed:
+        await rt.blocking(None, track_in_process)
+    if not vision:
+        # In-process fallback: detection blocks in the vision executor
+        return await rt.blocking("vision", next_face)
+    try:
+        # The worker's result thread publishes; nothing runs here until then
+        result = await asyncio.wait_for(results.get(), 1.0)
+    except asyncio.TimeoutError:
+        return None
+    return result.box, result.frame_size
+
+async def tracking():
+    # Full rate while a face is in view; with nobody there only one frame
+    # per IDLE_TRACK_INTERVAL is looked at, here or in the vision worker
+    results = rt.subscribe("vision", maxsize=1)
+    last_face = 0.0
+    while face_enabled:
+        if camera_failed():
+            logging.error("Camera stopped delivering frames; face tracking off")
+            return
+        started = time.monotonic()
+        idle = started - last_face > FACE_GONE_S
+        interval = IDLE_TRACK_INTERVAL if idle else TRACK_INTERVAL
+        if vision:
+            vision.frame_interval = IDLE_TRACK_INTERVAL if idle else 0.0
+        got = await next_vision_result(results)
+        face = follow_face(*got) if got else None
+        if face:
+            if idle:
+                rt.publish("face_seen", face)
+            last_face = started
+        # Cap the update rate; detection time counts toward the interval
+        await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+GREET_FACES = True
+GREET_COOLDOWN = 60.0  # s; no unprompted greeting this soon after the last one or a conversation
+last_engaged = 0.0     # time.monotonic() of the last wake word or greeting
+
+async def greeter():
+    global last_engaged
+    seen = rt.subscribe("face_seen")
     while True:
-        if face_enabled:
-            track_face_once()
-        time.sleep(0.05)
+        await seen.get()
+        if time.monotonic() - last_engaged < GREET_COOLDOWN or speech.busy:
+            continue
+        last_engaged = time.monotonic()
+        # LOW: any command reply preempts it
+        text_to_speech(random.choice(greetings), priority=LOW)
 
 # -----------------------------------------
 # LIP-SYNC Speech
-#   EN: espeak-ng phonemes
+#   EN: espeak-ng waveform + phoneme timings (single pass)
 #   IG: gTTS + amplitude analysis
+#   Replies stream sentence by sentence (speech_stream.py): the next
+#   sentence is synthesized while the current one plays.
+#   Everything is spoken by one SpeechWorker thread (speech_worker.py);
+#   text_to_speech() only queues and returns a handle.
 # -----------------------------------------
+def speak_stream(text, lang):
+    stats = speak_streaming(text, lang, mouth_open, mouth_close, speech_cache,
+                            on_start=lambda: tracer.since_heard("first_audio"))
+    if stats["first_audio_s"] is not None:
+        tracer.record("tts", stats["first_audio_s"])  # synthesis still on the critical path
+        logging.info(f"Speech: first audio after {stats['first_audio_s'] * 1000:.0f} ms, "
+                     f"done after {stats['total_s']:.2f}s ({stats['chunks']} chunks, "
+                     f"{stats['underrun_s'] * 1000:.0f} ms underrun)")
+
 def speak_english(text):
     logging.info(f"Speaking EN: {text}")
-
-    # 1) Get phoneme stream (approximate timing)
-    result = subprocess.run(
-        ["espeak-ng", "-v", "en", "--pho", text],
-        capture_output=True, text=True
-    )
-    phonemes = [ln for ln in result.stdout.splitlines() if ln.strip()]
-
-    # 2) Play audio concurrently
-    audio_thread = threading.Thread(target=lambda: os.system(f'espeak-ng -v en "{text}"'))
-    audio_thread.start()
-
-    # 3) Move mouth per phoneme (tweak durations for your servo)
-    for _ in phonemes:
-        mouth_open()
-        time.sleep(0.10)
-        mouth_close()
-        time.sleep(0.05)
-
-    audio_thread.join()
-    mouth_close()
+    speak_stream(text, "en")
 
 def speak_igbo(text):
     logging.info(f"Speaking IG: {text}")
-    # 1) TTS to MP3
-    tts = gTTS(text=text, lang="ig")
-    tts.save("igbo.mp3")
-
-    # 2) Load audio samples
-    audio = AudioSegment.from_mp3("igbo.mp3")
-    samples = audio.get_array_of_samples()
-
-    # 3) Play audio
-    play_obj = sa.play_buffer(
-        samples,
-        num_channels=audio.channels,
-        bytes_per_sample=audio.sample_width,
-        sample_rate=audio.frame_rate
-    )
-
-    # 4) Amplitude-driven lip-sync
-    chunk = 240  # ~5ms @ 48kHz; adjust by frame_rate below
-    threshold = 600  # tune for your audio level
-    sr = audio.frame_rate
-    for i in range(0, len(samples), chunk):
-        sect = samples[i:i+chunk]
-        if not sect:
-            break
-        amp = (max(sect) - min(sect)) if len(sect) else 0
-        if amp > threshold:
-            mouth_open()
-        else:
-            mouth_close()
-        time.sleep(chunk / max(1, sr))
-
-    mouth_close()
-    play_obj.wait_done()
+    speak_stream(text, "ig")
+
+# Cached phrases play immediately with their stored phoneme timings
+# (MBROLA voices) or lip-sync envelope
+speech_cache = None
+speech = None
+def init_tts():
+    global speech_cache, speech
+    speech_cache = SpeechCache()
+    # Preemption, cancel and barge-in all stop playback through this event
+    speech = SpeechWorker(say_now, interrupt=playback.interrupt).start()
+
+def speak_cached(text, lang):
+    voice, rate, _ = BACKENDS[lang]
+    with tracer.span("tts_cache"):
+        hit = speech_cache.get(text, lang, voice, rate)
+    if not hit:
+        return False
+    logging.info(f"Speaking {lang.upper()} (cached): {text}")
+    pcm, envelope, phonemes = hit
+    tracer.since_heard("first_audio")
+    if phonemes:
+        play_with_schedule(pcm, phoneme_schedule(phonemes), mouth_open, mouth_close)
+    else:
+        play_with_envelope(pcm, envelope, mouth_open, mouth_close)
+    return True
 
 # Unified TTS entry
 current_lang = "en"  # "en" or "ig"
-def text_to_speech(text, lang=None):
-    use_lang = lang or current_lang
-    if use_lang == "ig":
-        speak_igbo(text)
-    else:
-        speak_english(text)
+last_speech_start = 0.0  # time.monotonic() when Sonny last started talking
+last_speech_end = 0.0  # time.monotonic() when Sonny last stopped talking
+def text_to_speech(text, lang=None, priority=NORMAL):
+    # Language is fixed when queued: a switch command's reply is already
+    # in the new language
+    return speech.speak(text, lang or current_lang, priority)
+
+def say_now(text, lang):
+    # Blocking; speech worker thread only
+    global last_speech_start, last_speech_end
+    last_speech_start = time.monotonic()
+    try:
+        with tracer.span("speak"):
+            if speak_cached(text, lang):
+                pass
+            elif lang == "ig":
+                speak_igbo(text)
+            else:
+                speak_english(text)
+    finally:
+        last_speech_end = time.monotonic()
 
 # -----------------------------------------
 # Utilities
@@ -185,61 +323,6 @@ def text_to_speech(text, lang=None):
 def get_current_time(): return datetime.now().strftime("%I:%M %p")
 def get_current_date(): return datetime.now().strftime("%B %d, %Y")
 
-# -----------------------------------------
-# Responses
-# -----------------------------------------
-jokes = [
-    "I tried to download some cooking skills… but I only got cookies.",
-    "Why don’t robots panic? Because we’ve got nerves of steel.",
-    "What’s a robot’s favorite music? Heavy metal!",
-    "Why did the robot go on a diet? Too many chips.",
-    "Humans say I have a dry sense of humor… that’s because my cooling fans work so well.",
-    "I told a human a joke yesterday. He didn’t laugh, so I ran a diagnostic. His humor module was offline."
-]
-
-creator_responses = [
-    "I was created by my builder, Robotech83. Without them, I’d just be a box of parts.",
-    "My maker is Robotech83. They gave me life… well, as close as a robot can get.",
-    "Technically, I was designed by Gaël Langevin as InMoov. But the real magic was done by Robotech83.",
-    "I was made by Robotech83. If you don’t like how I behave, take it up with them!",
-    "My creator is Robotech83. Don’t worry, they programmed me to be nice… I think.",
-    "I was brought into existence by Robotech83. Some call them my maker… I call them my human.",
-    "I was assembled and programmed by Robotech83. You could say they’re my Dr. Frankenstein—but less spooky."
-]
-
-greetings = [
-    "Hello there, human!",
-    "Hi! Ready for action.",
-    "Greetings! How can I assist you?",
-    "Hey! Systems are running smoothly.",
-    "Hello! Always good to see you.",
-    "Ọ dị mma."
-]
-
-status_responses = [
-    "I am just a robot, but I am feeling functional!",
-    "All systems are operational. I feel great.",
-    "I’m running at full capacity today.",
-    "Better than yesterday—my circuits are freshly charged.",
-    "I feel efficient. How about you?"
-]
-
-goodbyes = [
-    "Goodbye! Powering down… just kidding.",
-    "See you later, human.",
-    "Goodbye! Don’t forget to charge me.",
-    "Until next time!",
-    "Shutting down my social module now. Bye!"
-]
-
-name_responses = [
-    "My name is Sonny.",
-    "I am Sonny, your humanoid assistant.",
-    "They call me Sonny. Nice to meet you!",
-    "I go by Sonny, but I answer to friend too.",
-    "Sonny is my name, robotics is my game."
-]
-
 # -----------------------------------------
 # Commands
 # -----------------------------------------
@@ -247,7 +330,7 @@ def command_time():       text_to_speech(f"The current time is {get_current_time
 def command_date():       text_to_speech(f"Today's date is {get_current_date()}.", "en")
 def command_talk_back():  text_to_speech(random.choice(greetings))
 def command_how_are_you():text_to_speech(random.choice(status_responses))
-def command_set_timer():  text_to_speech("Timers are not active in this test version.", "en")
+def command_set_timer():  text_to_speech(TIMER_INACTIVE, "en")
 def command_exit():
     text_to_speech(random.choice(goodbyes))
     raise SystemExit
@@ -260,61 +343,58 @@ def command_creator(): text_to_speech(random.choice(creator_responses))
 def command_lang_igbo():
     global current_lang
     current_lang = "ig"
-    text_to_speech("Agbanweela m asụsụ m gaa na Igbo.", "ig")  # I've switched to Igbo.
+    text_to_speech(SWITCHED_TO_IGBO, "ig")
 
 def command_lang_english():
     global current_lang
     current_lang = "en"
-    text_to_speech("I have switched my language to English.", "en")
+    text_to_speech(SWITCHED_TO_ENGLISH, "en")
 
 # NEW: center head
 def command_center_head():
     global pan_angle, tilt_angle
     pan_angle, tilt_angle = 90, 90
     move_head(pan_angle, tilt_angle)
-    text_to_speech("Centered.", "en")
-
-command_dict = {
-    "what time is it": command_time,
-    "what is today's date": command_date,
-    "hello": command_talk_back,
-    "kedu": command_talk_back,
-    "how are you": command_how_are_you,
-    "set timer": command_set_timer,
-    "goodbye": command_exit,
-    "what is your name": command_name,
-    "tell me a joke": command_joke,
-    "make me laugh": command_joke,
-    "say something funny": command_joke,
-    "who made you": command_creator,
-    "who created you": command_creator,
-    "who built you": command_creator,
-    # language switches
-    "switch to igbo": command_lang_igbo,
-    "speak igbo": command_lang_igbo,
-    "switch to english": command_lang_english,
-    "speak english": command_lang_english,
-    # head
-    "center head": command_center_head,
-}
+    text_to_speech(CENTERED, "en")
+
+command_dict = bind(SONNY_COMMANDS, {
+    "time": command_time,
+    "date": command_date,
+    "talk_back": command_talk_back,
+    "how_are_you": command_how_are_you,
+    "set_timer": command_set_timer,
+    "exit": command_exit,
+    "name": command_name,
+    "joke": command_joke,
+    "creator": command_creator,
+    "lang_igbo": command_lang_igbo,
+    "lang_english": command_lang_english,
+    "center_head": command_center_head,
+})
 
 # -----------------------------------------
 # Text Cleaning & Matching
 # -----------------------------------------
+# Built once: token-boundary fillers + indexed candidate lookup
+command_matcher = CommandMatcher(command_dict.keys())
+
 def clean_command(text):
-    text = text.lower()
-    fillers = ["please", "can you", "could you", "would you", "hey", "sonny", "um"]
-    for f in fillers:
-        text = text.replace(f, "")
-    return text.strip()
-
-def match_command(command_text):
-    command_text = clean_command(command_text)
-    keys = list(command_dict.keys())
-    matches = difflib.get_close_matches(command_text, keys, n=1, cutoff=0.65)
-    if matches:
-        logging.info(f"Matched '{command_text}' → '{matches[0]}'")
-        return command_dict[matches[0]]
+    return command_matcher.clean(text)
+
+def match_command(command_text, result=None):
+    # Score every n-best hypothesis (weighted by confidence) when the full
+    # Vosk result is available; fall back to the 1-best text otherwise
+    hyps = hypotheses(result) if result else [(command_text, 1.0)]
+    with tracer.span("match"):
+        command_text = clean_command(command_text)
+        match, needs_confirmation = command_matcher.decide(hyps, group=command_dict.get)
+    if match and needs_confirmation:
+        logging.info(f"Unsure about '{command_text}' → '{match}'; confirming")
+        if not confirm_command(match):
+            match = None
+    if match:
+        logging.info(f"Matched '{command_text}' → '{match}'")
+        return command_dict[match]
     logging.info(f"No matching command for '{command_text}'")
     return None
 
@@ -322,83 +402,225 @@ def match_command(command_text):
 # Vosk Speech Recognition (offline)
 # -----------------------------------------
 vosk_model_path = "/home/Robo/Documents/Sonny/vosk-model-small-en-us-0.15"
-vosk_model = Model(vosk_model_path)
+vosk_model = None
+sessions = {}
+wake_spotter = None
+
+def init_asr():
+    global vosk_model, wake_spotter
+    vosk_model = load_model(vosk_model_path)  # shared ASR service if running
+
+    # One long-lived (open-vocabulary) recognizer per listening mode.
+    # Each sits behind an energy VAD so silence never reaches Kaldi.
+    sessions["command"] = RecognizerSession(vosk_model, "command", vad=EnergyVAD(),
+                                            alternatives=5, words=True)
+    sessions["yes_no"] = RecognizerSession(vosk_model, "yes_no", ["yes", "no", "[unk]"],
+                                           vad=EnergyVAD())
 
-pa = pyaudio.PyAudio()
-stream = pa.open(format=pyaudio.paInt16, channels=1, rate=16000,
-                 input=True, frames_per_buffer=4096)
-stream.start_stream()
+    # Stage 1 wake spotter: tiny grammar, runs continuously
+    wake_spotter = WakeWordSpotter(vosk_model, vad=EnergyVAD())
 
-def listen_for_phrase_vosk(prompt="Listening...", timeout=5):
+# -----------------------------------------
+# Echo handling (echo_gate.py)
+#   "suppress": mic stays live while Sonny talks; frames that are only
+#               Sonny's own voice are zeroed, the user talking over it is kept
+#   "barge_in": as "suppress", and the user talking over Sonny stops playback
+#   "skip":     old behaviour, drop everything heard while Sonny was talking
+# -----------------------------------------
+ECHO_MODE = "barge_in"
+playback = PlaybackMonitor()
+lipsync.monitor = playback
+echo_gate = EchoGate(playback)
+barge_in = None
+
+pa = None
+stream = None
+capture = None
+mic = None
+
+def init_audio():
+    global pa, stream, capture, mic, barge_in
+    pa = pyaudio.PyAudio()
+    stream = pa.open(format=pyaudio.paInt16, channels=1, rate=16000,
+                     input=True, frames_per_buffer=4096)
+    stream.start_stream()
+
+    # Capture runs continuously; listeners read from the ring buffer
+    capture = AudioCapture(stream).start()
+    mic = capture.reader("listen")
+    if ECHO_MODE != "skip":
+        # In barge_in mode the watcher is the one that learns the echo gain
+        mic = GatedReader(mic, echo_gate, learn=ECHO_MODE != "barge_in")
+    if ECHO_MODE == "barge_in":
+        barge_in = BargeInWatcher(capture.reader("barge-in"), echo_gate).start()
+
+def listen_from():
+    # Where a listener picks up after Sonny spoke
+    if ECHO_MODE == "skip":
+        speech.wait_idle()
+        return last_speech_end
+    return last_speech_start
+
+FOLLOW_ON_TIMEOUT = 0.8  # how long to wait for a command in the same breath
+
+def listen_for_phrase_vosk(prompt="Listening...", timeout=5, mode="command"):
     # Speak prompt in current language but keep it short to avoid mic feedback
     logging.info(prompt)
-    rec = KaldiRecognizer(vosk_model, 16000)
-    result_text = ""
-    start = time.time()
-    while time.time() - start < timeout:
-        data = stream.read(4096, exception_on_overflow=False)
-        if rec.AcceptWaveform(data):
-            result_dict = json.loads(rec.Result())
-            result_text = result_dict.get("text", "")
-            break
-    return result_text
+    # Our own voice is gated out (or skipped); whatever the user said
+    # meanwhile, even over the end of the reply, is kept
+    mic.skip_until(listen_from())
+    # timeout bounds waiting for speech; a started phrase runs to its end
+    return sessions[mode].listen(mic, timeout=timeout)
 
 def listen_for_wake_word_vosk(timeout=5):
-    heard = listen_for_phrase_vosk("Listening for wake word", timeout)
-    logging.info(f"Heard for wake: {heard}")
-    return "hello" in heard.lower() or "sonny" in heard.lower()
-
-def listen_for_command_vosk(timeout=5):
-    heard = listen_for_phrase_vosk("Listening for command", timeout)
+    logging.info("Listening for wake word")
+    mic.skip_until(listen_from())
+    hit = wake_spotter.wait(mic, timeout=timeout)
+    logging.debug(f"Wake VAD: {wake_spotter.session.vad.stats()}")
+    if hit:
+        # Hand the same audio to stage 2, starting right after the wake phrase
+        mic.pos = hit.handoff_pos
+        tracer.begin(hit.audio_time)
+        tracer.record("wake", hit.latency, start=hit.audio_time)
+    return hit
+
+def listen_for_command_vosk(timeout=5, new_interaction=False):
+    heard = listen_for_phrase_vosk("Listening for command", timeout, mode="command")
     logging.info(f"Heard command: {heard}")
+    if heard:
+        # Replies are timed from the end of the command audio
+        at = sessions["command"].last_audio_time or time.monotonic()
+        if new_interaction:
+            tracer.begin(at)
+        else:
+            tracer.heard(at)
+        tracer.record("asr", max(0.0, time.monotonic() - at), start=at)
     return heard
 
+def listen_for_yes_no_vosk(timeout=8):
+    heard = listen_for_phrase_vosk("Listening for yes/no", timeout, mode="yes_no")
+    logging.info(f"Heard answer: {heard}")
+    return {"yes": True, "no": False}.get(heard.strip())
+
+def confirm_command(phrase):
+    # One short yes/no instead of a full "repeat that" round trip
+    text_to_speech(f"Did you mean {phrase}?")
+    return listen_for_yes_no_vosk() is True
+
 # -----------------------------------------
 # Command Processing
 # -----------------------------------------
-def process_commands():
+def handle_command(cmd_text):
+    # Returns False when the user leaves command mode
+    if "cancel" in cmd_text.lower():
+        text_to_speech(EXIT_COMMAND_MODE, "en")
+        return False
+    func = match_command(cmd_text, sessions["command"].last_result)
+    if func:
+        try:
+            func()
+        except SystemExit:
+            # Let the goodbye and this finish, then shut everything down
+            text_to_speech(SHUTTING_DOWN, "en").wait(10)
+            rt.stop_threadsafe()
+            return False
+    else:
+        text_to_speech(NOT_UNDERSTOOD, "en")
+    return True
+
+async def interaction():
+    # Vosk listening (and confirmations) block in the "asr" executor;
+    # speech is queued, so replies never hold this up
+    global last_engaged
     while True:
-        if listen_for_wake_word_vosk(timeout=5):
+        heartbeat()  # robot_control restarts Sonny if this loop stalls
+        if not await rt.blocking("asr", listen_for_wake_word_vosk, 5):
+            continue
+        last_engaged = time.monotonic()
+        # "Hello Sonny, what time is it?" -- command follows without a pause
+        cmd_text = await rt.blocking("asr", listen_for_command_vosk, FOLLOW_ON_TIMEOUT)
+        if cmd_text:
+            if not await rt.blocking("asr", handle_command, cmd_text):
+                continue
+        else:
             text_to_speech(random.choice(greetings))  # speaks in current_lang
-            while True:
-                cmd_text = listen_for_command_vosk(timeout=6)
-                if not cmd_text:
-                    continue
-                if "cancel" in cmd_text.lower():
-                    text_to_speech("Exiting command mode.", "en")
-                    break
-                func = match_command(cmd_text)
-                if func:
-                    try:
-                        func()
-                    except SystemExit:
-                        text_to_speech("Shutting down. Goodbye!", "en")
-                        os._exit(0)
-                else:
-                    text_to_speech("I did not understand that command.", "en")
+        while True:
+            heartbeat()
+            cmd_text = await rt.blocking("asr", listen_for_command_vosk, 6, True)
+            if not cmd_text:
+                continue
+            last_engaged = time.monotonic()
+            if not await rt.blocking("asr", handle_command, cmd_text):
+                break
 
 # -----------------------------------------
 # Main
+#   One asyncio loop (runtime.py) runs interaction, tracking and the
+#   greeter as tasks; SIGINT/SIGTERM or "goodbye" cancel them all and
+#   fall through to the cleanup below.
 # -----------------------------------------
-def main():
-    init_serial()
-    init_camera()
-
-    # Start face tracking thread (daemon)
-    threading.Thread(target=tracking_loop, daemon=True).start()
-
-    # Start command loop (daemon)
-    threading.Thread(target=process_commands, daemon=True).start()
+rt = Runtime({"asr": 1, "vision": 1})
+
+# Independent subsystems come up in parallel; Sonny listens (and can
+# greet) once audio, ASR and TTS are up, without waiting for the camera
+# or the Arduino. Mouth/head moves are no-ops until the servo is ready.
+startup = StartupGraph(started_at)
+startup.add("asr", init_asr)
+startup.add("audio", init_audio)
+startup.add("tts", init_tts)
+startup.add("serial", init_serial)
+startup.add("camera", init_camera)
+
+async def core():
+    startup.run()
+    if not await rt.blocking(None, startup.wait, "asr", "audio", "tts"):
+        logging.error("Voice pipeline failed to start; exiting.")
+        startup.log_timeline()
+        rt.failed = "startup"
+        rt.stop()
+        return
+    rt.spawn("interaction", interaction())
+    notify_ready()
+    logging.info(f"Interactive {time.monotonic() - started_at:.2f}s after launch")
+    if await rt.blocking(None, startup.wait, "camera") and (vision or grabber):
+        rt.spawn("tracking", tracking())
+        if GREET_FACES:
+            rt.spawn("greeter", greeter())
+    await rt.blocking(None, startup.wait)
+    startup.log_timeline()
 
+def main():
+    startup.mark("imports", started_at)
     try:
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
-        logging.info("KeyboardInterrupt: exiting.")
+        rt.run(core())
     finally:
+        if grabber: grabber.stop()
+        if vision:
+            vision.stop()
+            logging.info(f"Vision process: {vision.stats()}")
+        if face_follower: logging.info(f"Face tracking: {face_follower.stats()}")
         if cap: cap.release()
+        if servo:
+            servo.stop()
+            logging.info(f"Servo channel: {servo.stats()}")
         if arduino and arduino.is_open: arduino.close()
-        stream.stop_stream(); stream.close(); pa.terminate()
+        if speech:
+            speech.stop()
+            logging.info(f"Speech worker: {speech.stats()}")
+        if barge_in:
+            barge_in.stop()
+            logging.info(f"Barge-ins: {barge_in.barge_ins}")
+        if capture:
+            logging.info(f"Echo gate: {echo_gate.stats()}")
+            capture.stop()
+            logging.info(f"Audio read jitter: {capture.jitter_stats()}")
+        logging.info(f"Interaction latency: {tracer.summary()}")
+        logging.info(f"Runtime: {rt.stats()}")
+        tracer.flush()
+        if stream: stream.stop_stream(); stream.close()
+        if pa: pa.terminate()
+    if rt.failed:
+        raise SystemExit(1)
 
 if __name__ == "__main__":
     main()
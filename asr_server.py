@@ -0,0 +1,316 @@
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+import time
+
+# -----------------------------------------
+# Resident ASR service
+#
+# One process loads the Vosk model once and serves any number of
+# recognizer sessions over a Unix socket, one connection per session
+# (each gets its own KaldiRecognizer; Vosk releases the GIL while
+# decoding, so sessions run in parallel). Front-ends restart in
+# milliseconds and share one copy of the model in memory.
+#
+# Frame: op (1 byte) | payload length (4) | payload; every request gets
+# exactly one reply.
+#   CONFIG {"rate", "grammar", "alternatives", "words"} -> OK / ERR
+#   AUDIO  <int16 PCM>  -> PARTIAL <Vosk partial JSON> or RESULT <final JSON>
+#   FINAL               -> RESULT <FinalResult JSON>
+#   RESET               -> OK
+#
+# Client side: load_model() returns a RemoteModel when the service is up
+# (RecognizerSession builds RemoteRecognizers from it transparently) and
+# falls back to loading the model in-process otherwise.
+# -----------------------------------------
+DEFAULT_MODEL_PATH = "/home/Robo/Documents/Sonny/vosk-model-small-en-us-0.15"
+ASR_SOCKET_ENV = "SONNY_ASR"
+DEFAULT_ASR_SOCKET = os.environ.get(ASR_SOCKET_ENV, "/tmp/sonny-asr.sock")
+SERVER_WAIT = 30.0  # how long a supervised front-end waits for the service to load
+
+FRAME = struct.Struct(">BI")
+OP_CONFIG, OP_AUDIO, OP_FINAL, OP_RESET, OP_OK, OP_ERR, OP_PARTIAL, OP_RESULT = range(1, 9)
+
+
+def send_frame(sock, op, payload=b""):
+    sock.sendall(FRAME.pack(op, len(payload)) + payload)
+
+
+def _recv_exact(sock, n):
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        k = sock.recv_into(view[got:])
+        if not k:
+            raise ConnectionError("ASR connection closed")
+        got += k
+    return bytes(buf)
+
+
+def recv_frame(sock):
+    op, n = FRAME.unpack(_recv_exact(sock, FRAME.size))
+    return op, _recv_exact(sock, n) if n else b""
+
+
+# -----------------------------------------
+# Server
+# -----------------------------------------
+class AsrServer:
+    def __init__(self, model_path=DEFAULT_MODEL_PATH, path=DEFAULT_ASR_SOCKET):
+        self.model_path = model_path
+        self.path = path
+        self.model = None
+        self._server = None
+        self._lock = threading.Lock()
+
+        # counters
+        self.sessions_active = 0
+        self.sessions_total = 0
+        self.audio_seconds = 0.0
+        self.decode_seconds = 0.0
+
+    def load(self):
+        from vosk import Model, SetLogLevel
+
+        SetLogLevel(-1)
+        start = time.monotonic()
+        self.model = Model(self.model_path)
+        logging.info(f"ASR model loaded in {time.monotonic() - start:.1f}s")
+        return self
+
+    def start(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self.path)
+        self._server.listen()
+        threading.Thread(target=self._accept_loop, name="asr-accept", daemon=True).start()
+        logging.info(f"ASR service listening on {self.path}")
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def stats(self):
+        return {
+            "sessions_active": self.sessions_active,
+            "sessions_total": self.sessions_total,
+            "audio_seconds": round(self.audio_seconds, 1),
+            "real_time_factor": round(self.decode_seconds / self.audio_seconds, 3)
+            if self.audio_seconds else None,
+        }
+
+    def _accept_loop(self):
+        while True:
+            try:
+                sock, _ = self._server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(sock,), name="asr-session", daemon=True).start()
+
+    def _configure(self, rec, old, cfg):
+        from vosk import KaldiRecognizer
+
+        # Only rebuild (and recompile the grammar) when rate or grammar change
+        if rec is None or (old.get("rate"), old.get("grammar")) != (cfg.get("rate"), cfg.get("grammar")):
+            rate = cfg.get("rate", 16000)
+            if cfg.get("grammar"):
+                rec = KaldiRecognizer(self.model, rate, json.dumps(cfg["grammar"]))
+            else:
+                rec = KaldiRecognizer(self.model, rate)
+        if cfg.get("alternatives"):
+            rec.SetMaxAlternatives(cfg["alternatives"])
+        if cfg.get("words"):
+            rec.SetWords(True)
+        return rec
+
+    def _serve(self, sock):
+        with self._lock:
+            self.sessions_active += 1
+            self.sessions_total += 1
+        rec, cfg = None, {}
+        bytes_per_second = 32000
+        try:
+            while True:
+                op, payload = recv_frame(sock)
+                if op == OP_CONFIG:
+                    new = json.loads(payload)
+                    rec, cfg = self._configure(rec, cfg, new), new
+                    bytes_per_second = cfg.get("rate", 16000) * 2
+                    send_frame(sock, OP_OK)
+                elif rec is None:
+                    send_frame(sock, OP_ERR, b"send CONFIG first")
+                elif op == OP_AUDIO:
+                    start = time.perf_counter()
+                    final = rec.AcceptWaveform(payload)
+                    reply = rec.Result() if final else rec.PartialResult()
+                    with self._lock:
+                        self.decode_seconds += time.perf_counter() - start
+                        self.audio_seconds += len(payload) / bytes_per_second
+                    send_frame(sock, OP_RESULT if final else OP_PARTIAL, reply.encode("utf-8"))
+                elif op == OP_FINAL:
+                    send_frame(sock, OP_RESULT, rec.FinalResult().encode("utf-8"))
+                elif op == OP_RESET:
+                    rec.Reset()
+                    send_frame(sock, OP_OK)
+                else:
+                    send_frame(sock, OP_ERR, f"unknown op {op}".encode())
+        except (ConnectionError, OSError):
+            pass
+        except Exception as e:
+            logging.error(f"ASR session failed: {e}")
+        finally:
+            sock.close()
+            with self._lock:
+                self.sessions_active -= 1
+
+
+# -----------------------------------------
+# Client
+# -----------------------------------------
+class RemoteRecognizer:
+    """KaldiRecognizer stand-in that decodes in the ASR service."""
+
+    def __init__(self, path, rate, grammar=None):
+        self.path = path
+        self.config = {"rate": rate, "grammar": list(grammar) if grammar else None,
+                       "alternatives": 0, "words": False}
+        self._sock = None
+        self._result = '{"text": ""}'
+        self._partial = '{"partial": ""}'
+        self._connect()
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.path)
+        send_frame(sock, OP_CONFIG, json.dumps(self.config).encode("utf-8"))
+        op, payload = recv_frame(sock)
+        if op != OP_OK:
+            sock.close()
+            raise ConnectionError(f"ASR service refused session: {payload.decode(errors='replace')}")
+        self._sock = sock
+
+    def _call(self, op, payload=b""):
+        for attempt in (0, 1):
+            try:
+                if self._sock is None:
+                    # Service restarted: new session, the current utterance is lost
+                    logging.warning("ASR service connection lost; reconnecting")
+                    self._connect()
+                send_frame(self._sock, op, payload)
+                return recv_frame(self._sock)
+            except OSError:
+                if self._sock:
+                    self._sock.close()
+                self._sock = None
+                if attempt:
+                    raise
+
+    def close(self):
+        if self._sock:
+            self._sock.close()
+            self._sock = None
+
+    def SetMaxAlternatives(self, n):
+        self.config["alternatives"] = n
+        self._call(OP_CONFIG, json.dumps(self.config).encode("utf-8"))
+
+    def SetWords(self, enabled):
+        self.config["words"] = bool(enabled)
+        self._call(OP_CONFIG, json.dumps(self.config).encode("utf-8"))
+
+    def AcceptWaveform(self, data):
+        op, payload = self._call(OP_AUDIO, bytes(data))
+        if op == OP_RESULT:
+            self._result = payload.decode("utf-8")
+            return True
+        self._partial = payload.decode("utf-8")
+        return False
+
+    def Result(self):
+        return self._result
+
+    def PartialResult(self):
+        return self._partial
+
+    def FinalResult(self):
+        _, payload = self._call(OP_FINAL)
+        return payload.decode("utf-8")
+
+    def Reset(self):
+        self._call(OP_RESET)
+
+
+class RemoteModel:
+    """Passed wherever a vosk.Model goes; RecognizerSession asks it for recognizers."""
+
+    def __init__(self, path=DEFAULT_ASR_SOCKET):
+        self.path = path
+
+    def recognizer(self, rate, grammar=None):
+        return RemoteRecognizer(self.path, rate, grammar)
+
+
+def server_available(path=DEFAULT_ASR_SOCKET, wait=0.0):
+    deadline = time.monotonic() + wait
+    while True:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(path)
+            return True
+        except OSError:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.2)
+        finally:
+            sock.close()
+
+
+def load_model(model_path=DEFAULT_MODEL_PATH, path=None):
+    """RemoteModel if the ASR service is running, else vosk.Model loaded here.
+
+    Under robot_control (SONNY_ASR set) the service may still be loading,
+    so wait for it up to SERVER_WAIT seconds first.
+    """
+    path = path or DEFAULT_ASR_SOCKET
+    wait = SERVER_WAIT if os.environ.get(ASR_SOCKET_ENV) else 0.0
+    if server_available(path, wait):
+        logging.info(f"Using ASR service at {path}")
+        return RemoteModel(path)
+    from vosk import Model
+
+    logging.info(f"No ASR service at {path}; loading {model_path} in-process")
+    return Model(model_path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from supervisor import heartbeat, notify_ready
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    ap = argparse.ArgumentParser(description="Resident Vosk ASR service")
+    ap.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    ap.add_argument("--socket", default=DEFAULT_ASR_SOCKET)
+    args = ap.parse_args()
+
+    server = AsrServer(args.model, args.socket).load().start()
+    notify_ready()
+    try:
+        while True:
+            time.sleep(5)
+            heartbeat()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logging.info(f"ASR service: {server.stats()}")
+        server.stop()
@@ -0,0 +1,292 @@
+import logging
+import threading
+import time
+from collections import deque
+
+# -----------------------------------------
+# Always-on microphone capture
+#
+# One thread owns the input stream and copies every chunk into a
+# preallocated ring buffer. Consumers (wake word, command ASR, VAD,
+# recorders) each hold their own AudioReader cursor into the ring, so
+# nothing is dropped while Sonny is talking or running a command, and
+# several consumers can share the same audio without re-reading the
+# device.
+#
+# read() hands out views into the ring, not copies. A reader that lags
+# by close to the ring size can have its view overwritten while it still
+# holds it: copy what you need (bytes(win)), then reader.check(win) --
+# False means the copy may be torn, and counts as an overrun.
+# -----------------------------------------
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2          # paInt16, mono
+CHUNK_FRAMES = 4096
+MAX_READ_ERRORS = 20      # consecutive failed reads before capture gives up
+READ_RETRY_DELAY = 0.05   # s between retries (a USB mic glitch, an ALSA xrun)
+
+
+class AudioWindow:
+    """A zero-copy view of captured PCM plus when its first sample was heard."""
+
+    __slots__ = ("data", "start_pos", "start_time")
+
+    def __init__(self, data, start_pos, start_time):
+        self.data = data            # memoryview into the ring, valid until overwritten (see check())
+        self.start_pos = start_pos  # absolute byte offset since capture started
+        self.start_time = start_time  # time.monotonic() of the first sample
+
+    @property
+    def end_pos(self):
+        return self.start_pos + len(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __bytes__(self):
+        return bytes(self.data)
+
+
+class AudioRing:
+    """Fixed-size PCM ring addressed by absolute byte position.
+
+    The backing store is mirrored (every write lands at ``pos`` and
+    ``pos + capacity``) so any window up to ``capacity`` bytes is one
+    contiguous memoryview, even when it wraps.
+    """
+
+    def __init__(self, seconds=10, rate=SAMPLE_RATE, sample_width=SAMPLE_WIDTH):
+        self.rate = rate
+        self.sample_width = sample_width
+        self.bytes_per_second = rate * sample_width
+        self.capacity = int(seconds * self.bytes_per_second)
+        self.capacity -= self.capacity % sample_width
+        self._buf = bytearray(self.capacity * 2)
+        self._view = memoryview(self._buf)
+        self._write_pos = 0
+        self._claimed_pos = 0   # write_pos once the write in progress lands
+        # (end_pos, monotonic time) for each chunk still in the ring
+        self._anchors = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    @property
+    def write_pos(self):
+        return self._write_pos
+
+    @property
+    def closed(self):
+        return self._closed
+
+    @property
+    def oldest_pos(self):
+        return max(0, self._write_pos - self.capacity)
+
+    def write(self, data, timestamp=None):
+        now = time.monotonic() if timestamp is None else timestamp
+        data = memoryview(data).cast("B")
+        if len(data) > self.capacity:
+            data = data[-self.capacity:]
+        n = len(data)
+        with self._cond:
+            # Readers check against this before the bytes move (see intact())
+            self._claimed_pos = self._write_pos + n
+            start = self._write_pos % self.capacity
+            first = min(n, self.capacity - start)
+            # primary copy
+            self._view[start:start + first] = data[:first]
+            self._view[:n - first] = data[first:]
+            # mirror copy
+            self._view[self.capacity + start:self.capacity + start + first] = data[:first]
+            if n - first:
+                self._view[self.capacity:self.capacity + n - first] = data[first:]
+            self._write_pos += n
+            self._anchors.append((self._write_pos, now))
+            while self._anchors and self._anchors[0][0] <= self.oldest_pos:
+                self._anchors.popleft()
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def time_at(self, pos):
+        # Chunks are timestamped when they land; walk back from the newest
+        # anchor and offset by the sample count to the requested position.
+        with self._cond:
+            if not self._anchors:
+                return time.monotonic()
+            anchor = self._anchors[-1]
+            for end_pos, stamp in reversed(self._anchors):
+                if end_pos < pos:
+                    break
+                anchor = (end_pos, stamp)
+            end_pos, stamp = anchor
+            return stamp - (end_pos - pos) / self.bytes_per_second
+
+    def pos_at(self, when):
+        # Inverse of time_at(), clamped to what is still buffered.
+        with self._cond:
+            if not self._anchors:
+                return self._write_pos
+            end_pos, stamp = self._anchors[-1]
+            pos = end_pos - int((stamp - when) * self.bytes_per_second)
+            pos -= pos % self.sample_width
+            return max(self.oldest_pos, min(self._write_pos, pos))
+
+    def intact(self, win):
+        """True while none of ``win``'s bytes have been (or are being) overwritten."""
+        return win.start_pos >= self._claimed_pos - self.capacity
+
+    def window(self, start_pos, nbytes):
+        start = start_pos % self.capacity
+        return AudioWindow(self._view[start:start + nbytes], start_pos, self.time_at(start_pos))
+
+    def wait_for(self, pos, timeout=None):
+        """Block until ``pos`` bytes have been written. Returns False on timeout/close."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self._write_pos >= pos or self._closed, timeout
+            ) and self._write_pos >= pos
+
+
+class AudioReader:
+    """Independent read cursor into an AudioRing."""
+
+    def __init__(self, ring, name="reader", start_pos=None):
+        self.ring = ring
+        self.name = name
+        self.pos = ring.write_pos if start_pos is None else start_pos
+        self.overruns = 0
+
+    def _catch_up(self):
+        oldest = self.ring.oldest_pos
+        if self.pos < oldest:
+            self.overruns += 1
+            logging.warning(f"Audio reader '{self.name}' fell behind; skipped "
+                            f"{(oldest - self.pos) / self.ring.bytes_per_second:.2f}s")
+            self.pos = oldest
+
+    def available(self):
+        return self.ring.write_pos - self.pos
+
+    def check(self, win):
+        """Call after copying out of ``win``: False (and an overrun) if it was overwritten meanwhile."""
+        if self.ring.intact(win):
+            return True
+        self.overruns += 1
+        logging.warning(f"Audio reader '{self.name}' fell behind; a window was overwritten "
+                        f"while in use")
+        return False
+
+    def read(self, nbytes=CHUNK_FRAMES * SAMPLE_WIDTH, timeout=None):
+        """Return the next ``nbytes`` as an AudioWindow, or None on timeout."""
+        nbytes = min(nbytes, self.ring.capacity)
+        if not self.ring.wait_for(self.pos + nbytes, timeout):
+            return None
+        self._catch_up()
+        win = self.ring.window(self.pos, nbytes)
+        self.pos += nbytes
+        return win
+
+    def seek_time(self, when):
+        self.pos = self.ring.pos_at(when)
+
+    def skip_until(self, when):
+        # Only ever moves forward: drop audio heard before ``when``
+        # (e.g. Sonny's own voice) but keep anything after it.
+        self.pos = max(self.pos, self.ring.pos_at(when))
+
+    def seek_latest(self):
+        self.pos = self.ring.write_pos
+
+    def rewind(self, seconds):
+        back = int(seconds * self.ring.bytes_per_second)
+        back -= back % self.ring.sample_width
+        self.pos = max(self.ring.oldest_pos, self.pos - back)
+
+
+class AudioCapture:
+    """Dedicated thread that drains ``stream`` into an AudioRing.
+
+    ``stream`` is anything with PyAudio's ``read(n, exception_on_overflow=...)``.
+    """
+
+    def __init__(self, stream, seconds=10, chunk=CHUNK_FRAMES,
+                 rate=SAMPLE_RATE, sample_width=SAMPLE_WIDTH):
+        self.stream = stream
+        self.chunk = chunk
+        self.ring = AudioRing(seconds, rate, sample_width)
+        self.chunks_captured = 0
+        self.read_errors = 0
+        # Seconds between successive reads returning; with a steady device
+        # these sit at chunk / rate, so the spread is scheduling jitter
+        self.read_intervals = deque(maxlen=4096)
+        self._running = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return self
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, name="audio-capture", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        self._running.clear()
+        if self._thread:
+            self._thread.join(timeout)
+        self.ring.close()
+
+    def reader(self, name="reader", start_pos=None):
+        return AudioReader(self.ring, name, start_pos)
+
+    def jitter_stats(self):
+        """Read-interval deviation from the nominal chunk period, in ms."""
+        period = self.chunk / self.ring.rate
+        deviations = sorted(abs(i - period) for i in self.read_intervals)
+        if not deviations:
+            return {"reads": 0, "read_errors": self.read_errors}
+
+        def pct(p):
+            return round(deviations[min(len(deviations) - 1, int(p / 100 * len(deviations)))] * 1000, 2)
+
+        return {
+            "reads": len(deviations),
+            "period_ms": round(period * 1000, 2),
+            "jitter_ms_p50": pct(50),
+            "jitter_ms_p95": pct(95),
+            "jitter_ms_p99": pct(99),
+            "jitter_ms_max": round(deviations[-1] * 1000, 2),
+            "read_errors": self.read_errors,
+        }
+
+    def _run(self):
+        logging.info("Audio capture thread started")
+        last_read = None
+        failures = 0
+        while self._running.is_set():
+            try:
+                data = self.stream.read(self.chunk, exception_on_overflow=False)
+            except Exception as e:
+                self.read_errors += 1
+                failures += 1
+                last_read = None  # the gap is not scheduling jitter
+                if failures >= MAX_READ_ERRORS:
+                    logging.error(f"Audio capture: {failures} failed reads in a row ({e}); giving up")
+                    break
+                logging.warning(f"Audio capture read failed ({failures}/{MAX_READ_ERRORS}): {e}; retrying")
+                time.sleep(READ_RETRY_DELAY)
+                continue
+            failures = 0
+            if not data:
+                break
+            now = time.monotonic()
+            if last_read is not None:
+                self.read_intervals.append(now - last_read)
+            last_read = now
+            self.ring.write(data)
+            self.chunks_captured += 1
+        self.ring.close()
+        logging.info("Audio capture thread stopped")
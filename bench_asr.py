@@ -0,0 +1,247 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from vosk import Model, SetLogLevel
+
+from audio_capture import AudioCapture, SAMPLE_RATE, SAMPLE_WIDTH
+from command_matcher import CommandMatcher
+from commands import TABLES, grammar
+from recognizer import RecognizerSession, hypotheses
+from vad import EnergyVAD
+from wake_word import WakeWordSpotter
+from wav_source import WavStream
+
+# -----------------------------------------
+# Offline voice-pipeline benchmark: WAV in, JSON report out
+#
+#   python3 bench_asr.py [--labels corpus.csv] [--app sonny|voice] [--wake]
+#                        [--speed 1] [--out report.json] [--baseline last.json]
+#
+# Each clip replaces the PyAudio stream with a WavStream feeding the real
+# AudioCapture ring, then goes through the same path as the app:
+# (optional) wake spotter -> command RecognizerSession -> CommandMatcher.
+# The matcher and recognizer are built from the app's command table in
+# commands.py: Control_Sonny ("sonny") decodes open-vocabulary, voice.py
+# constrains Vosk to a grammar of its phrases. --commands replaces the
+# table with a file of phrases, one per line.
+#
+# corpus.csv rows: "wav_path,expected phrase[,speech_end_seconds]".
+# An empty expected phrase means the clip must not match anything;
+# speech_end defaults to the last loud 10 ms of the clip. Without
+# --labels, sample-3s.wav runs unlabelled (speed/latency only).
+#
+# --speed 0 (default) drains each clip as fast as the decoder goes and
+# reports latency in audio time: how much audio after the end of speech
+# the endpointer needed before the result came out. --speed N paces the
+# audio like a microphone at N x real time and reports wall-clock latency
+# from end of speech to result.
+#
+# --baseline compares against an earlier report and exits 1 when
+# accuracy drops or real-time factor / latency grow past the tolerances.
+# -----------------------------------------
+BYTES_PER_SECOND = SAMPLE_RATE * SAMPLE_WIDTH
+DEFAULT_CLIP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sample-3s.wav")
+SPEECH_RMS = 500.0        # "loud" 10 ms frame when estimating the end of speech
+ACCURACY_TOLERANCE = 0.02
+SLOWDOWN_TOLERANCE = 0.20
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def estimate_speech_end(pcm, rate=SAMPLE_RATE, threshold=SPEECH_RMS):
+    """Seconds into the clip where the last loud 10 ms frame ends."""
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+    frame = rate // 100
+    n = len(samples) // frame
+    if not n:
+        return 0.0
+    rms = np.sqrt((samples[:n * frame].reshape(n, frame) ** 2).mean(axis=1))
+    loud = np.flatnonzero(rms >= threshold)
+    return (loud[-1] + 1) * frame / rate if len(loud) else 0.0
+
+
+def load_corpus(labels):
+    if not labels:
+        return [(DEFAULT_CLIP, None, None)]
+    base = os.path.dirname(os.path.abspath(labels))
+    rows = []
+    with open(labels, newline="") as f:
+        for r in csv.reader(f):
+            if not r or r[0].startswith("#"):
+                continue
+            expected = r[1].strip() if len(r) > 1 else ""
+            speech_end = float(r[2]) if len(r) > 2 and r[2].strip() else None
+            rows.append((os.path.join(base, r[0]), expected, speech_end))
+    return rows
+
+
+def first_final(session, reader):
+    """(final event, wall time it came out, reader position then) or (None, None, None)."""
+    while True:
+        found = False
+        for event in session.stream(reader, timeout=3600):
+            found = True
+            if event.kind == "final" and event.text:
+                return event, time.monotonic(), reader.pos
+        if not found:
+            return None, None, None
+
+
+def run_clip(path, expected, speech_end, spotter, session, matcher, speed):
+    stream = WavStream(path, realtime=speed > 0, speed=speed or 1.0)
+    if speech_end is None:
+        speech_end = estimate_speech_end(stream.pcm)
+    capture = AudioCapture(stream, seconds=stream.duration + 1)
+    reader = capture.reader("bench", start_pos=0)
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    capture.start()
+
+    row = {"clip": os.path.basename(path), "expected": expected, "audio_s": round(stream.duration, 3)}
+    woke = True
+    if spotter:
+        hit = spotter.wait(reader, timeout=3600)
+        woke = row["woke"] = hit is not None
+        if hit:
+            reader.pos = hit.handoff_pos
+    event = result_time = result_pos = None
+    if woke:
+        event, result_time, result_pos = first_final(session, reader)
+    capture.stop()
+    row["cpu_s"] = round(time.process_time() - cpu_start, 4)
+    row["wall_s"] = round(time.perf_counter() - wall_start, 4)
+
+    phrase, confirm = None, False
+    if event:
+        row["heard"] = event.text
+        start = time.perf_counter()
+        phrase, confirm = matcher.decide(hypotheses(event.result))
+        row["match_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        end_pos = int(speech_end * BYTES_PER_SECOND)
+        if speed > 0:
+            row["latency_ms"] = round((result_time - capture.ring.time_at(end_pos)) * 1000, 1)
+        else:
+            row["latency_ms"] = round((result_pos - end_pos) / BYTES_PER_SECOND * 1000, 1)
+    row["matched"] = phrase
+    row["confirm"] = confirm
+    if expected is not None:
+        if confirm:
+            # The user answers honestly: "yes" only for the right command
+            phrase = phrase if phrase == expected else None
+        if phrase is None:
+            row["outcome"] = "reprompt" if expected else "correct"
+        else:
+            row["outcome"] = "correct" if phrase == expected else "wrong"
+    return row
+
+
+def summarize(rows, speed, wake):
+    audio_s = sum(r["audio_s"] for r in rows)
+    cpu_s = sum(r["cpu_s"] for r in rows)
+    latencies = [r["latency_ms"] for r in rows if "latency_ms" in r]
+    match_ms = [r["match_ms"] for r in rows if "match_ms" in r]
+    labelled = [r for r in rows if "outcome" in r]
+    outcomes = {k: sum(r.get("outcome") == k for r in labelled) for k in ("correct", "wrong", "reprompt")}
+    report = {
+        "clips": len(rows),
+        "speed": speed or "max",
+        "latency_clock": "wall" if speed > 0 else "audio",
+        "audio_s": round(audio_s, 2),
+        "cpu_s": round(cpu_s, 2),
+        "real_time_factor": round(cpu_s / audio_s, 4) if audio_s else None,
+        "latency_ms_p50": None if not latencies else round(percentile(latencies, 50)),
+        "latency_ms_p95": None if not latencies else round(percentile(latencies, 95)),
+        "latency_ms_max": None if not latencies else round(max(latencies)),
+        "match_ms_p50": None if not match_ms else round(percentile(match_ms, 50), 3),
+        "labelled": len(labelled),
+        "accuracy": round(outcomes["correct"] / len(labelled), 4) if labelled else None,
+        **outcomes,
+        "confirmations": sum(r["confirm"] for r in labelled),
+    }
+    if wake:
+        report["wake_recall"] = round(sum(r["woke"] for r in rows) / len(rows), 4) if rows else None
+    return report
+
+
+def regressions(report, baseline):
+    found = []
+    if report["accuracy"] is not None and baseline.get("accuracy") is not None:
+        if report["accuracy"] < baseline["accuracy"] - ACCURACY_TOLERANCE:
+            found.append(f"accuracy {baseline['accuracy']} -> {report['accuracy']}")
+    keys = ["real_time_factor"]
+    if baseline.get("latency_clock") == report["latency_clock"]:
+        keys += ["latency_ms_p50", "latency_ms_p95"]
+    for key in keys:
+        old, new = baseline.get(key), report.get(key)
+        if old and new is not None and new > old * (1 + SLOWDOWN_TOLERANCE):
+            found.append(f"{key} {old} -> {new}")
+    return found
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Offline wake/ASR/matching benchmark on WAV files")
+    ap.add_argument("--model", default="/home/Robo/Documents/Sonny/vosk-model-small-en-us-0.15")
+    ap.add_argument("--labels", help="CSV of wav_path,expected_phrase[,speech_end_seconds]")
+    ap.add_argument("--app", choices=sorted(TABLES), default="sonny",
+                    help="whose command table and recognizer settings to use")
+    ap.add_argument("--commands", help="command phrases to use instead, one per line")
+    ap.add_argument("--wake", action="store_true", help="clips start with the wake phrase")
+    ap.add_argument("--speed", type=float, default=0.0,
+                    help="pace audio at N x real time (0 = as fast as possible)")
+    ap.add_argument("--no-vad", action="store_true", help="feed every frame to the recognizers")
+    ap.add_argument("--per-clip", action="store_true", help="include every clip in the report")
+    ap.add_argument("--out", help="also write the report here")
+    ap.add_argument("--baseline", help="earlier report; exit 1 on regression")
+    args = ap.parse_args()
+
+    rows = load_corpus(args.labels)
+    phrases = list(TABLES[args.app])
+    if args.commands:
+        with open(args.commands) as f:
+            phrases = [ln.strip() for ln in f if ln.strip()]
+    unknown = sorted({expected for _, expected, _ in rows if expected} - set(phrases))
+    if unknown:
+        print(f"warning: labels not in the command table: {unknown}", file=sys.stderr)
+    matcher = CommandMatcher(phrases)
+
+    SetLogLevel(-1)
+    model = Model(args.model)
+    spotter = WakeWordSpotter(model, vad=None if args.no_vad else EnergyVAD()) if args.wake else None
+    # Same settings as the app's live command session
+    session = RecognizerSession(model, "command",
+                                grammar(phrases, matcher) if args.app == "voice" else None,
+                                vad=None if args.no_vad else EnergyVAD(),
+                                alternatives=5, words=True)
+
+    results = [run_clip(path, expected, speech_end, spotter, session, matcher, args.speed)
+               for path, expected, speech_end in rows]
+    report = summarize(results, args.speed, args.wake)
+    if args.per_clip:
+        report["per_clip"] = results
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(report, json.load(f))
+        report["regressions"] = found
+        status = 1 if found else 0
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
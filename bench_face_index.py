@@ -0,0 +1,87 @@
+import argparse
+import json
+import os
+import pickle
+import tempfile
+import time
+
+import numpy as np
+
+from face_index import DIM, TOLERANCE, FaceIndex
+
+# -----------------------------------------
+# Face index vs list-in-a-pickle on synthetic embeddings
+#
+#   python3 bench_face_index.py [--sizes 10 100 1000 10000] [--queries 200]
+#
+# Each synthetic person is a random unit-ish 128-d centre; queries are
+# that centre plus noise well inside TOLERANCE, so "accuracy" checks that
+# the nearest name is the right person. The baseline is the usual
+# face_recognition flow: np.linalg.norm over the list of known encodings
+# per query, and re-pickling everything on each enrollment.
+# -----------------------------------------
+
+
+def people(n, rng):
+    centres = rng.normal(0, 0.09, size=(n, DIM)).astype(np.float32)  # |x| ~ 1, like dlib
+    return [f"person_{i}" for i in range(n)], centres
+
+
+def bench_size(n, queries, rng, workdir):
+    names, centres = people(n, rng)
+    picks = rng.integers(0, n, size=queries)
+    probes = centres[picks] + rng.normal(0, 0.01, size=(queries, DIM)).astype(np.float32)
+
+    # Baseline: Python list of arrays + whole-pickle rewrite
+    known = [c for c in centres]
+    start = time.perf_counter()
+    list_hits = 0
+    for q, want in zip(probes, picks):
+        d = np.linalg.norm(np.array(known) - q, axis=1)
+        list_hits += int(np.argmin(d)) == want
+    list_query = (time.perf_counter() - start) / queries
+    pickle_path = os.path.join(workdir, f"encodings_{n}.pickle")
+    start = time.perf_counter()
+    with open(pickle_path, "wb") as f:
+        pickle.dump({"encodings": known + [centres[0]], "names": names + ["new"]}, f)
+    pickle_enroll = time.perf_counter() - start
+
+    # Index
+    index = FaceIndex(os.path.join(workdir, f"index_{n}"))
+    index.add_many(names, centres)
+    start = time.perf_counter()
+    index_hits = 0
+    for q, want in zip(probes, picks):
+        best = index.top_k(q, 1)
+        index_hits += best[0][2] == want and best[0][1] <= TOLERANCE
+    index_query = (time.perf_counter() - start) / queries
+    start = time.perf_counter()
+    index.add("new", centres[0])
+    index_enroll = time.perf_counter() - start
+
+    return {
+        "people": n,
+        "list_query_us": round(list_query * 1e6, 1),
+        "index_query_us": round(index_query * 1e6, 1),
+        "list_accuracy": list_hits / queries,
+        "index_accuracy": index_hits / queries,
+        "pickle_enroll_ms": round(pickle_enroll * 1000, 2),
+        "index_enroll_ms": round(index_enroll * 1000, 2),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Face index vs pickle list on synthetic embeddings")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    with tempfile.TemporaryDirectory() as workdir:
+        report = [bench_size(n, args.queries, rng, workdir) for n in args.sizes]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import argparse
+import json
+import os
+import time
+
+# -----------------------------------------
+# Idle cost of a running process, from /proc
+#
+#   python3 bench_idle.py $(pgrep -f Control_Sonny.py) [--seconds 60]
+#
+# Samples CPU time and context switches of the process (all threads)
+# and of its children (the vision worker) over a window in which nobody
+# talks to Sonny or stands in front of the camera. Linux only.
+# -----------------------------------------
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+def children(pid):
+    found = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        try:
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                found += [int(c) for c in f.read().split()]
+        except OSError:
+            pass
+    return found
+
+
+def sample(pid):
+    """(cpu seconds, voluntary switches, involuntary switches, threads), all threads summed."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS   # utime + stime
+    voluntary = involuntary = threads = 0
+    for task in os.listdir(f"/proc/{pid}/task"):
+        try:
+            with open(f"/proc/{pid}/task/{task}/status") as f:
+                for line in f:
+                    if line.startswith("voluntary_ctxt_switches"):
+                        voluntary += int(line.split()[1])
+                    elif line.startswith("nonvoluntary_ctxt_switches"):
+                        involuntary += int(line.split()[1])
+        except OSError:
+            continue   # thread exited meanwhile
+        threads += 1
+    return cpu, voluntary, involuntary, threads
+
+
+def measure(pids, seconds):
+    before = {pid: sample(pid) for pid in pids}
+    time.sleep(seconds)
+    report = {}
+    for pid in pids:
+        try:
+            after = sample(pid)
+        except OSError:
+            continue
+        cpu, vol, invol, _ = (a - b for a, b in zip(after, before[pid]))
+        with open(f"/proc/{pid}/comm") as f:
+            name = f.read().strip()
+        report[f"{pid} {name}"] = {
+            "cpu_pct": round(cpu / seconds * 100, 2),
+            "voluntary_switches_per_s": round(vol / seconds, 1),
+            "involuntary_switches_per_s": round(invol / seconds, 1),
+            "threads": after[3],
+        }
+    return report
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Idle CPU and context switches of a process from /proc")
+    ap.add_argument("pid", type=int)
+    ap.add_argument("--seconds", type=float, default=60.0)
+    ap.add_argument("--no-children", action="store_true", help="leave out child processes")
+    args = ap.parse_args()
+
+    pids = [args.pid] + ([] if args.no_children else children(args.pid))
+    print(json.dumps(measure(pids, args.seconds), indent=2))
+
+
+if __name__ == "__main__":
+    main()
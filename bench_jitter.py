@@ -0,0 +1,81 @@
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+
+from audio_capture import AudioCapture, CHUNK_FRAMES
+from bench_vision import CameraSim
+from vision import FaceDetector, FaceFollower, FrameGrabber
+from vision_process import VisionProcess
+from wav_source import WavStream
+
+# -----------------------------------------
+# Audio-read jitter with face tracking in a thread vs in its own process
+#
+#   python3 bench_jitter.py clip.mp4 [--seconds 20] [--vision-mode detect|track]
+#
+# A real-time WavStream stands in for the microphone and the video is
+# played like a live camera. Each run reports how far the audio capture
+# thread's read intervals stray from the nominal chunk period:
+#   none    -- audio only
+#   thread  -- FrameGrabber + detection loop in this interpreter (old layout)
+#   process -- VisionProcess (shared-memory frames, worker process)
+# -----------------------------------------
+DEFAULT_WAV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sample-3s.wav")
+
+
+def vision_thread(grabber, find_face, stop):
+    seq = 0
+    while not stop.is_set():
+        got = grabber.latest(seq, timeout=0.5)
+        if got:
+            seq, _, frame = got
+            find_face(frame)
+
+
+def run(layout, args):
+    stream = WavStream([args.wav] * int(args.seconds / 3 + 2), realtime=True)
+    capture = AudioCapture(stream, chunk=args.chunk).start()
+    stop = threading.Event()
+    extra = {}
+    vision = grabber = None
+    if layout == "thread":
+        grabber = FrameGrabber(CameraSim(args.video), max_failures=1).start()
+        if args.vision_mode == "track":
+            find_face = FaceFollower(tracker=args.tracker).process
+        else:
+            find_face = FaceDetector().detect
+        threading.Thread(target=vision_thread, args=(grabber, find_face, stop), daemon=True).start()
+    elif layout == "process":
+        vision = VisionProcess(CameraSim(args.video), args.vision_mode, args.tracker).start()
+
+    time.sleep(args.seconds)
+    stop.set()
+    if grabber:
+        grabber.stop()
+    if vision:
+        extra = vision.stats()
+        vision.stop()
+    capture.stop()
+    return {"layout": layout, **capture.jitter_stats(), **({"vision": extra} if extra else {})}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Audio-read jitter: vision thread vs vision process")
+    ap.add_argument("video", help="recorded clip at least --seconds long")
+    ap.add_argument("--wav", default=DEFAULT_WAV)
+    ap.add_argument("--seconds", type=float, default=15)
+    ap.add_argument("--chunk", type=int, default=CHUNK_FRAMES // 4,
+                    help="frames per audio read (smaller = more sensitive)")
+    ap.add_argument("--vision-mode", default="detect", choices=("detect", "track"))
+    ap.add_argument("--tracker", default="template")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    print(json.dumps([run(layout, args) for layout in ("none", "thread", "process")], indent=2))
+
+
+if __name__ == "__main__":
+    main()
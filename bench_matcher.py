@@ -0,0 +1,90 @@
+import argparse
+import difflib
+import random
+import time
+
+from command_matcher import CommandMatcher
+
+# -----------------------------------------
+# Benchmark: indexed CommandMatcher vs difflib.get_close_matches
+#
+#   python3 bench_matcher.py [queries] [--repeats 3]
+#
+# Times are the best of --repeats passes, so a busy Pi doesn't skew them.
+# -----------------------------------------
+VERBS = ["turn", "set", "show", "tell", "play", "open", "close", "start", "stop", "check",
+         "switch", "move", "find", "read", "call", "speak", "center", "raise", "lower", "count"]
+OBJECTS = ["lights", "timer", "music", "head", "arm", "camera", "weather", "news", "joke",
+           "volume", "door", "window", "alarm", "battery", "servo", "mouth", "eyes", "story",
+           "igbo", "english", "fan", "status", "date", "time", "name", "voice", "hand", "map"]
+EXTRAS = ["", "please", "now", "for me", "in the lab", "right now", "again", "slowly", "quickly",
+          "a little", "all the way", "to the left", "to the right", "up", "down"]
+
+
+def synthetic_phrases(n):
+    phrases = set()
+    while len(phrases) < n:
+        words = [random.choice(VERBS), "the", random.choice(OBJECTS), random.choice(EXTRAS),
+                 random.choice(OBJECTS) if random.random() < 0.5 else ""]
+        phrases.add(" ".join(w for w in words if w))
+    return sorted(phrases)
+
+
+def noisy(phrase):
+    # Simulate ASR slips: drop/duplicate/swap a character, add a filler
+    chars = list(phrase)
+    i = random.randrange(len(chars))
+    op = random.random()
+    if op < 0.33:
+        del chars[i]
+    elif op < 0.66:
+        chars.insert(i, chars[i])
+    else:
+        chars[i] = random.choice("aeiou")
+    text = "".join(chars)
+    return random.choice(["", "please ", "um ", "hey sonny "]) + text
+
+
+def bench(label, fn, queries, repeats=1):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        results = [fn(q) for q in queries]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(queries) * 1000, results
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Indexed CommandMatcher vs difflib.get_close_matches")
+    ap.add_argument("queries", nargs="?", type=int, default=200, help="noisy queries per size")
+    ap.add_argument("--repeats", type=int, default=3, help="timed passes per matcher; best is kept")
+    args = ap.parse_args()
+    queries_per_size = args.queries
+    random.seed(83)
+
+    print(f"{'phrases':>8} {'difflib ms':>11} {'indexed ms':>11} {'speedup':>8} "
+          f"{'difflib acc':>11} {'indexed acc':>11} {'build ms':>9}")
+    for size in (1000, 2000, 5000, 10000):
+        phrases = synthetic_phrases(size)
+        targets = [random.choice(phrases) for _ in range(queries_per_size)]
+        queries = [noisy(t) for t in targets]
+
+        start = time.perf_counter()
+        matcher = CommandMatcher(phrases)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        def baseline(q):
+            m = difflib.get_close_matches(matcher.clean(q), phrases, n=1, cutoff=0.65)
+            return m[0] if m else None
+
+        t_base, base_res = bench("difflib", baseline, queries, args.repeats)
+        t_idx, idx_res = bench("indexed", matcher.match, queries, args.repeats)
+        base_acc = sum(r == t for r, t in zip(base_res, targets)) / len(queries)
+        idx_acc = sum(r == t for r, t in zip(idx_res, targets)) / len(queries)
+        print(f"{size:>8} {t_base:>11.3f} {t_idx:>11.3f} {t_base / t_idx:>7.0f}x "
+              f"{base_acc:>11.0%} {idx_acc:>11.0%} {build_ms:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import argparse
+import csv
+import json
+import os
+import sys
+
+from vosk import Model, SetLogLevel
+
+from audio_capture import AudioReader
+from command_matcher import CommandMatcher
+from recognizer import RecognizerSession, hypotheses, result_text
+from wav_source import ring_from_wav
+
+# -----------------------------------------
+# Offline evaluation: 1-best vs n-best/confidence command matching
+#
+#   python3 bench_nbest.py --labels commands.csv [--model MODEL] [--grammar]
+#
+# commands.csv rows are "wav_path,expected phrase" (expected may be
+# empty for clips that should NOT match anything). Every distinct
+# expected phrase becomes a command; add more with --commands file.txt.
+#
+# A re-prompt is counted whenever Sonny would say "Can you repeat that?"
+# (no match, or a confirmation the user answers "no"). A confirmation the
+# user answers "yes" is a short yes/no turn instead of a full round trip.
+#
+# Clips whose top hypothesis is exactly a command phrase must never be
+# confirmed, neither from the n-best list nor from the top hypothesis
+# alone at its (low) weight; any such confirmation is listed under
+# "exact_match" and the run exits 1.
+# -----------------------------------------
+
+
+def first_final(session, path):
+    reader = AudioReader(ring_from_wav(path), "eval", start_pos=0)
+    while True:
+        found = False
+        for event in session.stream(reader, timeout=3600):
+            found = True
+            if event.kind == "final" and event.text:
+                return event.result
+        if not found:
+            return None
+
+
+def main():
+    ap = argparse.ArgumentParser(description="1-best vs n-best command matching on labelled WAVs")
+    ap.add_argument("--model", default="/home/Robo/Documents/Sonny/vosk-model-small-en-us-0.15")
+    ap.add_argument("--labels", required=True, help="CSV of wav_path,expected_phrase")
+    ap.add_argument("--commands", help="extra command phrases, one per line")
+    ap.add_argument("--grammar", action="store_true", help="restrict Vosk to the command phrases")
+    ap.add_argument("--alternatives", type=int, default=5)
+    args = ap.parse_args()
+
+    base = os.path.dirname(os.path.abspath(args.labels))
+    with open(args.labels, newline="") as f:
+        rows = [(os.path.join(base, r[0]), r[1].strip() if len(r) > 1 else "")
+                for r in csv.reader(f) if r and not r[0].startswith("#")]
+    phrases = sorted({expected for _, expected in rows if expected})
+    if args.commands:
+        with open(args.commands) as f:
+            phrases = sorted(set(phrases) | {ln.strip() for ln in f if ln.strip()})
+
+    SetLogLevel(-1)
+    model = Model(args.model)
+    matcher = CommandMatcher(phrases)
+    grammar = [matcher.clean(p) for p in phrases] + ["cancel", "[unk]"] if args.grammar else None
+    session = RecognizerSession(model, "eval", grammar,
+                                alternatives=args.alternatives, words=True)
+
+    tally = {
+        "one_best": {"correct": 0, "wrong": 0, "reprompt": 0},
+        "n_best": {"correct": 0, "wrong": 0, "reprompt": 0, "confirmations": 0},
+        "exact_match": {"clips": 0, "n_best_confirmations": 0, "one_best_confirmations": 0},
+    }
+    for path, expected in rows:
+        result = first_final(session, path)
+        expected = expected or None
+
+        one = matcher.match(result_text(result)) if result else None
+        if one is None:
+            tally["one_best"]["reprompt" if expected else "correct"] += 1
+        else:
+            tally["one_best"]["correct" if one == expected else "wrong"] += 1
+
+        hyps = hypotheses(result)
+        phrase, confirm = matcher.decide(hyps) if result else (None, False)
+        if hyps and matcher.exact(hyps[0][0]):
+            exact = tally["exact_match"]
+            exact["clips"] += 1
+            exact["n_best_confirmations"] += confirm
+            exact["one_best_confirmations"] += matcher.decide(hyps[:1])[1]
+        if confirm:
+            tally["n_best"]["confirmations"] += 1
+            # The user answers honestly: "yes" only for the right command
+            phrase = phrase if phrase == expected else None
+        if phrase is None:
+            tally["n_best"]["reprompt" if expected else "correct"] += 1
+        else:
+            tally["n_best"]["correct" if phrase == expected else "wrong"] += 1
+
+    before = tally["one_best"]["reprompt"]
+    after = tally["n_best"]["reprompt"]
+    report = {
+        "clips": len(rows),
+        "commands": len(phrases),
+        **tally,
+        "reprompt_reduction": (before - after) / before if before else None,
+    }
+    print(json.dumps(report, indent=2))
+    exact = tally["exact_match"]
+    if exact["n_best_confirmations"] or exact["one_best_confirmations"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
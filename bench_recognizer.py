@@ -0,0 +1,70 @@
+import json
+import sys
+import time
+
+from vosk import Model, KaldiRecognizer, SetLogLevel
+
+# -----------------------------------------
+# Microbenchmark: KaldiRecognizer construction vs Reset()
+#
+#   python3 bench_recognizer.py [model_path] [iterations]
+# -----------------------------------------
+model_path = sys.argv[1] if len(sys.argv) > 1 else "/home/Robo/Documents/Sonny/vosk-model-small-en-us-0.15"
+iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+SetLogLevel(-1)
+model = Model(model_path)
+
+grammar_phrases = [
+    "what time is it", "what is today's date", "hello", "how are you",
+    "set timer", "change voice", "goodbye", "what is your name",
+    "tell me a joke", "make me laugh", "say something funny",
+    "who made you", "who created you", "who built you", "cancel",
+]
+silence = bytes(4096 * 2)
+
+
+def timed(label, fn):
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    per_call = (time.perf_counter() - start) / iterations * 1000
+    print(f"{label:<40} {per_call:9.3f} ms/call")
+    return per_call
+
+
+def build_open():
+    KaldiRecognizer(model, 16000)
+
+
+def build_grammar():
+    KaldiRecognizer(model, 16000, json.dumps(grammar_phrases))
+
+
+open_rec = KaldiRecognizer(model, 16000)
+grammar_rec = KaldiRecognizer(model, 16000, json.dumps(grammar_phrases))
+
+
+def reset_open():
+    open_rec.AcceptWaveform(silence)
+    open_rec.Reset()
+
+
+def reset_grammar():
+    grammar_rec.AcceptWaveform(silence)
+    grammar_rec.Reset()
+
+
+def feed_only():
+    open_rec.AcceptWaveform(silence)
+
+
+print(f"model: {model_path}  iterations: {iterations}")
+t_feed = timed("AcceptWaveform(256 ms silence)", feed_only)
+t_open = timed("KaldiRecognizer() open vocabulary", build_open)
+t_gram = timed("KaldiRecognizer() + json grammar", build_grammar)
+t_ropen = timed("Reset() open vocabulary (+feed)", reset_open) - t_feed
+t_rgram = timed("Reset() grammar (+feed)", reset_grammar) - t_feed
+print(f"speedup open vocabulary: {t_open / max(t_ropen, 1e-6):.0f}x")
+print(f"speedup grammar:         {t_gram / max(t_rgram, 1e-6):.0f}x")
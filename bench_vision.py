@@ -0,0 +1,207 @@
+import argparse
+import json
+import queue
+import threading
+import time
+
+import cv2
+
+from vision import (
+    DETECT_EVERY, DETECT_WIDTH, FULL_SWEEP_EVERY, FaceDetector, FaceFollower, FrameGrabber,
+    load_face_cascade,
+)
+
+# -----------------------------------------
+# Face tracking FPS / latency on a recorded video
+#
+#   python3 bench_vision.py clip.mp4 [--realtime] [--seconds 30]
+#
+# Compares the old loop (blocking cap.read() + full-resolution
+# detectMultiScale(gray, 1.3, 5)) with FrameGrabber + FaceDetector
+# (detect every frame) and FrameGrabber + FaceFollower (detect, then track).
+# "cpu_s" is process CPU time spent, so the modes can be compared per frame.
+#
+# Without --realtime every frame is processed as fast as possible
+# (throughput). With --realtime the file is played like a camera at its
+# own FPS through a small driver queue that keeps the oldest frames when
+# full, the way V4L2 does; "frame_age" is then how old each frame was
+# when its face result came out -- the lag the head actually sees.
+# -----------------------------------------
+DRIVER_BUFFERS = 4
+
+
+class CameraSim:
+    """Plays a video file at ``fps`` through a bounded driver queue."""
+
+    def __init__(self, path, fps=None, seconds=None):
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise SystemExit(f"cannot open {path}")
+        self.fps = fps or self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.max_frames = int(seconds * self.fps) if seconds else None
+        self.dropped = 0
+        self.last_stamp = None
+        self._queue = queue.Queue(DRIVER_BUFFERS)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        start = time.monotonic()
+        n = 0
+        while self.max_frames is None or n < self.max_frames:
+            ok, frame = self.cap.read()
+            if not ok:
+                break
+            due = start + n / self.fps
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                self._queue.put_nowait((time.monotonic(), frame))
+            except queue.Full:
+                self.dropped += 1
+            n += 1
+        self._queue.put((None, None))
+
+    def read(self):
+        stamp, frame = self._queue.get()
+        if frame is None:
+            self._queue.put((None, None))  # keep reporting end-of-stream
+            return False, None
+        self.last_stamp = stamp
+        return True, frame
+
+
+class FileSource:
+    """Every frame, as fast as the consumer asks."""
+
+    def __init__(self, path, seconds=None):
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise SystemExit(f"cannot open {path}")
+        fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.max_frames = int(seconds * fps) if seconds else None
+        self.count = 0
+        self.last_stamp = None
+
+    def read(self):
+        if self.max_frames is not None and self.count >= self.max_frames:
+            return False, None
+        ok, frame = self.cap.read()
+        self.count += ok
+        self.last_stamp = time.monotonic()
+        return ok, frame
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def summarize(name, ages, detect_times, hits, elapsed, extra=None):
+    frames = len(detect_times)
+    report = {
+        "mode": name,
+        "frames": frames,
+        "fps": round(frames / elapsed, 1) if elapsed else None,
+        "face_rate": round(hits / frames, 3) if frames else None,
+        "detect_ms_p50": None if not frames else round(percentile(detect_times, 50) * 1000, 2),
+        "detect_ms_p95": None if not frames else round(percentile(detect_times, 95) * 1000, 2),
+        "frame_age_ms_p50": None if not ages else round(percentile(ages, 50) * 1000, 1),
+        "frame_age_ms_p95": None if not ages else round(percentile(ages, 95) * 1000, 1),
+    }
+    report.update(extra or {})
+    return report
+
+
+def run_baseline(source):
+    cascade = load_face_cascade()
+    ages, detect_times, hits = [], [], 0
+    start = time.monotonic()
+    cpu_start = time.process_time()
+    while True:
+        ok, frame = source.read()
+        if not ok:
+            break
+        stamp = source.last_stamp
+        t0 = time.perf_counter()
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        faces = cascade.detectMultiScale(gray, 1.3, 5)
+        detect_times.append(time.perf_counter() - t0)
+        hits += len(faces) > 0
+        ages.append(time.monotonic() - stamp)
+    return summarize("baseline", ages, detect_times, hits, time.monotonic() - start,
+                     {"cpu_s": round(time.process_time() - cpu_start, 2)})
+
+
+def run_optimized(name, source, find_face, realtime, stats):
+    ages, detect_times, hits = [], [], 0
+    start = time.monotonic()
+    cpu_start = time.process_time()
+    if realtime:
+        grabber = FrameGrabber(source, max_failures=1).start()
+        seq = 0
+        while True:
+            got = grabber.latest(seq, timeout=2.0)
+            if got is None:
+                break
+            seq, stamp, frame = got
+            t0 = time.perf_counter()
+            face = find_face(frame)
+            detect_times.append(time.perf_counter() - t0)
+            hits += face is not None
+            ages.append(time.monotonic() - stamp)
+        grabber.stop()
+    else:
+        while True:
+            ok, frame = source.read()
+            if not ok:
+                break
+            t0 = time.perf_counter()
+            face = find_face(frame)
+            detect_times.append(time.perf_counter() - t0)
+            hits += face is not None
+            ages.append(time.monotonic() - source.last_stamp)
+    return summarize(("grabber+" if realtime else "") + name,
+                     ages, detect_times, hits, time.monotonic() - start,
+                     {"cpu_s": round(time.process_time() - cpu_start, 2), "stats": stats()})
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Face tracking FPS/latency on a video file")
+    ap.add_argument("video")
+    ap.add_argument("--realtime", action="store_true", help="play the file like a live camera")
+    ap.add_argument("--fps", type=float, help="override the file's frame rate in --realtime mode")
+    ap.add_argument("--seconds", type=float, help="only use the first N seconds")
+    ap.add_argument("--detect-width", type=int, default=DETECT_WIDTH)
+    ap.add_argument("--full-sweep-every", type=int, default=FULL_SWEEP_EVERY)
+    ap.add_argument("--tracker", default="template", help="template, mosse or kcf (opencv-contrib)")
+    ap.add_argument("--detect-every", type=int, default=DETECT_EVERY)
+    args = ap.parse_args()
+
+    def source():
+        if args.realtime:
+            return CameraSim(args.video, args.fps, args.seconds)
+        return FileSource(args.video, args.seconds)
+
+    def detector():
+        return FaceDetector(detect_width=args.detect_width,
+                            full_sweep_every=args.full_sweep_every)
+
+    det = detector()
+    follower = FaceFollower(detector(), args.tracker, args.detect_every)
+    results = []
+    for run in (run_baseline,
+                lambda s: run_optimized("downscaled+roi", s, det.detect, args.realtime, det.stats),
+                lambda s: run_optimized("detect+track", s, follower.process, args.realtime,
+                                        follower.stats)):
+        src = source()
+        report = run(src)
+        if args.realtime:
+            report["driver_dropped"] = src.dropped
+        results.append(report)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import argparse
+import csv
+import glob
+import json
+import os
+import time
+
+from vosk import Model, SetLogLevel
+
+from audio_capture import AudioReader, SAMPLE_RATE, SAMPLE_WIDTH
+from vad import EnergyVAD
+from wake_word import WakeWordSpotter
+from wav_source import ring_from_wav
+
+# -----------------------------------------
+# Wake-word latency / false-trigger report on recorded audio
+#
+#   python3 bench_wake.py --model MODEL --positive wake_wavs/ --negative chatter_wavs/
+#                         [--labels wake_end.csv] [--no-vad]
+#
+# positive/: clips that contain the wake phrase
+# negative/: clips that must NOT wake Sonny (conversation, TV, "hello there", ...)
+# labels:    optional CSV "file,wake_end_seconds" for exact detection latency
+# -----------------------------------------
+BYTES_PER_SECOND = SAMPLE_RATE * SAMPLE_WIDTH
+
+
+def run_file(spotter, path):
+    ring = ring_from_wav(path)
+    reader = AudioReader(ring, "bench", start_pos=0)
+    hits = []
+    start = time.perf_counter()
+    while True:
+        hit = spotter.wait(reader, timeout=3600)
+        if not hit:
+            break
+        hits.append(reader.pos / BYTES_PER_SECOND)
+    elapsed = time.perf_counter() - start
+    return hits, ring.write_pos / BYTES_PER_SECOND, elapsed
+
+
+def wav_files(folder):
+    return sorted(glob.glob(os.path.join(folder, "*.wav"))) if folder else []
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Wake-word latency and false-trigger report")
+    ap.add_argument("--model", default="/home/Robo/Documents/Sonny/vosk-model-small-en-us-0.15")
+    ap.add_argument("--positive", help="folder of WAVs containing the wake phrase")
+    ap.add_argument("--negative", help="folder of WAVs without the wake phrase")
+    ap.add_argument("--labels", help="CSV of file,wake_end_seconds for positives")
+    ap.add_argument("--no-vad", action="store_true", help="feed every frame to the spotter")
+    args = ap.parse_args()
+
+    SetLogLevel(-1)
+    spotter = WakeWordSpotter(Model(args.model), vad=None if args.no_vad else EnergyVAD())
+
+    labels = {}
+    if args.labels:
+        with open(args.labels, newline="") as f:
+            for row in csv.reader(f):
+                if row and not row[0].startswith("#"):
+                    labels[os.path.basename(row[0])] = float(row[1])
+
+    audio_seconds = compute_seconds = 0.0
+    detected, latencies = 0, []
+    positives = wav_files(args.positive)
+    for path in positives:
+        hits, dur, took = run_file(spotter, path)
+        audio_seconds += dur
+        compute_seconds += took
+        if hits:
+            detected += 1
+            wake_end = labels.get(os.path.basename(path))
+            if wake_end is not None:
+                latencies.append(hits[0] - wake_end)
+
+    false_triggers, negative_seconds = 0, 0.0
+    for path in wav_files(args.negative):
+        hits, dur, took = run_file(spotter, path)
+        audio_seconds += dur
+        compute_seconds += took
+        negative_seconds += dur
+        false_triggers += len(hits)
+
+    report = {
+        "positives": len(positives),
+        "recall": detected / len(positives) if positives else None,
+        "latency_ms_p50": None if not latencies else round(percentile(latencies, 50) * 1000),
+        "latency_ms_p95": None if not latencies else round(percentile(latencies, 95) * 1000),
+        "negative_hours": round(negative_seconds / 3600, 3),
+        "false_triggers": false_triggers,
+        "false_triggers_per_hour": (false_triggers / (negative_seconds / 3600)
+                                    if negative_seconds else None),
+        "real_time_factor": compute_seconds / audio_seconds if audio_seconds else None,
+        "vad": None if args.no_vad else spotter.session.vad.stats(),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+from command_matcher import CommandMatcher
+
+# -----------------------------------------
+# Spoken command table
+#
+# phrase -> action name. Each front end binds the action names to its
+# own handlers (bind()); tools such as bench_asr.py import the same
+# table without opening the mic or loading models, so what they measure
+# is what the robot listens for.
+# -----------------------------------------
+COMMANDS = {
+    "what time is it": "time",
+    "what is today's date": "date",
+    "hello": "talk_back",
+    "how are you": "how_are_you",
+    "set timer": "set_timer",
+    "goodbye": "exit",
+    "what is your name": "name",
+    "tell me a joke": "joke",
+    "make me laugh": "joke",
+    "say something funny": "joke",
+    "who made you": "creator",
+    "who created you": "creator",
+    "who built you": "creator",
+}
+
+# Control_Sonny.py
+SONNY_COMMANDS = {
+    **COMMANDS,
+    "kedu": "talk_back",
+    # language switches
+    "switch to igbo": "lang_igbo",
+    "speak igbo": "lang_igbo",
+    "switch to english": "lang_english",
+    "speak english": "lang_english",
+    # head
+    "center head": "center_head",
+}
+
+# voice.py
+VOICE_COMMANDS = {
+    **COMMANDS,
+    "change voice": "change_voice",
+}
+
+TABLES = {"sonny": SONNY_COMMANDS, "voice": VOICE_COMMANDS}
+
+# Always listened for, though not a command: stops the current reply
+CANCEL_WORD = "cancel"
+
+
+def bind(table, handlers):
+    """phrase -> handler, from a table and an action name -> handler dict."""
+    return {phrase: handlers[action] for phrase, action in table.items()}
+
+
+def grammar(phrases, matcher=None):
+    """Vosk grammar for a phrase list: cleaned the way the matcher cleans, plus "cancel"."""
+    matcher = matcher or CommandMatcher(())
+    return [matcher.clean(p) for p in phrases] + [CANCEL_WORD]
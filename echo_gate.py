@@ -0,0 +1,265 @@
+import logging
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from audio_capture import AudioWindow, CHUNK_FRAMES, SAMPLE_RATE, SAMPLE_WIDTH
+
+# -----------------------------------------
+# Echo-gated listening and barge-in
+#
+# The mic never stops: every frame is kept in the capture ring, and
+# frames captured while Sonny is talking are tagged by time against
+# what was played (PlaybackMonitor, fed by lipsync's players).
+#
+# EchoGate compares each such frame's energy with the energy of the
+# reference signal (the PCM being played) a moment earlier. Frames
+# no louder than the learned echo level are Sonny hearing itself and
+# are zeroed before the VAD/recognizer; clearly louder frames are the
+# user talking over Sonny and pass through. Listeners can therefore
+# start reading from the start of Sonny's reply: an answer that overlaps
+# the tail of the reply is not clipped and nothing waits for playback to
+# finish.
+#
+# BargeInWatcher runs the same test live; once the user has talked
+# over Sonny for BARGE_IN_SECONDS it interrupts playback.
+#
+# Without a reference (pyttsx3 in voice.py plays audio we never see)
+# every frame during playback counts as echo.
+# -----------------------------------------
+FRAME_MS = 30
+ECHO_WINDOW = 0.25       # s of reference looked back over: output + input latency, reverb
+ECHO_TAIL = 0.25         # playback "continues" this long after the last sample (room decay)
+ECHO_MARGIN = 2.0        # user speech must be this many times the expected echo (~6 dB)
+INITIAL_ECHO_GAIN = 1.0  # mic RMS per unit of reference RMS until learned
+MIN_SPEECH_RMS = 300.0   # frames below this are never "user", whatever the echo estimate
+ECHO_LEARN_RATE = 0.1    # weight of each new echo frame in the learned gain
+BARGE_IN_SECONDS = 0.3
+
+
+def frame_rms(data, frame_samples):
+    """RMS per frame; a trailing partial frame gets its own value."""
+    samples = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+    n = len(samples) // frame_samples
+    frames = samples[:n * frame_samples].reshape(n, frame_samples)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    rest = samples[n * frame_samples:]
+    if len(rest):
+        rms = np.append(rms, np.sqrt(np.mean(rest * rest)))
+    return rms
+
+
+class PlaybackMonitor:
+    """Everything Sonny plays: when, and how loud (per FRAME_MS frame)."""
+
+    def __init__(self, frame_ms=FRAME_MS, keep=64):
+        self.frame_s = frame_ms / 1000
+        self.segments = deque(maxlen=keep)   # [start, end, rms array or None]
+        # Set to stop playback (barge-in); the speech worker clears it per utterance
+        self.interrupt = threading.Event()
+        self._lock = threading.Lock()
+
+    def started(self, pcm, at=None):
+        at = time.monotonic() if at is None else at
+        rms, end = None, None
+        if pcm is not None:
+            end = at + len(pcm.data) / (pcm.rate * pcm.channels * pcm.width)
+            if pcm.width in (1, 2):
+                if pcm.width == 2:
+                    samples = np.frombuffer(pcm.data, dtype="<i2")
+                else:
+                    samples = (np.frombuffer(pcm.data, dtype=np.uint8).astype(np.int16) - 128) * 256
+                if pcm.channels > 1:
+                    samples = samples[:len(samples) - len(samples) % pcm.channels]
+                    samples = samples.reshape(-1, pcm.channels).mean(axis=1).astype(np.int16)
+                rms = frame_rms(samples.tobytes(), max(1, int(pcm.rate * self.frame_s)))
+        with self._lock:
+            self.segments.append([at, end, rms])
+
+    def finished(self, at=None):
+        at = time.monotonic() if at is None else at
+        with self._lock:
+            if self.segments and (self.segments[-1][1] is None or self.segments[-1][1] > at):
+                self.segments[-1][1] = at
+
+    def playing_at(self, t):
+        with self._lock:
+            for start, end, _ in reversed(self.segments):
+                if start <= t and (end is None or t < end + ECHO_TAIL):
+                    return True
+                if end is not None and end + ECHO_TAIL < t:
+                    return False
+        return False
+
+    def reference_rms(self, t, window=ECHO_WINDOW):
+        """Loudest reference frame played in [t - window, t]; None if unknown, 0.0 if silent."""
+        peak = 0.0
+        with self._lock:
+            for start, end, rms in reversed(self.segments):
+                if end is not None and end + ECHO_TAIL < t - window:
+                    break
+                if start > t:
+                    continue
+                if rms is None:
+                    return None
+                first = max(0, int((t - window - start) / self.frame_s))
+                last = min(len(rms), int((t - start) / self.frame_s) + 1)
+                if last > first:
+                    peak = max(peak, float(rms[first:last].max()))
+        return peak
+
+
+class EchoGate:
+    def __init__(self, monitor, margin=ECHO_MARGIN, min_rms=MIN_SPEECH_RMS,
+                 echo_gain=INITIAL_ECHO_GAIN, rate=SAMPLE_RATE):
+        self.monitor = monitor
+        self.margin = margin
+        self.min_rms = min_rms
+        self.echo_gain = echo_gain
+        self.frame_samples = int(rate * monitor.frame_s)
+        self.frame_bytes = self.frame_samples * 2
+        self._lock = threading.Lock()
+
+        # counters
+        self.frames_playback = 0
+        self.frames_suppressed = 0
+        self.frames_user = 0
+
+    def stats(self):
+        return {
+            "frames_during_playback": self.frames_playback,
+            "frames_suppressed": self.frames_suppressed,
+            "frames_user": self.frames_user,
+            "echo_gain": round(self.echo_gain, 3),
+        }
+
+    def classify(self, rms, t, learn=True):
+        """"clean" (not playing), "echo" or "user" for one frame captured at ``t``.
+
+        Echo frames over a loud enough reference update the learned echo
+        gain unless ``learn`` is False.
+        """
+        if not self.monitor.playing_at(t):
+            return "clean"
+        ref = self.monitor.reference_rms(t)
+        if ref is None:
+            kind = "echo"
+        elif rms > max(self.min_rms, ref * self.echo_gain * self.margin):
+            kind = "user"
+        else:
+            kind = "echo"
+            if learn and ref > self.min_rms:
+                # Learn how loud our own voice comes back; quiet passages say little
+                with self._lock:
+                    self.echo_gain += ECHO_LEARN_RATE * (rms / ref - self.echo_gain)
+        return kind
+
+    def filter(self, data, start_time, learn=True):
+        """``data`` with echo-only frames zeroed. Returns (bytes, user frames)."""
+        rms = frame_rms(data, self.frame_samples)
+        out = bytearray(data)
+        user = 0
+        for i, level in enumerate(rms):
+            kind = self.classify(float(level), start_time + i * self.monitor.frame_s, learn)
+            if kind == "clean":
+                continue
+            self.frames_playback += 1
+            if kind == "echo":
+                self.frames_suppressed += 1
+                start = i * self.frame_bytes
+                end = min(len(out), start + self.frame_bytes)
+                out[start:end] = bytes(end - start)
+            else:
+                self.frames_user += 1
+                user += 1
+        return bytes(out), user
+
+
+class GatedReader:
+    """AudioReader whose windows have Sonny's own voice zeroed out.
+
+    With a BargeInWatcher on the same gate, pass ``learn=False``: the
+    watcher already learns the echo gain from the same frames, and two
+    learners would move it twice per frame.
+    """
+
+    def __init__(self, reader, gate, learn=True):
+        self.reader = reader
+        self.gate = gate
+        self.learn = learn
+
+    @property
+    def pos(self):
+        return self.reader.pos
+
+    @pos.setter
+    def pos(self, value):
+        self.reader.pos = value
+
+    def read(self, nbytes=CHUNK_FRAMES * SAMPLE_WIDTH, timeout=None):
+        win = self.reader.read(nbytes, timeout)
+        if win is None or not self.gate.monitor.segments:
+            return win
+        data, _ = self.gate.filter(win.data, win.start_time, self.learn)
+        return AudioWindow(memoryview(data), win.start_pos, win.start_time)
+
+    def __getattr__(self, name):
+        # ring, skip_until, seek_latest, ... go to the wrapped reader
+        return getattr(self.reader, name)
+
+
+class BargeInWatcher:
+    """Interrupts playback once the user has talked over Sonny for ``seconds``."""
+
+    def __init__(self, reader, gate, seconds=BARGE_IN_SECONDS, window_s=0.09):
+        self.reader = reader
+        self.gate = gate
+        self.needed = max(1, int(seconds / gate.monitor.frame_s))
+        self.window_bytes = int(window_s / gate.monitor.frame_s) * gate.frame_bytes
+        self.barge_ins = 0
+        self.last_barge_in = None   # monotonic time the user started talking over Sonny
+        self._run_frames = 0
+        self._run_start = None
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="barge-in", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(1.0)
+
+    def _run(self):
+        monitor = self.gate.monitor
+        while self._running:
+            win = self.reader.read(self.window_bytes, timeout=0.5)
+            if win is None:
+                if self.reader.ring.closed:
+                    return
+                continue
+            rms = frame_rms(win.data, self.gate.frame_samples)
+            if not self.reader.check(win):
+                continue
+            for i, level in enumerate(rms):
+                t = win.start_time + i * monitor.frame_s
+                # Live during playback, so this is where the echo gain is learned
+                kind = self.gate.classify(float(level), t)
+                if kind != "user":
+                    self._run_frames, self._run_start = 0, None
+                    continue
+                if self._run_start is None:
+                    self._run_start = t
+                self._run_frames += 1
+                if self._run_frames == self.needed and not monitor.interrupt.is_set():
+                    self.barge_ins += 1
+                    self.last_barge_in = self._run_start
+                    monitor.interrupt.set()
+                    logging.info(f"Barge-in: user spoke over Sonny; stopping playback "
+                                 f"{(time.monotonic() - self._run_start) * 1000:.0f} ms after onset")
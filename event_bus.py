@@ -0,0 +1,499 @@
+import json
+import logging
+import os
+import queue
+import selectors
+import socket
+import struct
+import threading
+import time
+
+# -----------------------------------------
+# Local pub/sub event bus (Unix domain socket)
+#
+# robot_control.py hosts the EventBroker; subsystems connect with a
+# BusClient, subscribe to topics and publish JSON messages. The broker
+# fans each message out in memory to every other subscriber of its topic
+# ("*" receives everything) -- nothing touches the SD card.
+#
+# Wire frame: op (1 byte) | topic length (2) | body length (4) | topic | body
+#   client -> broker: SUB / UNSUB / PUB      broker -> client: MSG
+#
+# InboxBridge keeps the old JSON files in sonny_brain/inbox/ working
+# while subsystems migrate: files written by old code are published on
+# the bus, and bus messages are written (atomically) as files for old
+# readers.
+# -----------------------------------------
+DEFAULT_SOCKET = os.environ.get("SONNY_BUS", "/tmp/sonny-bus.sock")
+HEADER = struct.Struct(">BHI")
+OP_SUB, OP_UNSUB, OP_PUB, OP_MSG = 1, 2, 3, 4
+MAX_BODY = 1024 * 1024
+MAX_BACKLOG = 4 * 1024 * 1024   # unsent bytes before a stuck subscriber is dropped
+
+INBOX_DIR = "/home/Robo/SonnyData/sonny_brain/inbox"
+INBOX_TOPICS = ("vision_event", "unknown_face", "enroll_request", "enroll_result")
+
+
+def encode_frame(op, topic, body=b""):
+    topic = topic.encode("utf-8")
+    return HEADER.pack(op, len(topic), len(body)) + topic + body
+
+
+def decode_frames(buf):
+    """Pop complete frames off the front of ``buf`` (a bytearray)."""
+    frames = []
+    while len(buf) >= HEADER.size:
+        op, topic_len, body_len = HEADER.unpack_from(buf)
+        if body_len > MAX_BODY:
+            raise ValueError(f"frame body of {body_len} bytes")
+        end = HEADER.size + topic_len + body_len
+        if len(buf) < end:
+            break
+        topic = bytes(buf[HEADER.size:HEADER.size + topic_len]).decode("utf-8")
+        frames.append((op, topic, bytes(buf[HEADER.size + topic_len:end])))
+        del buf[:end]
+    return frames
+
+
+class _Conn:
+    __slots__ = ("sock", "inbuf", "outbuf", "topics")
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.inbuf = bytearray()
+        self.outbuf = bytearray()
+        self.topics = set()
+
+
+class EventBroker:
+    def __init__(self, path=DEFAULT_SOCKET, max_backlog=MAX_BACKLOG):
+        self.path = path
+        self.max_backlog = max_backlog
+        self._sel = selectors.DefaultSelector()
+        self._subs = {}       # topic -> set of _Conn
+        self._server = None
+        self._running = False
+        self._thread = None
+
+        # counters
+        self.published = 0
+        self.delivered = 0
+        self.dropped_clients = 0
+
+    def start(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)  # stale socket from a previous run
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self.path)
+        self._server.listen()
+        self._server.setblocking(False)
+        self._sel.register(self._server, selectors.EVENT_READ)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="event-broker", daemon=True)
+        self._thread.start()
+        logging.info(f"Event bus listening on {self.path}")
+        return self
+
+    def stop(self, timeout=1.0):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout)
+        for key in list(self._sel.get_map().values()):
+            key.fileobj.close()
+        self._sel.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def stats(self):
+        return {
+            "clients": len(self._sel.get_map()) - 1 if self._running else 0,
+            "topics": len(self._subs),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped_clients": self.dropped_clients,
+        }
+
+    def _run(self):
+        while self._running:
+            for key, events in self._sel.select(timeout=0.5):
+                if key.fileobj is self._server:
+                    self._accept()
+                    continue
+                conn = key.data
+                if events & selectors.EVENT_READ:
+                    self._read(conn)
+                if events & selectors.EVENT_WRITE and conn.sock.fileno() >= 0:
+                    self._flush(conn)
+
+    def _accept(self):
+        try:
+            sock, _ = self._server.accept()
+        except OSError:
+            return
+        sock.setblocking(False)
+        self._sel.register(sock, selectors.EVENT_READ, _Conn(sock))
+
+    def _drop(self, conn, reason=None):
+        if reason:
+            self.dropped_clients += 1
+            logging.warning(f"Event bus: dropping client ({reason})")
+        for topic in conn.topics:
+            subs = self._subs.get(topic)
+            if subs:
+                subs.discard(conn)
+                if not subs:
+                    del self._subs[topic]
+        try:
+            self._sel.unregister(conn.sock)
+        except (KeyError, ValueError):
+            pass
+        conn.sock.close()
+
+    def _read(self, conn):
+        try:
+            data = conn.sock.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._drop(conn)
+            return
+        conn.inbuf += data
+        try:
+            frames = decode_frames(conn.inbuf)
+        except ValueError as e:
+            self._drop(conn, str(e))
+            return
+        for op, topic, body in frames:
+            if op == OP_SUB:
+                conn.topics.add(topic)
+                self._subs.setdefault(topic, set()).add(conn)
+            elif op == OP_UNSUB:
+                conn.topics.discard(topic)
+                self._subs.get(topic, set()).discard(conn)
+            elif op == OP_PUB:
+                self._fan_out(conn, topic, body)
+
+    def _fan_out(self, sender, topic, body):
+        self.published += 1
+        targets = self._subs.get(topic, set()) | self._subs.get("*", set())
+        targets.discard(sender)  # never echo to the publisher
+        if not targets:
+            return
+        frame = encode_frame(OP_MSG, topic, body)
+        for conn in targets:
+            self.delivered += 1
+            self._send(conn, frame)
+
+    def _send(self, conn, frame):
+        if not conn.outbuf:
+            try:
+                sent = conn.sock.send(frame)
+            except (BlockingIOError, InterruptedError):
+                sent = 0
+            except OSError:
+                self._drop(conn)
+                return
+            frame = frame[sent:]
+            if not frame:
+                return
+            self._sel.modify(conn.sock, selectors.EVENT_READ | selectors.EVENT_WRITE, conn)
+        conn.outbuf += frame
+        if len(conn.outbuf) > self.max_backlog:
+            self._drop(conn, f"{len(conn.outbuf)} bytes unread")
+
+    def _flush(self, conn):
+        try:
+            sent = conn.sock.send(conn.outbuf)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            self._drop(conn)
+            return
+        del conn.outbuf[:sent]
+        if not conn.outbuf:
+            self._sel.modify(conn.sock, selectors.EVENT_READ, conn)
+
+
+class BusClient:
+    """Connection to the broker. Reconnects (and re-subscribes) if the broker restarts."""
+
+    def __init__(self, path=None, name="client", reconnect=True):
+        self.path = path or DEFAULT_SOCKET
+        self.name = name
+        self.reconnect = reconnect
+        self._sock = None
+        self._send_lock = threading.Lock()
+        self._handlers = {}          # topic -> [callback or None]
+        self._inbox = queue.Queue()  # messages for subscriptions without a callback
+        self._running = False
+        self._connected = threading.Event()
+        self._thread = None
+
+    def connect(self, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not self._open():
+            if time.monotonic() > deadline:
+                raise ConnectionError(f"no event bus at {self.path}")
+            time.sleep(0.1)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"bus-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._running = False
+        sock, self._sock = self._sock, None
+        self._connected.clear()
+        if sock:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(1.0)
+
+    @property
+    def connected(self):
+        return self._connected.is_set()
+
+    def publish(self, topic, data):
+        """Send ``data`` (JSON-serializable) on ``topic``. False if the broker is unreachable."""
+        return self._write(encode_frame(OP_PUB, topic, json.dumps(data).encode("utf-8")))
+
+    def subscribe(self, topic, callback=None):
+        """``callback(topic, data)`` runs on the client thread; without one use get()."""
+        self._handlers.setdefault(topic, []).append(callback)
+        if len(self._handlers[topic]) == 1:
+            self._write(encode_frame(OP_SUB, topic))
+
+    def unsubscribe(self, topic):
+        if self._handlers.pop(topic, None) is not None:
+            self._write(encode_frame(OP_UNSUB, topic))
+
+    def get(self, timeout=None):
+        """Next (topic, data) for callback-less subscriptions, or None on timeout."""
+        try:
+            return self._inbox.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _open(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            return False
+        with self._send_lock:
+            self._sock = sock
+            for topic in self._handlers:
+                sock.sendall(encode_frame(OP_SUB, topic))
+        self._connected.set()
+        return True
+
+    def _write(self, frame):
+        with self._send_lock:
+            if not self._sock:
+                return False
+            try:
+                self._sock.sendall(frame)
+                return True
+            except OSError:
+                return False
+
+    def _dispatch(self, topic, body):
+        try:
+            data = json.loads(body)
+        except ValueError:
+            logging.warning(f"Event bus: undecodable message on '{topic}'")
+            return
+        handlers = self._handlers.get(topic, []) + (self._handlers.get("*", []) if topic != "*" else [])
+        if None in handlers:
+            self._inbox.put((topic, data))
+        for callback in handlers:
+            if callback is None:
+                continue
+            try:
+                callback(topic, data)
+            except Exception as e:
+                logging.error(f"Event bus handler for '{topic}' failed: {e}")
+
+    def _run(self):
+        buf = bytearray()
+        while self._running:
+            sock = self._sock
+            data = b""
+            if sock:
+                try:
+                    data = sock.recv(65536)
+                except OSError:
+                    data = b""
+            if not data:
+                self._connected.clear()
+                if not self._running or not self.reconnect:
+                    break
+                with self._send_lock:
+                    if self._sock:
+                        self._sock.close()
+                    self._sock = None
+                buf.clear()
+                time.sleep(0.5)
+                if self._open():
+                    logging.info(f"Event bus client '{self.name}' reconnected")
+                continue
+            buf += data
+            try:
+                frames = decode_frames(buf)
+            except ValueError as e:
+                logging.error(f"Event bus: bad frame from broker ({e})")
+                buf.clear()
+                continue
+            for op, topic, body in frames:
+                if op == OP_MSG:
+                    self._dispatch(topic, body)
+
+
+class InboxBridge:
+    """Mirrors sonny_brain/inbox/<topic>.json files and bus topics in both directions."""
+
+    def __init__(self, client, inbox_dir=INBOX_DIR, topics=INBOX_TOPICS, poll_interval=0.5):
+        self.client = client
+        self.inbox_dir = inbox_dir
+        self.topics = topics
+        self.poll_interval = poll_interval
+        self._seen = {}   # topic -> (mtime_ns, size) of the file version already handled
+        self._lock = threading.Lock()   # a file the bridge writes is never mistaken for old code's
+        self._running = False
+        self._thread = None
+
+    def _path(self, topic):
+        return os.path.join(self.inbox_dir, f"{topic}.json")
+
+    def _stat(self, topic, path=None):
+        try:
+            st = os.stat(path or self._path(topic))
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def start(self):
+        os.makedirs(self.inbox_dir, exist_ok=True)
+        for topic in self.topics:
+            # Existing files are old news; only changes from now on are events
+            self._seen[topic] = self._stat(topic)
+            self.client.subscribe(topic, self._to_file)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="inbox-bridge", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(self.poll_interval * 2)
+
+    def _to_file(self, topic, data):
+        path = self._path(topic)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        with self._lock:
+            # rename keeps mtime and size: mark this version as ours before
+            # the poller can see it, or it would republish our own message
+            self._seen[topic] = self._stat(topic, tmp)
+            os.replace(tmp, path)  # old readers never see half a file
+
+    def _run(self):
+        while self._running:
+            for topic in self.topics:
+                with self._lock:
+                    stat = self._stat(topic)
+                    if stat is None or stat == self._seen.get(topic):
+                        continue
+                    try:
+                        with open(self._path(topic), encoding="utf-8") as f:
+                            data = json.load(f)
+                    except (OSError, ValueError):
+                        continue  # still being written; try again next poll
+                    self._seen[topic] = stat
+                self.client.publish(topic, data)
+            time.sleep(self.poll_interval)
+
+
+# -----------------------------------------
+# CLI: run a broker, watch or publish, measure delivery latency
+# -----------------------------------------
+def _bench(path, count):
+    sub = BusClient(path, "bench-sub").connect()
+    pub = BusClient(path, "bench-pub").connect()
+    sub.subscribe("bench")
+    time.sleep(0.1)  # let the SUB reach the broker first
+    latencies = []
+    for i in range(count):
+        pub.publish("bench", {"i": i, "sent": time.monotonic()})
+        got = sub.get(timeout=1.0)
+        if got:
+            latencies.append(time.monotonic() - got[1]["sent"])
+    sub.close()
+    pub.close()
+    latencies.sort()
+    pick = lambda p: round(latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000, 3)
+    return {"messages": count, "delivered": len(latencies),
+            "latency_ms_p50": pick(50), "latency_ms_p99": pick(99), "latency_ms_max": pick(100)}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    ap = argparse.ArgumentParser(description="Sonny event bus")
+    ap.add_argument("--socket", default=DEFAULT_SOCKET)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("broker", help="run a standalone broker")
+    p = sub.add_parser("pub", help="publish one JSON message")
+    p.add_argument("topic")
+    p.add_argument("json")
+    p = sub.add_parser("sub", help="print messages on topics ('*' = all)")
+    p.add_argument("topics", nargs="+")
+    p = sub.add_parser("bench", help="publish -> subscriber latency (starts a broker if none)")
+    p.add_argument("--count", type=int, default=1000)
+    args = ap.parse_args()
+
+    if args.cmd == "broker":
+        broker = EventBroker(args.socket).start()
+        try:
+            while True:
+                time.sleep(10)
+                logging.info(f"Event bus: {broker.stats()}")
+        except KeyboardInterrupt:
+            broker.stop()
+    elif args.cmd == "pub":
+        client = BusClient(args.socket, "cli", reconnect=False).connect()
+        client.publish(args.topic, json.loads(args.json))
+        client.close()
+    elif args.cmd == "sub":
+        client = BusClient(args.socket, "cli").connect()
+        for topic in args.topics:
+            client.subscribe(topic, lambda t, d: print(t, json.dumps(d), flush=True))
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            client.close()
+    elif args.cmd == "bench":
+        broker = None
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(args.socket)
+        except OSError:
+            broker = EventBroker(args.socket).start()
+        finally:
+            probe.close()
+        print(json.dumps(_bench(args.socket, args.count), indent=2))
+        if broker:
+            broker.stop()
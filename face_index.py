@@ -0,0 +1,150 @@
+import fcntl
+import logging
+import os
+import pickle
+
+import numpy as np
+
+# -----------------------------------------
+# Known-faces index
+#
+# Replaces the list-in-a-pickle (SonnyData/vision/encodings.pickle) with
+# two append-only files in one folder:
+#
+#   embeddings.f32  -- raw float32 rows, DIM per face, memory-mapped
+#   names.txt       -- one name per line, same order
+#
+# Enrollment appends one row + one line (no rewrite); recognition is a
+# single matrix-vector product over every known face. Rows are written
+# before names, so a crash mid-enrollment leaves at most an orphan row,
+# which is ignored on load.
+# -----------------------------------------
+DIM = 128            # face_recognition / dlib embedding size
+TOLERANCE = 0.6      # face_recognition's default match distance
+DEFAULT_INDEX_DIR = "/home/Robo/SonnyData/vision/face_index"
+
+
+class FaceIndex:
+    def __init__(self, root=DEFAULT_INDEX_DIR, dim=DIM):
+        self.root = root
+        self.dim = dim
+        self.row_bytes = dim * 4
+        self.vectors_path = os.path.join(root, "embeddings.f32")
+        self.names_path = os.path.join(root, "names.txt")
+        os.makedirs(root, exist_ok=True)
+        for path in (self.vectors_path, self.names_path):
+            open(path, "ab").close()
+        self.names = []
+        self._matrix = np.zeros((0, dim), dtype=np.float32)
+        self._norms = np.zeros(0, dtype=np.float32)  # squared row norms
+        self._names_size = 0
+        self.refresh()
+
+    def __len__(self):
+        return len(self.names)
+
+    def refresh(self):
+        """Pick up faces appended since the last call (by this or another process)."""
+        names_size = os.path.getsize(self.names_path)
+        if names_size == self._names_size:
+            return
+        with open(self.names_path, "rb") as f:
+            f.seek(self._names_size)
+            chunk = f.read()
+        # Only whole lines; a half-written name is picked up next time
+        complete = chunk[:chunk.rfind(b"\n") + 1]
+        # "\n" only: str.splitlines() would also split on \r, \x85, \u2028, ...
+        new_names = complete.decode("utf-8").split("\n")[:-1]
+        rows = min(os.path.getsize(self.vectors_path) // self.row_bytes,
+                   len(self.names) + len(new_names))
+        if rows < len(self.names) + len(new_names):
+            new_names = new_names[:rows - len(self.names)]
+            complete = "".join(n + "\n" for n in new_names).encode("utf-8")
+        if not new_names:
+            return
+        old = len(self.names)
+        # Plain ndarray view of the mapping: no copy, pages come from the OS cache
+        self._matrix = np.asarray(np.memmap(self.vectors_path, dtype=np.float32, mode="r",
+                                            shape=(rows, self.dim)))
+        added = self._matrix[old:rows]
+        self._norms = np.concatenate([self._norms, np.einsum("ij,ij->i", added, added)])
+        self.names.extend(new_names)
+        self._names_size += len(complete)
+
+    def add(self, name, encoding):
+        return self.add_many([name], [encoding])[0]
+
+    def add_many(self, names, encodings):
+        """Append faces; returns their row ids."""
+        rows = np.asarray(encodings, dtype=np.float32).reshape(-1, self.dim)
+        if len(rows) != len(names):
+            raise ValueError(f"{len(names)} names for {len(rows)} encodings")
+        if any("".join(n.splitlines()) != n for n in names):
+            raise ValueError("names cannot contain line breaks")
+        with open(self.names_path, "ab") as names_file:
+            fcntl.flock(names_file, fcntl.LOCK_EX)  # one enrollment at a time
+            try:
+                self.refresh()
+                first = len(self.names)
+                with open(self.vectors_path, "r+b") as f:
+                    # Drop any orphan row from an interrupted enrollment
+                    f.truncate(first * self.row_bytes)
+                    f.seek(0, os.SEEK_END)
+                    f.write(rows.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+                names_file.write("".join(n + "\n" for n in names).encode("utf-8"))
+                names_file.flush()
+                os.fsync(names_file.fileno())
+            finally:
+                fcntl.flock(names_file, fcntl.LOCK_UN)
+        self.refresh()
+        return list(range(first, first + len(names)))
+
+    def distances(self, encoding):
+        """Euclidean distance from ``encoding`` to every known face."""
+        self.refresh()
+        q = np.asarray(encoding, dtype=np.float32).reshape(self.dim)
+        d2 = self._norms - 2 * (self._matrix @ q) + q @ q
+        return np.sqrt(np.maximum(d2, 0))
+
+    def top_k(self, encoding, k=5):
+        """[(name, distance, row id), ...] for the ``k`` closest faces."""
+        d = self.distances(encoding)
+        if not len(d):
+            return []
+        k = min(k, len(d))
+        best = np.argpartition(d, k - 1)[:k]
+        best = best[np.argsort(d[best])]
+        return [(self.names[i], float(d[i]), int(i)) for i in best]
+
+    def match(self, encoding, tolerance=TOLERANCE):
+        """Closest known name within ``tolerance``, or None."""
+        best = self.top_k(encoding, 1)
+        if best and best[0][1] <= tolerance:
+            return best[0][0]
+        return None
+
+    @classmethod
+    def from_pickle(cls, pickle_path, root=DEFAULT_INDEX_DIR):
+        """One-off import of a face_recognition {"encodings": [...], "names": [...]} pickle."""
+        index = cls(root)
+        if len(index):
+            logging.info(f"Face index at {root} already has {len(index)} faces; not importing")
+            return index
+        with open(pickle_path, "rb") as f:
+            data = pickle.load(f)
+        index.add_many(list(data["names"]), data["encodings"])
+        logging.info(f"Imported {len(index)} faces from {pickle_path}")
+        return index
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    ap = argparse.ArgumentParser(description="Import encodings.pickle into a face index")
+    ap.add_argument("pickle", help="face_recognition encodings.pickle")
+    ap.add_argument("--index", default=DEFAULT_INDEX_DIR)
+    args = ap.parse_args()
+    FaceIndex.from_pickle(args.pickle, args.index)
@@ -0,0 +1,101 @@
+import os
+import select
+import threading
+import time
+
+from servo_channel import decode_binary
+
+# -----------------------------------------
+# Pseudo-terminal stand-in for the Arduino
+#
+# Opens a pty pair and parses whatever is written to it (text or binary
+# servo frames), so ServoChannel / Control_Sonny can run without the
+# board attached:
+#
+#   fake = FakeArduino().start()
+#   arduino = serial.Serial(fake.port, 9600)
+#
+# Run this file directly for a quick loopback check.
+# -----------------------------------------
+
+
+class FakeArduino:
+    def __init__(self, framing="text", banner=None):
+        self.framing = framing
+        self.banner = banner   # sent once on start, like a sketch's boot message
+        self.master, self.slave = os.openpty()
+        self.port = os.ttyname(self.slave)
+        self.angles = {}
+        self.frames = []       # (monotonic time, {name: angle})
+        self.bytes_received = 0
+        self.bad_frames = 0
+        self._buf = b""
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if self.banner:
+            os.write(self.master, self.banner)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="fake-arduino", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(1.0)
+        os.close(self.master)
+        os.close(self.slave)
+
+    def _parse(self):
+        if self.framing == "binary":
+            frames, used, bad = decode_binary(self._buf)
+            self._buf = self._buf[used:]
+            self.bad_frames += bad
+            return frames
+        frames = []
+        *lines, self._buf = self._buf.split(b"\n")
+        for line in lines:
+            name, _, angle = line.decode(errors="replace").partition(":")
+            if angle.strip().lstrip("-").isdigit():
+                frames.append({name.strip(): int(angle)})
+            else:
+                self.bad_frames += 1
+        return frames
+
+    def _run(self):
+        while self._running:
+            ready, _, _ = select.select([self.master], [], [], 0.1)
+            if not ready:
+                continue
+            data = os.read(self.master, 4096)
+            self.bytes_received += len(data)
+            self._buf += data
+            now = time.monotonic()
+            for frame in self._parse():
+                self.angles.update(frame)
+                self.frames.append((now, frame))
+
+
+if __name__ == "__main__":
+    import serial
+
+    from servo_channel import ServoChannel
+
+    for framing in ("text", "binary"):
+        fake = FakeArduino(framing).start()
+        port = serial.Serial(fake.port, 9600, timeout=1)
+        channel = ServoChannel(port, framing=framing).start()
+        # Simulate 2 s of tracking at 20 Hz plus 5 ms lip-sync toggles
+        for i in range(400):
+            if i % 10 == 0:
+                channel.set_many({"pan": 90 + (i // 40), "tilt": 90})
+            channel.set("mouth", 120 if (i // 20) % 2 else 90)
+            time.sleep(0.005)
+        time.sleep(0.2)
+        channel.stop()
+        print(framing, channel.stats(), "arduino saw", fake.angles,
+              f"{len(fake.frames)} frames, {fake.bad_frames} bad")
+        port.close()
+        fake.stop()
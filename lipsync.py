@@ -0,0 +1,242 @@
+import time
+
+import numpy as np
+import simpleaudio as sa
+
+# -----------------------------------------
+# Lip-sync: mouth schedules + a drift-free player
+#
+# A schedule is a list of (seconds_from_audio_start, mouth_is_open)
+# keyframes, one per state change, built up front from either espeak-ng
+# phoneme timings or the amplitude envelope of any backend's PCM. The
+# player only touches the servo on those transitions.
+#
+# The envelope is a string of "1" (mouth open) / "0" (closed), one
+# character per ENVELOPE_CHUNK_MS of audio, so it can be stored next to
+# cached PCM and replayed without re-analysing the samples.
+#
+# ``monitor`` (an echo_gate.PlaybackMonitor, if set) is told what plays
+# and when, so the listener can gate out Sonny's own voice, and can stop
+# playback early through its ``interrupt`` event (barge-in).
+# -----------------------------------------
+ENVELOPE_CHUNK_MS = 5
+ENVELOPE_THRESHOLD = 600  # open above this (int16 peak-to-peak); tune for your audio level
+ENVELOPE_HYSTERESIS = 0.6  # close again only below threshold * this
+
+# The servo can't follow anything shorter than MIN_HOLD, so briefer
+# states are merged away.
+MIN_HOLD = 0.05
+
+# SAMPA vowel symbols (espeak-ng's .pho output) open the mouth
+VOWEL_CHARS = set("aeiouyAEIOUVQY@3{&")
+
+monitor = None
+
+
+def merge_short(schedule, min_hold=MIN_HOLD):
+    out = []
+    for offset, is_open in schedule:
+        if out and out[-1][1] == is_open:
+            continue
+        if out and offset - out[-1][0] < min_hold:
+            # Previous state was too short to show: drop it, keep the older one
+            out.pop()
+            if out and out[-1][1] == is_open:
+                continue
+        out.append((offset, is_open))
+    return out
+
+
+def phoneme_schedule(phonemes, min_hold=MIN_HOLD):
+    schedule = [(ph.start, ph.symbol != "_" and ph.symbol[0] in VOWEL_CHARS)
+                for ph in phonemes]
+    if phonemes:
+        end = phonemes[-1].start + phonemes[-1].duration
+        schedule.append((end, False))
+    return merge_short(schedule, min_hold)
+
+
+def envelope_schedule(envelope, chunk_ms=ENVELOPE_CHUNK_MS, min_hold=MIN_HOLD):
+    flags = np.frombuffer(envelope.encode("ascii"), dtype=np.uint8) == ord("1")
+    if not len(flags):
+        return []
+    changes = np.flatnonzero(flags[1:] != flags[:-1]) + 1
+    starts = np.concatenate(([0], changes))
+    schedule = [(int(i) * chunk_ms / 1000, bool(flags[i])) for i in starts]
+    schedule.append((len(flags) * chunk_ms / 1000, False))
+    return merge_short(schedule, min_hold)
+
+
+def _as_int16_scale(pcm):
+    # Any backend's sample format -> float32 frames on an int16 scale
+    if pcm.width == 1:
+        samples = (np.frombuffer(pcm.data, dtype=np.uint8).astype(np.float32) - 128) * 256
+    elif pcm.width == 2:
+        samples = np.frombuffer(pcm.data, dtype="<i2").astype(np.float32)
+    elif pcm.width == 4:
+        samples = np.frombuffer(pcm.data, dtype="<i4").astype(np.float32) / 65536
+    else:
+        raise ValueError(f"unsupported sample width {pcm.width}")
+    usable = len(samples) - len(samples) % pcm.channels
+    return samples[:usable].reshape(-1, pcm.channels)
+
+
+def amplitude_envelope(pcm, chunk_ms=ENVELOPE_CHUNK_MS, threshold=ENVELOPE_THRESHOLD,
+                       hysteresis=ENVELOPE_HYSTERESIS, measure="ptp"):
+    """Whole-clip open/close envelope in one vectorized pass.
+
+    ``measure`` is "ptp" (peak-to-peak, like the old per-chunk loop) or
+    "rms" (scaled so a sine gives the same value as ptp). The mouth opens
+    above ``threshold`` and only closes again below ``threshold * hysteresis``.
+    """
+    frames = _as_int16_scale(pcm)
+    if not len(frames):
+        return ""
+    chunk = max(1, int(pcm.rate * chunk_ms / 1000))
+    n_chunks = -(-len(frames) // chunk)
+    padded = np.zeros((n_chunks * chunk, frames.shape[1]), dtype=np.float32)
+    padded[:len(frames)] = frames
+    chunks = padded.reshape(n_chunks, chunk * frames.shape[1])
+
+    if measure == "rms":
+        amp = np.sqrt(np.mean(chunks * chunks, axis=1)) * 2 * np.sqrt(2)
+    else:
+        amp = chunks.max(axis=1) - chunks.min(axis=1)
+
+    # Hysteresis without a Python loop: each chunk takes the state set by
+    # the most recent chunk that was clearly loud or clearly quiet
+    loud = amp > threshold
+    decided = loud | (amp < threshold * hysteresis)
+    last = np.maximum.accumulate(np.where(decided, np.arange(n_chunks), -1))
+    state = np.where(last >= 0, loud[np.maximum(last, 0)], False)
+    return (state.astype(np.uint8) + ord("0")).tobytes().decode("ascii")
+
+
+def _play(pcm):
+    play_obj = sa.play_buffer(pcm.data, num_channels=pcm.channels,
+                              bytes_per_sample=pcm.width, sample_rate=pcm.rate)
+    start = time.monotonic()
+    if monitor:
+        monitor.started(pcm, start)
+    return play_obj, start
+
+
+def _wait(delay):
+    # Sleep; True if the monitor asked playback to stop meanwhile
+    if monitor:
+        return monitor.interrupt.wait(delay)
+    time.sleep(delay)
+    return False
+
+
+def _wait_done(play_obj):
+    """Wait for the clip to end; stop it early on interrupt. True if interrupted."""
+    if not monitor:
+        play_obj.wait_done()
+        return False
+    while play_obj.is_playing():
+        if monitor.interrupt.wait(0.02):
+            play_obj.stop()
+            return True
+    return False
+
+
+def _stopped():
+    if monitor:
+        monitor.finished()
+
+
+def play_with_schedule(pcm, schedule, mouth_open, mouth_close):
+    """Play PCM and fire mouth keyframes against one monotonic clock.
+
+    Each keyframe sleeps until its absolute offset from playback start,
+    so servo writes and timer overshoot never accumulate into drift.
+    Returns True if playback was interrupted.
+    """
+    play_obj, start = _play(pcm)
+    interrupted = False
+    for offset, is_open in schedule:
+        delay = start + offset - time.monotonic()
+        if delay > 0 and _wait(delay):
+            interrupted = True
+            break
+        if is_open:
+            mouth_open()
+        else:
+            mouth_close()
+    if interrupted:
+        play_obj.stop()
+    else:
+        interrupted = _wait_done(play_obj)
+    _stopped()
+    mouth_close()
+    return interrupted
+
+
+def play_with_envelope(pcm, envelope, mouth_open, mouth_close, chunk_ms=ENVELOPE_CHUNK_MS):
+    return play_with_schedule(pcm, envelope_schedule(envelope, chunk_ms), mouth_open, mouth_close)
+
+
+def pcm_seconds(pcm):
+    return len(pcm.data) / (pcm.rate * pcm.channels * pcm.width)
+
+
+def play_chunks(chunks, mouth_open, mouth_close, on_start=None):
+    """Play (pcm, schedule) chunks back to back as one utterance.
+
+    Chunks are pulled from ``chunks`` (typically a generator fed by a
+    synthesis worker) only when the previous one is about to end. Each
+    starts where the previous chunk's audio ends on the same monotonic
+    clock, and its keyframes are offset by that start, so the mouth track
+    runs on without closing at every chunk boundary. A chunk that isn't
+    ready in time shifts the clock instead of cutting audio short.
+
+    Returns {"chunks", "audio_s", "underrun_s", "interrupted"}.
+    """
+    start = None
+    base = 0.0         # audio seconds already played before this chunk
+    underrun = 0.0
+    play_obj = None
+    count = 0
+    interrupted = False
+    for pcm, schedule in chunks:
+        now = time.monotonic()
+        if start is None:
+            start = now
+            if on_start:
+                on_start()
+        elif now > start + base:
+            underrun += now - (start + base)
+            start = now - base
+        elif _wait(start + base - now):
+            interrupted = True
+            break
+        if play_obj and _wait_done(play_obj):
+            interrupted = True
+            break
+        play_obj, _ = _play(pcm)
+        duration = pcm_seconds(pcm)
+        chunk_start = start + base
+        for offset, is_open in schedule:
+            if offset >= duration:
+                break  # trailing close; the next chunk (or the end) decides
+            delay = chunk_start + offset - time.monotonic()
+            if delay > 0 and _wait(delay):
+                interrupted = True
+                break
+            if is_open:
+                mouth_open()
+            else:
+                mouth_close()
+        if interrupted:
+            play_obj.stop()
+            break
+        base += duration
+        count += 1
+    if play_obj and not interrupted:
+        interrupted = _wait_done(play_obj)
+    if play_obj:
+        _stopped()
+    mouth_close()
+    return {"chunks": count, "audio_s": round(base, 3), "underrun_s": round(underrun, 3),
+            "interrupted": interrupted}
@@ -0,0 +1,44 @@
+import argparse
+import logging
+import time
+
+from responses import fixed_responses, varied_responses
+from speech_synth import synthesize
+from tts_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, SpeechCache
+
+# -----------------------------------------
+# Synthesize every static response into the TTS cache
+#
+# Run once at install time (with network, for the gTTS/Igbo voice):
+#   python3 prewarm_tts.py [--lang en ig] [--cache-dir DIR]
+# -----------------------------------------
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Prewarm Sonny's TTS cache")
+    ap.add_argument("--lang", nargs="+", default=["en", "ig"],
+                    help="languages to synthesize the varied responses in")
+    ap.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    ap.add_argument("--max-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024))
+    args = ap.parse_args()
+
+    cache = SpeechCache(args.cache_dir, args.max_mb * 1024 * 1024)
+    jobs = [(text, lang) for text in varied_responses for lang in args.lang]
+    jobs += [(text, lang) for text, lang in fixed_responses if lang in args.lang]
+
+    failed = 0
+    start = time.monotonic()
+    for text, lang in jobs:
+        try:
+            synthesize(text, lang, cache)
+        except Exception as e:
+            failed += 1
+            logging.error(f"[{lang}] could not synthesize '{text}': {e}")
+    logging.info(f"Prewarmed {len(jobs) - failed}/{len(jobs)} phrases "
+                 f"({cache.hits} already cached) in {time.monotonic() - start:.1f}s; "
+                 f"cache is {cache.size() / 1e6:.1f} MB at {cache.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import json
+import logging
+import math
+import time
+from collections import namedtuple
+
+from vosk import KaldiRecognizer
+
+from audio_capture import CHUNK_FRAMES, SAMPLE_RATE, SAMPLE_WIDTH
+
+# -----------------------------------------
+# Long-lived Vosk recognizer sessions
+#
+# Building a KaldiRecognizer (and compiling its grammar) per utterance
+# is expensive on the Pi and leaves a gap between calls. A session is
+# built once per listening mode and Reset() between utterances instead.
+# -----------------------------------------
+
+# kind: "partial" or "final"
+# audio_time: time.monotonic() of the end of the audio that produced it
+RecognizerEvent = namedtuple("RecognizerEvent", "kind text result audio_time")
+
+
+def result_text(result):
+    # 1-best text from either result format (plain or SetMaxAlternatives)
+    if "alternatives" in result:
+        alternatives = result["alternatives"]
+        return alternatives[0].get("text", "") if alternatives else ""
+    return result.get("text", "")
+
+
+def hypotheses(result, scale=1.0):
+    """[(text, weight), ...] best first from a final Vosk result.
+
+    N-best confidences are lattice scores, so they are softmaxed into
+    weights that sum to 1. A plain 1-best result is weighted by its mean
+    word confidence when SetWords() is on, else 1.0.
+    """
+    if not result:
+        return []
+    if "alternatives" in result:
+        alternatives = [a for a in result["alternatives"] if a.get("text")]
+        if not alternatives:
+            return []
+        top = max(a.get("confidence", 0.0) for a in alternatives)
+        raw = [math.exp((a.get("confidence", 0.0) - top) * scale) for a in alternatives]
+        total = sum(raw)
+        return [(a["text"], r / total) for a, r in zip(alternatives, raw)]
+    text = result.get("text", "")
+    if not text:
+        return []
+    words = result.get("result") or []
+    confidence = sum(w.get("conf", 1.0) for w in words) / len(words) if words else 1.0
+    return [(text, confidence)]
+
+
+class RecognizerSession:
+    def __init__(self, model, name, grammar=None, rate=SAMPLE_RATE, vad=None,
+                 alternatives=0, words=False):
+        self.name = name
+        # Optional EnergyVAD: only speech (plus pre-roll) reaches Kaldi
+        self.vad = vad
+        self.rate = rate
+        self.grammar = list(grammar) if grammar else None
+        if hasattr(model, "recognizer"):
+            # asr_server.RemoteModel: decoding happens in the shared ASR service
+            self.rec = model.recognizer(rate, self.grammar)
+        elif self.grammar:
+            self.rec = KaldiRecognizer(model, rate, json.dumps(self.grammar))
+        else:
+            self.rec = KaldiRecognizer(model, rate)
+        if alternatives:
+            self.rec.SetMaxAlternatives(alternatives)
+        if words:
+            self.rec.SetWords(True)
+        self.last_result = None  # full JSON of the most recent final result
+        self.last_audio_time = None  # audio_time of that result (end of the audio it covers)
+        self._in_utterance = False
+        self.utterances = 0
+
+    @property
+    def in_utterance(self):
+        return self._in_utterance
+
+    def reset(self):
+        self.rec.Reset()
+        self._in_utterance = False
+        if self.vad:
+            self.vad.reset()
+
+    def feed(self, data, audio_time=None):
+        """Push PCM; returns a "partial" RecognizerEvent, or "final" once Vosk endpoints."""
+        self._in_utterance = True
+        if self.rec.AcceptWaveform(bytes(data)):
+            self._in_utterance = False
+            self.utterances += 1
+            self.last_result = result = json.loads(self.rec.Result())
+            self.last_audio_time = audio_time
+            return RecognizerEvent("final", result_text(result), result, audio_time)
+        partial = json.loads(self.rec.PartialResult()).get("partial", "")
+        return RecognizerEvent("partial", partial, None, audio_time)
+
+    def flush(self, audio_time=None):
+        # Force end-of-utterance on whatever has been heard so far
+        self._in_utterance = False
+        self.utterances += 1
+        self.last_result = result = json.loads(self.rec.FinalResult())
+        self.last_audio_time = audio_time
+        return RecognizerEvent("final", result_text(result), result, audio_time)
+
+    def stream(self, reader, timeout=6, max_utterance=15,
+               chunk_bytes=CHUNK_FRAMES * SAMPLE_WIDTH, all_partials=False):
+        """Yield partial events and then one final event for the next utterance.
+
+        ``timeout`` only bounds waiting for speech to start; once a partial
+        is heard the utterance runs to its natural endpoint (capped by
+        ``max_utterance`` seconds) so a phrase is never cut in half.
+        Unchanged partials are skipped unless ``all_partials`` is set
+        (stability checks need to see them).
+        """
+        if self._in_utterance:
+            self.reset()
+        deadline = time.monotonic() + timeout
+        speech_started = None
+        last_partial = ""
+        while True:
+            now = time.monotonic()
+            if speech_started is None and now >= deadline:
+                return
+            if speech_started is not None and now - speech_started >= max_utterance:
+                logging.info(f"[{self.name}] utterance hit {max_utterance}s cap; flushing")
+                yield self.flush(now)
+                return
+            wait = deadline - now if speech_started is None else max_utterance
+            win = reader.read(chunk_bytes, timeout=max(0.0, wait))
+            if win is None:
+                if speech_started is not None:
+                    yield self.flush(time.monotonic())
+                return
+            audio_time = win.start_time + len(win) / (self.rate * SAMPLE_WIDTH)
+            # Copy out of the ring first; a view overwritten meanwhile is dropped
+            data = bytes(win.data)
+            if not reader.check(win):
+                continue
+            if self.vad:
+                data = self.vad.process(data)
+                if not data:
+                    if self._in_utterance and not self.vad.in_speech:
+                        # Segment ended before Kaldi endpointed: finish it now
+                        event = self.flush(audio_time)
+                        if event.text or speech_started is not None:
+                            yield event
+                            return
+                    continue
+            event = self.feed(data, audio_time)
+            if event.kind == "final":
+                if not event.text and speech_started is None:
+                    continue  # endpoint on silence/noise; keep waiting
+                yield event
+                return
+            if event.text and (all_partials or event.text != last_partial):
+                if speech_started is None:
+                    speech_started = time.monotonic()
+                last_partial = event.text
+                yield event
+
+    def listen(self, reader, timeout=6, max_utterance=15):
+        """Blocking helper: return the final text of the next utterance ("" if none)."""
+        for event in self.stream(reader, timeout, max_utterance):
+            if event.kind == "final":
+                return event.text
+        return ""
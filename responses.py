@@ -0,0 +1,79 @@
+# -----------------------------------------
+# Sonny's spoken responses
+#
+# Kept free of side effects so tools (e.g. prewarm_tts.py) can import
+# them without opening the mic or loading models.
+# -----------------------------------------
+jokes = [
+    "I tried to download some cooking skills… but I only got cookies.",
+    "Why don’t robots panic? Because we’ve got nerves of steel.",
+    "What’s a robot’s favorite music? Heavy metal!",
+    "Why did the robot go on a diet? Too many chips.",
+    "Humans say I have a dry sense of humor… that’s because my cooling fans work so well.",
+    "I told a human a joke yesterday. He didn’t laugh, so I ran a diagnostic. His humor module was offline."
+]
+
+creator_responses = [
+    "I was created by my builder, Robotech83. Without them, I’d just be a box of parts.",
+    "My maker is Robotech83. They gave me life… well, as close as a robot can get.",
+    "Technically, I was designed by Gaël Langevin as InMoov. But the real magic was done by Robotech83.",
+    "I was made by Robotech83. If you don’t like how I behave, take it up with them!",
+    "My creator is Robotech83. Don’t worry, they programmed me to be nice… I think.",
+    "I was brought into existence by Robotech83. Some call them my maker… I call them my human.",
+    "I was assembled and programmed by Robotech83. You could say they’re my Dr. Frankenstein—but less spooky."
+]
+
+greetings = [
+    "Hello there, human!",
+    "Hi! Ready for action.",
+    "Greetings! How can I assist you?",
+    "Hey! Systems are running smoothly.",
+    "Hello! Always good to see you.",
+    "Ọ dị mma."
+]
+
+status_responses = [
+    "I am just a robot, but I am feeling functional!",
+    "All systems are operational. I feel great.",
+    "I’m running at full capacity today.",
+    "Better than yesterday—my circuits are freshly charged.",
+    "I feel efficient. How about you?"
+]
+
+goodbyes = [
+    "Goodbye! Powering down… just kidding.",
+    "See you later, human.",
+    "Goodbye! Don’t forget to charge me.",
+    "Until next time!",
+    "Shutting down my social module now. Bye!"
+]
+
+name_responses = [
+    "My name is Sonny.",
+    "I am Sonny, your humanoid assistant.",
+    "They call me Sonny. Nice to meet you!",
+    "I go by Sonny, but I answer to friend too.",
+    "Sonny is my name, robotics is my game."
+]
+
+# Fixed lines: (text, language they are always spoken in)
+TIMER_INACTIVE = "Timers are not active in this test version."
+SWITCHED_TO_IGBO = "Agbanweela m asụsụ m gaa na Igbo."  # I've switched to Igbo.
+SWITCHED_TO_ENGLISH = "I have switched my language to English."
+CENTERED = "Centered."
+EXIT_COMMAND_MODE = "Exiting command mode."
+SHUTTING_DOWN = "Shutting down. Goodbye!"
+NOT_UNDERSTOOD = "I did not understand that command."
+
+fixed_responses = [
+    (TIMER_INACTIVE, "en"),
+    (SWITCHED_TO_IGBO, "ig"),
+    (SWITCHED_TO_ENGLISH, "en"),
+    (CENTERED, "en"),
+    (EXIT_COMMAND_MODE, "en"),
+    (SHUTTING_DOWN, "en"),
+    (NOT_UNDERSTOOD, "en"),
+]
+
+# Spoken in whatever language Sonny is currently using
+varied_responses = jokes + creator_responses + greetings + status_responses + goodbyes + name_responses
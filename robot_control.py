@@ -1,8 +1,11 @@
-import subprocess
 import time
 import logging
 import os
 
+from asr_server import ASR_SOCKET_ENV, DEFAULT_ASR_SOCKET
+from event_bus import DEFAULT_SOCKET, INBOX_DIR, BusClient, EventBroker, InboxBridge
+from supervisor import Service, Supervisor
+
 # -----------------------------------------
 # Logging Setup
 # -----------------------------------------
@@ -12,45 +15,82 @@ logging.basicConfig(
 )
 
 # Paths to your scripts
+asr_service_script = "/home/Robo/Documents/Sonny/asr_server.py"
 facial_recognition_script = "/home/Robo/face_rec/Face Recognition/face_recogn.py"
 voice_assistant_script = "/home/Robo/Documents/Sonny/Control_Sonny.py"
 arduino_control_script = "/home/Robo/Arduino/Tracking/Tracking.ino"
 arduino_PIR_script = "/home/Robo/Arduino/pir_test2"
 
 scripts = {
+    # Keeps the Vosk model loaded; voice front-ends connect to it
+    "ASR Service": asr_service_script,
     "Facial Recognition": facial_recognition_script,
     "Voice Assistant": voice_assistant_script,
     "Arduino Control": arduino_control_script,
     "PIR_TEST2": arduino_PIR_script
 }
 
-processes = {}
+# Seconds without a heartbeat (supervisor.heartbeat()) before a script
+# counts as hung and is restarted; scripts not listed are only restarted
+# when they exit.
+heartbeat_timeouts = {
+    "ASR Service": 30,
+    "Voice Assistant": 60,
+}
+STATS_INTERVAL = 60  # log + publish supervisor stats this often
 
-try:
-    # Start all scripts
-    for name, path in scripts.items():
-        if not os.path.exists(path):
-            logging.error(f"{name} script not found at {path}")
-            continue
 
-        workdir = os.path.dirname(path)
-        logging.info(f"Starting {name} from {workdir}...")
-        processes[name] = subprocess.Popen(["python3", path], cwd=workdir)
+def command_for(name, path):
+    # Only Python scripts can be run; .ino files and sketch folders are
+    # Arduino firmware and have to be uploaded to the board instead
+    if os.path.isfile(path) and path.endswith(".py"):
+        return ["python3", path]
+    if path.endswith(".ino") or os.path.isdir(path):
+        logging.warning(f"{name}: {path} is an Arduino sketch -- upload it with the "
+                        f"Arduino IDE / arduino-cli; not starting it here")
+    else:
+        logging.error(f"{name} script not found at {path}")
+    return None
+
+# -----------------------------------------
+# Event bus: subsystems publish/subscribe through this broker instead of
+# polling JSON files. The bridge mirrors the old inbox files while
+# scripts migrate; set INBOX_BRIDGE = False once nothing reads them.
+# -----------------------------------------
+INBOX_BRIDGE = True
+os.environ["SONNY_BUS"] = DEFAULT_SOCKET  # inherited by every script started below
+os.environ[ASR_SOCKET_ENV] = DEFAULT_ASR_SOCKET  # front-ends wait for the ASR service
+broker = EventBroker(DEFAULT_SOCKET).start()
+bridge = None
+if INBOX_BRIDGE:
+    bridge = InboxBridge(BusClient(DEFAULT_SOCKET, "inbox-bridge").connect(), INBOX_DIR).start()
+
+supervisor = Supervisor()
+for name, path in scripts.items():
+    cmd = command_for(name, path)
+    if cmd:
+        supervisor.add(Service(name, cmd, cwd=os.path.dirname(path),
+                               heartbeat_timeout=heartbeat_timeouts.get(name)))
+
+try:
+    supervisor.start()
+    stats_client = BusClient(DEFAULT_SOCKET, "supervisor").connect()
+    last_report = time.monotonic()
 
-    # Keep the master running
+    # Exits, heartbeats and restarts are handled as they happen
     while True:
-        # Check if any process has crashed
-        for name, process in list(processes.items()):
-            retcode = process.poll()
-            if retcode is not None:  # Process has ended
-                logging.error(f"{name} stopped unexpectedly (exit code {retcode}). Restarting...")
-                workdir = os.path.dirname(scripts[name])
-                processes[name] = subprocess.Popen(["python3", scripts[name]], cwd=workdir)
-                logging.info(f"{name} restarted successfully.")
-        time.sleep(5)
+        supervisor.run_once(1.0)
+        if time.monotonic() - last_report >= STATS_INTERVAL:
+            last_report = time.monotonic()
+            stats = supervisor.stats()
+            logging.info(f"Supervisor: {stats}")
+            stats_client.publish("supervisor_stats", stats)
 
 except KeyboardInterrupt:
     logging.info("Shutting down all processes...")
-    for name, process in processes.items():
-        logging.info(f"Stopping {name}...")
-        process.terminate()
+finally:
+    supervisor.stop_all()
+    if bridge:
+        bridge.stop()
+    logging.info(f"Event bus: {broker.stats()}")
+    broker.stop()
@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# -----------------------------------------
+# asyncio core runtime
+#
+# One event loop coordinates the subsystems instead of a daemon thread
+# per loop that wakes up on a timer to look for work. Blocking libraries
+# (Vosk, OpenCV, the startup waits) stay blocking but run in small named
+# executors, so a slow decode can't hold up the camera and the loop
+# itself never blocks:
+#
+#   rt = Runtime({"asr": 1, "vision": 1})
+#   face = await rt.blocking("vision", next_face)
+#
+# Subsystems in this process talk over topics (event_bus.py is for other
+# processes); each subscriber gets its own bounded asyncio queue, oldest
+# event dropped when full:
+#
+#   seen = rt.subscribe("face_seen")
+#   rt.publish("face_seen", box)              # on the loop
+#   rt.publish_threadsafe("face_seen", box)   # from any other thread
+#   box = await seen.get()
+#
+# rt.spawn(name, coro) adds a long-running task; a new subsystem is a
+# coroutine, not another thread. If a task fails, every task is
+# cancelled. rt.run(main) runs until stop() or SIGINT/SIGTERM, then
+# cancels and awaits all tasks and shuts the executors down.
+#
+# "python3 runtime.py idle" compares idle CPU time and context
+# switches of timer-polling threads with the same waits on the loop.
+# -----------------------------------------
+QUEUE_SIZE = 16
+STOP_TIMEOUT = 3.0   # s to wait for cancelled tasks before giving up on them
+
+
+class Runtime:
+    def __init__(self, pools=None):
+        self.pools = {name: ThreadPoolExecutor(max_workers=n, thread_name_prefix=name)
+                      for name, n in (pools or {}).items()}
+        self.loop = None
+        self.tasks = {}
+        self.failed = None   # name of the task whose failure stopped the runtime
+        self._topics = {}    # topic -> [asyncio.Queue]
+        self._stop = None
+
+        # counters
+        self.blocking_calls = {name: 0 for name in self.pools}
+        self.published = 0
+        self.dropped = 0
+
+    # -- tasks --
+    def spawn(self, name, coro):
+        task = self.loop.create_task(coro, name=name)
+        self.tasks[name] = task
+        task.add_done_callback(self._task_done)
+        return task
+
+    def stop(self):
+        if self._stop:
+            self._stop.set()
+
+    def stop_threadsafe(self):
+        if self.loop:
+            self.loop.call_soon_threadsafe(self.stop)
+
+    async def blocking(self, pool, fn, *args):
+        """Run ``fn(*args)`` in the named executor (None: the loop's default)."""
+        if pool is not None:
+            self.blocking_calls[pool] += 1
+        return await self.loop.run_in_executor(self.pools.get(pool), fn, *args)
+
+    # -- topics --
+    def subscribe(self, topic, maxsize=QUEUE_SIZE):
+        queue = asyncio.Queue(maxsize)
+        self._topics.setdefault(topic, []).append(queue)
+        return queue
+
+    def publish(self, topic, value=None):
+        """Loop thread only; never blocks. Returns the number of subscribers."""
+        queues = self._topics.get(topic, ())
+        for queue in queues:
+            if queue.full():
+                queue.get_nowait()   # a stale event is worth less than a fresh one
+                self.dropped += 1
+            queue.put_nowait(value)
+        self.published += 1
+        return len(queues)
+
+    def publish_threadsafe(self, topic, value=None):
+        if self.loop:
+            self.loop.call_soon_threadsafe(self.publish, topic, value)
+
+    def stats(self):
+        return {
+            "tasks": sorted(self.tasks),
+            "blocking_calls": dict(self.blocking_calls),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+    # -- running --
+    def run(self, main=None):
+        """Run ``main`` (a coroutine) and spawned tasks until stopped."""
+        try:
+            asyncio.run(self._serve(main))
+        finally:
+            for pool in self.pools.values():
+                # Calls still blocked in a library finish on their own (all have timeouts)
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _serve(self, main):
+        self.loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                self.loop.add_signal_handler(sig, self._signalled, sig)
+            except (NotImplementedError, RuntimeError):
+                pass   # not the main thread / not supported here
+        if main is not None:
+            self.spawn("main", main)
+        try:
+            await self._stop.wait()
+        finally:
+            await self._cancel_all()
+
+    def _signalled(self, sig):
+        logging.info(f"{signal.Signals(sig).name}: shutting down")
+        self.stop()
+
+    def _task_done(self, task):
+        name = task.get_name()
+        if self.tasks.get(name) is task:
+            del self.tasks[name]
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            logging.error(f"Task {name} failed: {error!r}", exc_info=error)
+            self.failed = self.failed or name
+            self.stop()
+
+    async def _cancel_all(self):
+        tasks = [t for t in self.tasks.values() if not t.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=STOP_TIMEOUT)
+            for task in pending:
+                logging.warning(f"Task {task.get_name()} did not stop within {STOP_TIMEOUT}s")
+
+
+# -----------------------------------------
+# Idle comparison: timer-polling threads vs. waiting on the loop
+# -----------------------------------------
+def _usage():
+    import resource
+
+    r = resource.getrusage(resource.RUSAGE_SELF)
+    return r.ru_utime + r.ru_stime, r.ru_nvcsw + r.ru_nivcsw
+
+
+def _idle_threads(seconds):
+    # The old shape: tracking loop at 20 Hz, main loop at 1 Hz, a loop
+    # polling a flag every 50 ms; nothing happens
+    import threading
+
+    stop = threading.Event()
+
+    def poll(interval):
+        while not stop.is_set():
+            time.sleep(interval)
+
+    threads = [threading.Thread(target=poll, args=(i,), daemon=True) for i in (0.05, 1.0, 0.05)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+
+
+def _idle_loop(seconds):
+    # The same subsystems as tasks waiting on queues and events
+    rt = Runtime()
+
+    async def waiter(topic):
+        queue = rt.subscribe(topic)
+        while True:
+            await queue.get()
+
+    async def main():
+        for topic in ("frame", "command", "speech"):
+            rt.spawn(topic, waiter(topic))
+        await asyncio.sleep(seconds)
+        rt.stop()
+
+    rt.run(main())
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    ap = argparse.ArgumentParser(description="Idle cost of polling threads vs the asyncio runtime")
+    ap.add_argument("cmd", choices=["idle"])
+    ap.add_argument("--seconds", type=float, default=5.0)
+    args = ap.parse_args()
+
+    report = {}
+    for label, fn in (("threads", _idle_threads), ("asyncio", _idle_loop)):
+        cpu, switches = _usage()
+        fn(args.seconds)
+        cpu2, switches2 = _usage()
+        report[label] = {"cpu_ms": round((cpu2 - cpu) * 1000, 1),
+                         "context_switches_per_s": round((switches2 - switches) / args.seconds, 1)}
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,155 @@
+import logging
+import threading
+import time
+
+# -----------------------------------------
+# Asynchronous, coalescing servo command channel
+#
+# Callers (face tracking, lip-sync, commands) only update a
+# latest-value-per-servo table; one writer thread owns the serial port
+# and sends whatever is newest as a single frame. Unchanged and
+# sub-threshold angles are dropped before they reach the wire.
+#
+# Framing:
+#   "text"   -- "pan:92\ntilt:90\n" in one write (current Arduino sketch)
+#   "binary" -- 0xAA 0x55 <count> (<servo id> <angle>)* <checksum>
+#               checksum = sum(count, ids, angles) & 0xFF
+#               Needs the matching parser on the Arduino side.
+# -----------------------------------------
+FRAME_START = b"\xaa\x55"
+SERVO_IDS = {"pan": 0, "tilt": 1, "mouth": 2}
+SERVO_NAMES = {v: k for k, v in SERVO_IDS.items()}
+
+
+def encode_text(updates):
+    return "".join(f"{name}:{int(angle)}\n" for name, angle in updates.items()).encode()
+
+
+def encode_binary(updates):
+    body = bytearray([len(updates)])
+    for name, angle in updates.items():
+        body += bytes([SERVO_IDS[name], max(0, min(180, int(angle)))])
+    return FRAME_START + bytes(body) + bytes([sum(body) & 0xFF])
+
+
+def decode_binary(buf):
+    """Parse as many complete frames as ``buf`` holds.
+
+    Returns ([{name: angle}, ...], bytes_consumed, bad_frames).
+    """
+    frames, bad, i = [], 0, 0
+    while True:
+        start = buf.find(FRAME_START, i)
+        if start < 0:
+            return frames, max(i, len(buf) - 1), bad
+        if start + 3 > len(buf):
+            return frames, start, bad
+        count = buf[start + 2]
+        end = start + 3 + 2 * count + 1
+        if end > len(buf):
+            return frames, start, bad
+        body = buf[start + 2:end - 1]
+        if sum(body) & 0xFF != buf[end - 1]:
+            bad += 1
+            i = start + 1
+            continue
+        frames.append({SERVO_NAMES.get(body[1 + 2 * k], body[1 + 2 * k]): body[2 + 2 * k]
+                       for k in range(count)})
+        i = end
+
+
+class ServoChannel:
+    def __init__(self, port, framing="text", min_delta=1):
+        self.port = port
+        self.encode = encode_binary if framing == "binary" else encode_text
+        self.min_delta = min_delta
+        self._pending = {}      # name -> angle waiting to be sent
+        self._queued_at = None  # monotonic time the oldest pending update arrived
+        self._sent = {}         # name -> last angle on the wire (or being written)
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+        # counters
+        self.updates = 0
+        self.dropped = 0
+        self.frames = 0
+        self.bytes_sent = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self._started_at = time.monotonic()
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="servo-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def set(self, name, angle):
+        self.set_many({name: angle})
+
+    def set_many(self, angles):
+        with self._cond:
+            for name, angle in angles.items():
+                angle = int(angle)
+                self.updates += 1
+                # Judge against what the servo was last told, not what is queued:
+                # set A, write, set B, set A again must leave A on the wire
+                sent = self._sent.get(name)
+                if sent is not None and abs(angle - sent) < self.min_delta:
+                    self.dropped += 1
+                    self._pending.pop(name, None)  # back where the wire already is
+                    continue
+                self._pending[name] = angle
+                if self._queued_at is None:
+                    self._queued_at = time.monotonic()
+            if self._pending:
+                self._cond.notify()
+            else:
+                self._queued_at = None
+
+    def stats(self):
+        elapsed = max(1e-6, time.monotonic() - self._started_at)
+        return {
+            "updates": self.updates,
+            "dropped": self.dropped,
+            "frames": self.frames,
+            "bytes_sent": self.bytes_sent,
+            "bytes_per_s": round(self.bytes_sent / elapsed, 1),
+            "queue_latency_ms_avg": round(self.latency_total / self.frames * 1000, 2) if self.frames else 0.0,
+            "queue_latency_ms_max": round(self.latency_max * 1000, 2),
+        }
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or not self._running)
+                if not self._pending and not self._running:
+                    return
+                updates, self._pending = self._pending, {}
+                queued_at, self._queued_at = self._queued_at, None
+                self._sent.update(updates)
+            frame = self.encode(updates)
+            try:
+                self.port.write(frame)
+            except Exception as e:
+                logging.error(f"Servo write failed: {e}")
+                with self._cond:
+                    # Unknown what arrived: the next update for these is always sent
+                    for name in updates:
+                        if self._sent.get(name) == updates[name]:
+                            del self._sent[name]
+                continue
+            latency = time.monotonic() - queued_at
+            with self._cond:
+                self.frames += 1
+                self.bytes_sent += len(frame)
+                self.latency_total += latency
+                self.latency_max = max(self.latency_max, latency)
@@ -0,0 +1,179 @@
+import logging
+import queue
+import re
+import threading
+import time
+
+# -----------------------------------------
+# Sentence-chunked streaming TTS
+#
+# Long replies are split into sentences (and over-long sentences into
+# clauses); a worker thread synthesizes chunk n+1 while chunk n plays,
+# so first audio only waits for the first chunk instead of the whole
+# reply. lipsync.play_chunks plays the chunks back to back and offsets
+# each chunk's mouth schedule onto one clock.
+#
+#   stats = speak_streaming(text, "en", mouth_open, mouth_close, cache)
+#   stats["first_audio_s"], stats["total_s"]
+# -----------------------------------------
+MAX_CHUNK_CHARS = 80   # sentences longer than this are split at clause boundaries
+MIN_CHUNK_WORDS = 2    # shorter pieces are merged into a neighbour
+SYNTH_AHEAD = 2        # chunks synthesized ahead of playback
+
+SENTENCE_END = re.compile(r"(?<=[.!?…])[\"”’)]*\s+")
+CLAUSE_END = re.compile(r"(?<=[,;:—])\s*")
+ABBREVIATIONS = ("dr.", "mr.", "mrs.", "ms.", "st.", "vs.", "e.g.", "i.e.", "etc.")
+
+
+def split_text(text, max_chars=MAX_CHUNK_CHARS, min_words=MIN_CHUNK_WORDS):
+    """Sentences (clauses for long ones), in order; joined they read as ``text``."""
+    pieces = []
+    for sentence in SENTENCE_END.split(text.strip()):
+        if not sentence:
+            continue
+        if pieces and pieces[-1].lower().endswith(ABBREVIATIONS):
+            pieces[-1] += " " + sentence  # "Dr. Frankenstein" is one sentence
+            continue
+        pieces.append(sentence)
+
+    chunks = []
+    for sentence in pieces:
+        parts = [sentence]
+        if len(sentence) > max_chars:
+            parts = [p for p in CLAUSE_END.split(sentence) if p.strip()]
+        for part in parts:
+            part = part.strip()
+            if chunks and len(part.split()) < min_words:
+                chunks[-1] += " " + part
+            elif chunks and len(chunks[-1].split()) < min_words:
+                chunks[-1] += " " + part
+            else:
+                chunks.append(part)
+    return chunks
+
+
+def synth_chunk(text, lang="en", cache=None):
+    """(Pcm, mouth schedule) for one chunk."""
+    # Imported here so split_text() users (voice.py) don't pull in the audio stack
+    from lipsync import envelope_schedule, phoneme_schedule
+    from speech_synth import synthesize
+
+    # gTTS needs network: prewarm_tts.py fills the cache while online.
+    # English chunks are made on the spot (espeak-ng is local and one
+    # pass gives the phoneme timings too); whole cached replies never
+    # get here (see speak_cached in Control_Sonny)
+    pcm, envelope, phonemes = synthesize(text, lang, cache if lang != "en" else None)
+    if phonemes:
+        return pcm, phoneme_schedule(phonemes)
+    return pcm, envelope_schedule(envelope)
+
+
+class ChunkSynth:
+    """Worker thread that synthesizes ``pieces`` in order into a bounded queue."""
+
+    def __init__(self, pieces, lang="en", cache=None, ahead=SYNTH_AHEAD):
+        self.pieces = list(pieces)
+        self.lang = lang
+        self.cache = cache
+        self.synth_seconds = []   # per chunk
+        self._queue = queue.Queue(maxsize=max(1, ahead))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="tts-synth", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def __iter__(self):
+        try:
+            for _ in self.pieces:
+                item = self._queue.get()
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            self.stop()
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _run(self):
+        for piece in self.pieces:
+            if self._stop.is_set():
+                return
+            start = time.perf_counter()
+            try:
+                item = synth_chunk(piece, self.lang, self.cache)
+            except Exception as e:
+                self._put(e)
+                return
+            self.synth_seconds.append(time.perf_counter() - start)
+            if not self._put(item):
+                return
+
+
+def speak_streaming(text, lang, mouth_open, mouth_close, cache=None, on_start=None):
+    """Speak ``text`` chunk by chunk; returns timing stats.
+
+    first_audio_s: call -> first chunk starts playing
+    total_s:       call -> last chunk finished
+    """
+    from lipsync import play_chunks
+
+    started = time.monotonic()
+    first = []
+
+    def mark_start():
+        first.append(time.monotonic() - started)
+        if on_start:
+            on_start()
+
+    synth = ChunkSynth(split_text(text), lang, cache).start()
+    played = play_chunks(synth, mouth_open, mouth_close, on_start=mark_start)
+    stats = {
+        "first_audio_s": round(first[0], 3) if first else None,
+        "total_s": round(time.monotonic() - started, 3),
+        "synth_s": round(sum(synth.synth_seconds), 3),
+        **played,
+    }
+    logging.debug(f"Streamed speech: {stats}")
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from responses import creator_responses, jokes, status_responses
+
+    # Synthesis-only comparison (no playback): first audio used to wait for
+    # the whole reply; now it waits for the first chunk
+    ap = argparse.ArgumentParser(description="Whole-reply vs first-chunk synthesis time")
+    ap.add_argument("--lang", default="en")
+    args = ap.parse_args()
+
+    rows = []
+    for text in jokes + creator_responses + status_responses:
+        pieces = split_text(text)
+        start = time.perf_counter()
+        synth_chunk(text, args.lang)
+        whole = time.perf_counter() - start
+        start = time.perf_counter()
+        synth_chunk(pieces[0], args.lang)
+        first = time.perf_counter() - start
+        rows.append({"text": text[:40], "chunks": len(pieces),
+                     "whole_ms": round(whole * 1000), "first_chunk_ms": round(first * 1000)})
+    print(json.dumps(rows, indent=2, ensure_ascii=False))
+    multi = [r for r in rows if r["chunks"] > 1]
+    if multi:
+        saved = sum(r["whole_ms"] - r["first_chunk_ms"] for r in multi) / len(multi)
+        print(f"{len(multi)} multi-chunk replies: first audio {saved:.0f} ms sooner on average")
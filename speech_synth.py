@@ -0,0 +1,153 @@
+import io
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import wave
+from collections import namedtuple
+
+from gtts import gTTS
+from pydub import AudioSegment
+
+from lipsync import amplitude_envelope
+
+# -----------------------------------------
+# TTS backends that return PCM instead of playing it
+#
+#   EN: espeak-ng (local)
+#   IG: gTTS (needs network -- prewarm the cache while online)
+# -----------------------------------------
+
+# data: raw little-endian PCM; width: bytes per sample
+Pcm = namedtuple("Pcm", "data rate channels width")
+
+# One phoneme from espeak-ng's --pho output; times in seconds
+Phoneme = namedtuple("Phoneme", "symbol start duration")
+
+# espeak-ng only writes --pho phoneme timings for MBROLA voices. With one
+# installed (the mbrola binary plus its database), English uses it and the
+# mouth follows real phoneme durations; with the stock "en" voice the .pho
+# file stays empty and lip sync falls back to the amplitude envelope.
+MBROLA_VOICES = ("mb-us1", "mb-us2", "mb-en1")
+MBROLA_DIRS = ("/usr/share/mbrola", "/usr/local/share/mbrola")
+
+
+def find_mbrola_voice(voices=MBROLA_VOICES, dirs=MBROLA_DIRS):
+    """First espeak-ng MBROLA voice whose database is installed, or None."""
+    if not shutil.which("mbrola"):
+        return None
+    for voice in voices:
+        db = voice[3:]  # "mb-us1" -> "us1"
+        for base in dirs:
+            if os.path.isfile(os.path.join(base, db, db)) or os.path.isfile(os.path.join(base, db)):
+                return voice
+    return None
+
+
+ESPEAK_VOICE = find_mbrola_voice() or "en"
+ESPEAK_RATE = 175  # espeak-ng default words per minute
+_warned_no_phonemes = False
+
+
+def wav_to_pcm(raw):
+    with wave.open(io.BytesIO(raw), "rb") as w:
+        params = w.getparams()
+        data = w.readframes(params.nframes)
+    return Pcm(data, params.framerate, params.nchannels, params.sampwidth)
+
+
+def synth_espeak(text, voice=ESPEAK_VOICE, rate=ESPEAK_RATE):
+    # Text goes in as an argv element, never through a shell
+    result = subprocess.run(
+        ["espeak-ng", "-v", voice, "-s", str(rate), "--stdout", text],
+        capture_output=True, check=True
+    )
+    return wav_to_pcm(result.stdout)
+
+
+def parse_pho(text):
+    """Parse MBROLA .pho lines ("symbol duration_ms [pos pitch]...") into Phonemes."""
+    phonemes = []
+    t = 0.0
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) < 2 or line.startswith(";"):
+            continue
+        try:
+            duration = int(parts[1]) / 1000
+        except ValueError:
+            continue
+        phonemes.append(Phoneme(parts[0], t, duration))
+        t += duration
+    return phonemes
+
+
+def synth_espeak_timed(text, voice=ESPEAK_VOICE, rate=ESPEAK_RATE):
+    """One espeak-ng run: waveform to a WAV file, phoneme timings to --phonout.
+
+    Phonemes come back empty unless ``voice`` is an MBROLA voice.
+    """
+    global _warned_no_phonemes
+    tmp = tempfile.mkdtemp(prefix="espeak-")
+    wav_path, pho_path = os.path.join(tmp, "out.wav"), os.path.join(tmp, "out.pho")
+    try:
+        # -w rather than --stdout: some builds send only the .pho text to
+        # stdout once --pho is given, and a second run would double the cost
+        subprocess.run(
+            ["espeak-ng", "-v", voice, "-s", str(rate), "--pho", f"--phonout={pho_path}",
+             "-w", wav_path, text],
+            capture_output=True, check=True
+        )
+        with open(wav_path, "rb") as f:
+            raw = f.read()
+        try:
+            with open(pho_path, encoding="utf-8", errors="replace") as f:
+                phonemes = parse_pho(f.read())
+        except FileNotFoundError:
+            phonemes = []
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    if not raw:
+        raise RuntimeError(f"espeak-ng produced no audio for {text!r}")
+    if not phonemes and not _warned_no_phonemes:
+        _warned_no_phonemes = True
+        logging.warning(f"espeak-ng voice '{voice}' gives no phoneme timings (not MBROLA); "
+                        f"lip sync uses the amplitude envelope. Install mbrola and one of "
+                        f"{', '.join(MBROLA_VOICES)} for phoneme-driven mouth moves.")
+    return wav_to_pcm(raw), phonemes
+
+
+def synth_gtts(text, lang="ig"):
+    mp3 = io.BytesIO()
+    gTTS(text=text, lang=lang).write_to_fp(mp3)
+    mp3.seek(0)
+    audio = AudioSegment.from_file(mp3, format="mp3")
+    return Pcm(audio.raw_data, audio.frame_rate, audio.channels, audio.sample_width)
+
+
+# lang -> (voice, rate, synth function) used as the cache key and backend;
+# synth(text) returns (Pcm, phonemes), phonemes empty when unknown
+BACKENDS = {
+    "en": (ESPEAK_VOICE, ESPEAK_RATE, lambda text: synth_espeak_timed(text)),
+    "ig": ("gtts-ig", None, lambda text: (synth_gtts(text, "ig"), [])),
+}
+
+
+def synthesize(text, lang="en", cache=None):
+    """PCM for ``text``, served from ``cache`` (a SpeechCache) when possible.
+
+    Returns (Pcm, envelope, phonemes); envelope is the precomputed mouth
+    open/close track (see lipsync.py), phonemes the espeak-ng timings
+    when the voice gives them (else []).
+    """
+    voice, rate, synth = BACKENDS[lang]
+    if cache is not None:
+        hit = cache.get(text, lang, voice, rate)
+        if hit:
+            return hit
+    pcm, phonemes = synth(text)
+    envelope = amplitude_envelope(pcm)
+    if cache is not None:
+        cache.put(text, lang, voice, rate, pcm, envelope, phonemes)
+    return pcm, envelope, phonemes
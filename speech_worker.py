@@ -0,0 +1,246 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+# -----------------------------------------
+# Speech output worker
+#
+# One thread owns the TTS engine and the audio device; everybody else
+# queues text and carries on (handlers, greetings, the listening loop):
+#
+#   speech = SpeechWorker(say_now, interrupt=playback.interrupt).start()
+#   handle = speech.speak("Hello!", "en", priority=NORMAL)
+#   handle.wait()     # only when the caller must know it has been said
+#   handle.cancel()
+#
+# - Higher priority is spoken first; equal priorities in order.
+# - A job with higher priority than the one playing preempts it: the
+#   ``interrupt`` event is set and ``say`` is expected to stop early
+#   (lipsync's players watch it). Preempted jobs are not resumed.
+# - speak() with the same text and language as a queued or playing job
+#   returns that job's handle instead of saying it twice.
+# - If ``interrupt`` is set from outside (barge-in), the job ends as
+#   "interrupted" and queued jobs below URGENT are dropped: the user
+#   has the floor.
+# -----------------------------------------
+LOW = 0      # chatter: idle remarks, vision events
+NORMAL = 1   # command replies, prompts
+URGENT = 2   # errors, shutdown
+
+
+class SpeechHandle:
+    """Future-like handle for one queued utterance.
+
+    status: queued -> speaking -> done / cancelled / preempted /
+    interrupted / failed
+    """
+
+    def __init__(self, worker, text, lang, priority, seq):
+        self.worker = worker
+        self.text = text
+        self.lang = lang
+        self.priority = priority
+        self.seq = seq
+        self.status = "queued"
+        self.error = None
+        self.queued_at = time.monotonic()
+        self.started_at = None
+        self._done = threading.Event()
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """True once finished, however it ended."""
+        return self._done.wait(timeout)
+
+    def result(self, timeout=None):
+        """Final status; re-raises the error if ``say`` failed."""
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"speech still {self.status}: {self.text!r}")
+        if self.error:
+            raise self.error
+        return self.status
+
+    def cancel(self):
+        return self.worker.cancel(self)
+
+    def __repr__(self):
+        return f"SpeechHandle({self.text[:30]!r}, {self.lang}, p{self.priority}, {self.status})"
+
+
+class SpeechWorker:
+    def __init__(self, say, interrupt=None):
+        self.say = say   # say(text, lang), blocking; runs on the worker thread only
+        self.interrupt = interrupt or threading.Event()
+        self.current = None
+        self.counts = {k: 0 for k in ("done", "cancelled", "preempted", "interrupted",
+                                       "failed", "coalesced")}
+        self._queue = []   # heap of (-priority, seq, handle)
+        self._seq = itertools.count()
+        self._stopping = None   # status for the current job once it returns
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="speech", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        """Cancel everything and end the thread."""
+        with self._cond:
+            self._running = False
+            self._cancel_queued()
+            if self.current:
+                self._stop_current("cancelled")
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+
+    @property
+    def busy(self):
+        return self.current is not None or bool(self._queue)
+
+    def wait_idle(self, timeout=None):
+        """Block until nothing is queued or playing; False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self.busy, timeout)
+
+    def speak(self, text, lang=None, priority=NORMAL):
+        """Queue ``text``; returns its SpeechHandle straight away."""
+        with self._cond:
+            for job in self._active():
+                if job.text == text and job.lang == lang:
+                    self.counts["coalesced"] += 1
+                    if job.status == "queued" and priority > job.priority:
+                        job.priority = priority
+                        self._requeue()
+                        self._maybe_preempt(priority)
+                    return job
+            job = SpeechHandle(self, text, lang, priority, next(self._seq))
+            heapq.heappush(self._queue, (-priority, job.seq, job))
+            self._maybe_preempt(priority)
+            self._cond.notify_all()
+            return job
+
+    def cancel(self, job):
+        """Drop a queued job or stop it if playing; False if already finished."""
+        with self._cond:
+            if job.status == "queued":
+                self._queue = [e for e in self._queue if e[2] is not job]
+                heapq.heapify(self._queue)
+                self._finish(job, "cancelled")
+                return True
+            if job is self.current:
+                self._stop_current("cancelled")
+                return True
+            return False
+
+    def cancel_all(self, below=None):
+        """Cancel queued and playing jobs (only those with priority < ``below`` if given)."""
+        with self._cond:
+            self._cancel_queued(below)
+            if self.current and (below is None or self.current.priority < below):
+                self._stop_current("cancelled")
+
+    def stats(self):
+        return {**self.counts, "queued": len(self._queue)}
+
+    # -- internals (called with self._cond held) --
+    def _active(self):
+        if self.current and not self._stopping:
+            yield self.current
+        for _, _, job in self._queue:
+            yield job
+
+    def _requeue(self):
+        self._queue = [(-job.priority, job.seq, job) for _, _, job in self._queue]
+        heapq.heapify(self._queue)
+
+    def _maybe_preempt(self, priority):
+        if self.current and not self._stopping and priority > self.current.priority:
+            logging.info(f"Speech preempted: {self.current.text!r}")
+            self._stop_current("preempted")
+
+    def _stop_current(self, status):
+        self._stopping = status
+        self.interrupt.set()
+
+    def _cancel_queued(self, below=None):
+        keep = []
+        for entry in self._queue:
+            if below is None or entry[2].priority < below:
+                self._finish(entry[2], "cancelled")
+            else:
+                keep.append(entry)
+        self._queue = keep
+        heapq.heapify(self._queue)
+
+    def _finish(self, job, status):
+        job.status = status
+        self.counts[status] += 1
+        job._done.set()
+        self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or not self._running)
+                if not self._running:
+                    return
+                _, _, job = heapq.heappop(self._queue)
+                self.interrupt.clear()
+                self._stopping = None
+                self.current = job
+                job.status = "speaking"
+                job.started_at = time.monotonic()
+            try:
+                self.say(job.text, job.lang)
+            except Exception as e:
+                job.error = e
+                logging.error(f"Speech failed for {job.text!r}: {e}")
+            with self._cond:
+                if job.error:
+                    status = "failed"
+                elif self._stopping:
+                    status = self._stopping
+                elif self.interrupt.is_set():
+                    status = "interrupted"
+                    self._cancel_queued(below=URGENT)
+                else:
+                    status = "done"
+                self.current = None
+                self._finish(job, status)
+
+
+if __name__ == "__main__":
+    # Demo with a fake engine: speak() returns at once, duplicates
+    # coalesce, URGENT preempts, cancel drops a queued job
+    logging.basicConfig(level=logging.INFO, format="%(relativeCreated)6.0f ms  %(message)s")
+
+    def fake_say(text, lang):
+        logging.info(f"  say start: {text}")
+        stopped = worker.interrupt.wait(0.05 * len(text.split()) + 0.2)
+        logging.info(f"  say {'stopped' if stopped else 'end'}:   {text}")
+
+    worker = SpeechWorker(fake_say).start()
+    start = time.perf_counter()
+    greeting = worker.speak("Hello there, human!", "en", LOW)
+    reply = worker.speak("The current time is ten past four.", "en")
+    again = worker.speak("The current time is ten past four.", "en")
+    joke = worker.speak("Why did the robot go on a diet? Too many chips.", "en")
+    logging.info(f"4 speak() calls took {(time.perf_counter() - start) * 1e6:.0f} µs; "
+                 f"duplicate coalesced: {again is reply}")
+    time.sleep(0.1)
+    joke.cancel()
+    alarm = worker.speak("Battery low!", "en", URGENT)
+    worker.wait_idle()
+    for h in (greeting, reply, joke, alarm):
+        logging.info(f"{h.text!r}: {h.result()}")
+    logging.info(f"stats: {worker.stats()}")
+    worker.stop()
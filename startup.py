@@ -0,0 +1,142 @@
+import logging
+import threading
+import time
+
+# -----------------------------------------
+# Dependency-ordered, parallel startup
+#
+# Each step is a plain function plus the names of the steps it needs.
+# Every step gets its own thread and starts the moment its dependencies
+# are done, so independent subsystems (model load, audio, camera, serial)
+# initialize side by side instead of one after another.
+#
+#   graph = StartupGraph()
+#   graph.add("audio", init_audio)
+#   graph.add("interaction", start_loop, after=("audio", "tts"))
+#   graph.run()
+#   graph.wait("interaction")
+#
+# A step that raises is marked failed and everything downstream of it is
+# skipped. timeline() / log_timeline() report when each step started and
+# finished, relative to the graph's t0 (pass the process start to include
+# import time).
+# -----------------------------------------
+
+
+class Step:
+    def __init__(self, name, fn, after=()):
+        self.name = name
+        self.fn = fn
+        self.after = tuple(after)
+        self.state = "pending"   # pending, running, done, failed, skipped
+        self.error = None
+        self.started = None
+        self.finished = None
+        self.done = threading.Event()
+
+
+class StartupGraph:
+    def __init__(self, t0=None):
+        self.t0 = time.monotonic() if t0 is None else t0
+        self.steps = {}
+        self._marks = []   # (name, started, finished) recorded outside the graph
+
+    def add(self, name, fn, after=()):
+        self.steps[name] = Step(name, fn, after)
+        return self
+
+    def mark(self, name, started, finished=None):
+        """Record something that already happened (e.g. module imports) in the timeline."""
+        self._marks.append((name, started, time.monotonic() if finished is None else finished))
+
+    def run(self):
+        for step in self.steps.values():
+            missing = [d for d in step.after if d not in self.steps]
+            if missing:
+                raise ValueError(f"startup step {step.name} depends on unknown {missing}")
+        for step in self.steps.values():
+            threading.Thread(target=self._run_step, args=(step,),
+                             name=f"startup-{step.name}", daemon=True).start()
+        return self
+
+    def wait(self, *names, timeout=None):
+        """Block until the named steps (default: all) finish; True if all succeeded."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for name in names or self.steps:
+            step = self.steps[name]
+            left = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not step.done.wait(left) or step.state != "done":
+                return False
+        return True
+
+    def ok(self, name):
+        return self.steps[name].state == "done"
+
+    def timeline(self):
+        rows = [{"step": name, "start_s": round(started - self.t0, 3),
+                 "end_s": round(finished - self.t0, 3), "state": "done"}
+                for name, started, finished in self._marks]
+        for step in self.steps.values():
+            rows.append({
+                "step": step.name,
+                "start_s": None if step.started is None else round(step.started - self.t0, 3),
+                "end_s": None if step.finished is None else round(step.finished - self.t0, 3),
+                "state": step.state,
+            })
+        return sorted(rows, key=lambda r: (r["end_s"] is None, r["end_s"] or 0.0))
+
+    def log_timeline(self):
+        for row in self.timeline():
+            if row["end_s"] is None:
+                logging.info(f"startup {row['step']:<12} {row['state']}")
+            else:
+                took = row["end_s"] - (row["start_s"] or 0.0)
+                logging.info(f"startup {row['step']:<12} {row['start_s']:7.3f}s → {row['end_s']:7.3f}s "
+                             f"({took:.3f}s) {row['state']}")
+
+    # -- internals --
+    def _run_step(self, step):
+        for name in step.after:
+            dep = self.steps[name]
+            dep.done.wait()
+            if dep.state != "done":
+                step.state = "skipped"
+                step.error = f"{name} {dep.state}"
+                logging.error(f"Startup step {step.name} skipped: {step.error}")
+                step.done.set()
+                return
+        step.state = "running"
+        step.started = time.monotonic()
+        try:
+            step.fn()
+            step.state = "done"
+        except Exception as e:
+            step.state = "failed"
+            step.error = str(e)
+            logging.error(f"Startup step {step.name} failed: {e}")
+        finally:
+            step.finished = time.monotonic()
+            step.done.set()
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    # Demo with sleeps standing in for the real subsystems
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    graph = StartupGraph()
+    graph.add("asr", lambda: time.sleep(1.2))
+    graph.add("audio", lambda: time.sleep(0.2))
+    graph.add("tts", lambda: time.sleep(0.1))
+    graph.add("serial", lambda: time.sleep(2.0))
+    graph.add("camera", lambda: time.sleep(0.8))
+    graph.add("tracking", lambda: None, after=("camera",))
+    graph.add("interaction", lambda: None, after=("asr", "audio", "tts"))
+    graph.run()
+    graph.wait("interaction")
+    print(f"interactive after {time.monotonic() - graph.t0:.2f}s "
+          f"(one after another: 4.3s)", file=sys.stderr)
+    graph.wait()
+    graph.log_timeline()
+    print(json.dumps(graph.timeline()))
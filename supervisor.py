@@ -0,0 +1,363 @@
+import logging
+import os
+import random
+import selectors
+import subprocess
+import sys
+import threading
+import time
+
+# -----------------------------------------
+# Process supervisor
+#
+# Child exits wake the supervisor immediately: each child gets a pidfd
+# (Linux 5.3+) in the selector, or a waiter thread that pokes a wake-up
+# pipe on older kernels. Crashed services restart with exponential
+# backoff plus jitter, so a service that dies on start doesn't spin.
+#
+# Health: every child gets the write end of a pipe in SONNY_HEARTBEAT_FD.
+# A supervised script calls notify_ready() once it is up and heartbeat()
+# from its main work loop; a service with heartbeat_timeout set that goes
+# quiet that long is treated as hung and restarted. Scripts that never
+# beat are still restarted on exit, just not checked for hangs.
+# -----------------------------------------
+HEARTBEAT_ENV = "SONNY_HEARTBEAT_FD"
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+STABLE_AFTER = 30.0     # up this long = healthy again; backoff starts over
+STOP_GRACE = 5.0        # SIGTERM -> SIGKILL
+
+
+# -----------------------------------------
+# Child side
+# -----------------------------------------
+_heartbeat_fd = None
+
+
+def _beat(byte):
+    global _heartbeat_fd
+    if _heartbeat_fd is None:
+        try:
+            _heartbeat_fd = int(os.environ.get(HEARTBEAT_ENV, "-1"))
+        except ValueError:
+            _heartbeat_fd = -1
+    if _heartbeat_fd < 0:
+        return
+    try:
+        os.write(_heartbeat_fd, byte)
+    except (BlockingIOError, BrokenPipeError):
+        pass
+    except OSError:
+        _heartbeat_fd = -1
+
+
+def heartbeat():
+    """Tell the supervisor this process is still making progress (no-op if unsupervised)."""
+    _beat(b"H")
+
+
+def notify_ready():
+    """Tell the supervisor startup is finished."""
+    _beat(b"R")
+
+
+# -----------------------------------------
+# Supervisor side
+# -----------------------------------------
+class Service:
+    def __init__(self, name, cmd, cwd=None, env=None, heartbeat_timeout=None,
+                 start_timeout=120.0, backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX,
+                 stable_after=STABLE_AFTER):
+        self.name = name
+        self.cmd = cmd
+        self.cwd = cwd
+        self.env = env or {}
+        self.heartbeat_timeout = heartbeat_timeout
+        self.start_timeout = start_timeout     # grace before the first heartbeat is due
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stable_after = stable_after
+
+        self.state = "stopped"   # running, ready, backoff, stopping, stopped
+        self.proc = None
+        self.started_at = None
+        self.ready_at = None
+        self.last_beat = None
+        self.next_start = None
+        self.kill_at = None
+        self.failures = 0        # consecutive short-lived runs
+        self.restarts = 0
+        self.last_exit = None
+        self.time_to_ready = None
+        self._beat_fd = None
+        self._exit_fd = None
+
+    def backoff(self):
+        delay = min(self.backoff_max, self.backoff_base * 2 ** max(0, self.failures - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def stats(self, now=None):
+        now = now or time.monotonic()
+        running = self.proc is not None and self.state in ("running", "ready")
+        return {
+            "state": self.state,
+            "pid": self.proc.pid if running else None,
+            "uptime_s": round(now - self.started_at, 1) if running else 0.0,
+            "restarts": self.restarts,
+            "last_exit": self.last_exit,
+            "time_to_ready_s": None if self.time_to_ready is None else round(self.time_to_ready, 3),
+            "last_beat_age_s": None if not running or self.last_beat is None
+            else round(now - self.last_beat, 1),
+        }
+
+
+class Supervisor:
+    def __init__(self, services=()):
+        self.services = {}
+        self._sel = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        self._sel.register(self._wake_r, selectors.EVENT_READ, ("wake", None))
+        self._use_pidfd = hasattr(os, "pidfd_open")
+        for service in services:
+            self.add(service)
+
+    def add(self, service):
+        self.services[service.name] = service
+        return service
+
+    def start(self):
+        for service in self.services.values():
+            if service.state == "stopped":
+                self._spawn(service)
+        return self
+
+    def stats(self):
+        now = time.monotonic()
+        return {name: s.stats(now) for name, s in self.services.items()}
+
+    def run_once(self, max_wait=1.0):
+        """Handle whatever is due (exits, heartbeats, hangs, restarts) within ``max_wait``."""
+        now = time.monotonic()
+        timeout = max(0.0, min([max_wait] + [d - now for d in self._deadlines()]))
+        for key, _ in self._sel.select(timeout):
+            kind, service = key.data
+            if kind == "beat":
+                self._read_beats(service)
+            elif kind == "exit":
+                self._reap(service)
+            else:
+                try:
+                    os.read(self._wake_r, 4096)
+                except BlockingIOError:
+                    pass
+                for s in self.services.values():
+                    if s.proc and s.proc.poll() is not None and s._exit_fd is None:
+                        self._reap(s)
+        self._check_timers()
+
+    def run(self, stop=None):
+        while stop is None or not stop.is_set():
+            self.run_once()
+
+    def stop_all(self, grace=STOP_GRACE):
+        for service in self.services.values():
+            service.next_start = None
+            if service.proc and service.proc.poll() is None:
+                service.state = "stopping"
+                logging.info(f"Stopping {service.name}...")
+                service.proc.terminate()
+        deadline = time.monotonic() + grace
+        for service in self.services.values():
+            if not service.proc:
+                service.state = "stopped"
+                continue
+            try:
+                service.proc.wait(max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                logging.warning(f"{service.name} ignored SIGTERM; killing")
+                service.proc.kill()
+                service.proc.wait()
+            self._reap(service)
+
+    # -- internals --
+    def _deadlines(self):
+        for s in self.services.values():
+            if s.next_start is not None:
+                yield s.next_start
+            if s.kill_at is not None:
+                yield s.kill_at
+            elif s.heartbeat_timeout and s.proc and s.state in ("running", "ready"):
+                yield self._hang_deadline(s)
+
+    @staticmethod
+    def _hang_deadline(s):
+        if s.last_beat is None:
+            return s.started_at + max(s.start_timeout, s.heartbeat_timeout)
+        return s.last_beat + s.heartbeat_timeout
+
+    def _spawn(self, service):
+        beat_r, beat_w = os.pipe()
+        env = dict(os.environ, **service.env)
+        env[HEARTBEAT_ENV] = str(beat_w)
+        try:
+            proc = subprocess.Popen(service.cmd, cwd=service.cwd, env=env, pass_fds=(beat_w,))
+        except OSError as e:
+            os.close(beat_r)
+            os.close(beat_w)
+            logging.error(f"Could not start {service.name}: {e}")
+            service.failures += 1
+            self._schedule_restart(service)
+            return
+        os.close(beat_w)
+        os.set_blocking(beat_r, False)
+        service.proc = proc
+        service.state = "running"
+        service.started_at = time.monotonic()
+        service.ready_at = service.last_beat = service.kill_at = service.next_start = None
+        service._beat_fd = beat_r
+        self._sel.register(beat_r, selectors.EVENT_READ, ("beat", service))
+        if self._use_pidfd:
+            try:
+                service._exit_fd = os.pidfd_open(proc.pid)
+                self._sel.register(service._exit_fd, selectors.EVENT_READ, ("exit", service))
+            except OSError:
+                self._use_pidfd = False
+        if service._exit_fd is None:
+            threading.Thread(target=self._wait_child, args=(proc,), daemon=True).start()
+        logging.info(f"Started {service.name} (pid {proc.pid})")
+
+    def _wait_child(self, proc):
+        proc.wait()
+        try:
+            os.write(self._wake_w, b"x")
+        except OSError:
+            pass
+
+    def _read_beats(self, service):
+        try:
+            data = os.read(service._beat_fd, 4096)
+        except BlockingIOError:
+            return
+        if not data:
+            # Child closed its end (usually exiting); exit handling does the rest
+            self._close_fd(service, "_beat_fd")
+            return
+        now = time.monotonic()
+        service.last_beat = now
+        if service.ready_at is None:
+            service.ready_at = now
+            service.time_to_ready = now - service.started_at
+            service.state = "ready"
+            logging.info(f"{service.name} ready in {service.time_to_ready:.2f}s")
+
+    def _close_fd(self, service, attr):
+        fd = getattr(service, attr)
+        if fd is None:
+            return
+        try:
+            self._sel.unregister(fd)
+        except (KeyError, ValueError):
+            pass
+        os.close(fd)
+        setattr(service, attr, None)
+
+    def _reap(self, service):
+        proc = service.proc
+        if proc is None or proc.poll() is None:
+            return
+        if service._beat_fd is not None:
+            self._read_beats(service)
+        self._close_fd(service, "_beat_fd")
+        self._close_fd(service, "_exit_fd")
+        service.proc = None
+        service.kill_at = None
+        service.last_exit = proc.returncode
+        uptime = time.monotonic() - service.started_at
+        if service.state == "stopping":
+            service.state = "stopped"
+            return
+        service.failures = 1 if uptime >= service.stable_after else service.failures + 1
+        logging.error(f"{service.name} exited with code {proc.returncode} after {uptime:.1f}s")
+        self._schedule_restart(service)
+
+    def _schedule_restart(self, service):
+        delay = service.backoff()
+        service.state = "backoff"
+        service.next_start = time.monotonic() + delay
+        logging.info(f"Restarting {service.name} in {delay:.1f}s (failure {service.failures})")
+
+    def _check_timers(self):
+        now = time.monotonic()
+        for s in self.services.values():
+            if s.next_start is not None and now >= s.next_start:
+                s.restarts += 1
+                self._spawn(s)
+            elif s.kill_at is not None and now >= s.kill_at and s.proc:
+                logging.warning(f"{s.name} ignored SIGTERM; killing")
+                s.proc.kill()
+                s.kill_at = None
+            elif (s.heartbeat_timeout and s.kill_at is None and s.proc
+                  and s.state in ("running", "ready")
+                  and now >= self._hang_deadline(s)):
+                quiet = now - (s.last_beat or s.started_at)
+                logging.error(f"{s.name} sent no heartbeat for {quiet:.1f}s; restarting")
+                s.proc.terminate()
+                s.kill_at = now + STOP_GRACE
+
+
+# -----------------------------------------
+# Demo: dummy children that crash, hang, and behave
+# -----------------------------------------
+DEMO_CHILDREN = {
+    "healthy": """
+import time, supervisor
+time.sleep(0.2); supervisor.notify_ready()
+while True:
+    supervisor.heartbeat(); time.sleep(0.2)
+""",
+    "crasher": """
+import time, supervisor
+supervisor.notify_ready(); time.sleep(0.1)
+raise SystemExit(3)
+""",
+    "hangs": """
+import time, supervisor
+supervisor.notify_ready()
+for _ in range(5):
+    supervisor.heartbeat(); time.sleep(0.2)
+time.sleep(3600)  # stuck: heartbeats stop
+""",
+    "legacy": """
+import time
+time.sleep(1.5)  # never beats; only exit is supervised
+""",
+}
+
+
+def demo(seconds=8.0):
+    import json
+    import tempfile
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        sup = Supervisor()
+        for name, code in DEMO_CHILDREN.items():
+            path = os.path.join(tmp, f"{name}.py")
+            with open(path, "w") as f:
+                f.write(code)
+            sup.add(Service(name, [sys.executable, path], env={"PYTHONPATH": here},
+                            heartbeat_timeout=1.0 if name != "legacy" else None,
+                            start_timeout=1.0, backoff_base=0.25, backoff_max=2.0,
+                            stable_after=5.0))
+        sup.start()
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            sup.run_once(0.5)
+        print(json.dumps(sup.stats(), indent=2))
+        sup.stop_all()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    demo(float(sys.argv[1]) if len(sys.argv) > 1 else 8.0)
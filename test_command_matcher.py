@@ -0,0 +1,63 @@
+import pytest
+
+from command_matcher import CommandMatcher
+
+# -----------------------------------------
+# CommandMatcher: cleaning, lookup and the accept/confirm decision
+# -----------------------------------------
+PHRASES = ["what time is it", "what is today's date", "tell me a joke", "make me laugh",
+           "who made you", "who built you", "hello"]
+GROUP = {"tell me a joke": "joke", "make me laugh": "joke"}.get
+
+
+@pytest.fixture
+def matcher():
+    return CommandMatcher(PHRASES)
+
+
+def test_fillers_are_removed_on_word_boundaries(matcher):
+    assert matcher.clean("Hey Sonny can you tell me a joke please") == "tell me a joke"
+    assert matcher.clean("humor they") == "humor they"
+
+
+def test_exact_and_fuzzy_match(matcher):
+    assert matcher.exact("please what time is it") == "what time is it"
+    assert matcher.exact("what time is") is None
+    assert matcher.match("what time is") == "what time is it"
+    assert matcher.match("banana bread") is None
+
+
+@pytest.mark.parametrize("confidence", [0.05, 0.3, 0.59, 1.0])
+def test_exact_one_best_never_needs_confirmation(matcher, confidence):
+    assert matcher.decide([("sonny what time is it", confidence)]) == ("what time is it", False)
+
+
+def test_exact_top_of_n_best_never_needs_confirmation(matcher):
+    hyps = [("who made you", 0.4), ("who built you", 0.35), ("who bill you", 0.25)]
+    assert matcher.decide(hyps) == ("who made you", False)
+
+
+def test_low_confidence_near_miss_is_confirmed(matcher):
+    assert matcher.decide([("what time", 0.2)]) == ("what time is it", True)
+
+
+def test_confident_near_miss_is_accepted(matcher):
+    assert matcher.decide([("what time is", 0.9)]) == ("what time is it", False)
+
+
+def test_close_call_between_commands_is_confirmed(matcher):
+    hyps = [("who maid you", 0.5), ("who bilt you", 0.5)]
+    phrase, confirm = matcher.decide(hyps)
+    assert phrase in ("who made you", "who built you")
+    assert confirm
+
+
+def test_synonyms_of_one_handler_are_not_a_tie(matcher):
+    hyps = [("tell me a joe", 0.5), ("make me laff", 0.5)]
+    assert matcher.decide(hyps)[1] is True
+    assert matcher.decide(hyps, group=GROUP)[1] is False
+
+
+def test_nothing_plausible(matcher):
+    assert matcher.decide([("banana bread", 1.0)]) == (None, False)
+    assert matcher.decide([]) == (None, False)
@@ -0,0 +1,85 @@
+from collections import namedtuple
+
+import numpy as np
+import pytest
+
+from echo_gate import ECHO_TAIL, EchoGate, PlaybackMonitor
+
+# -----------------------------------------
+# EchoGate classification against a known reference signal
+# -----------------------------------------
+RATE = 16000
+Pcm = namedtuple("Pcm", "data rate channels width")   # fields of speech_synth.Pcm
+
+
+def tone(seconds, amplitude, rate=RATE):
+    t = np.arange(int(seconds * rate)) / rate
+    return (amplitude * np.sin(2 * np.pi * 440 * t)).astype("<i2").tobytes()
+
+
+@pytest.fixture
+def monitor():
+    monitor = PlaybackMonitor()
+    # One second of Sonny at RMS ~2000 starting at t=10
+    monitor.started(Pcm(tone(1.0, 2828), RATE, 1, 2), at=10.0)
+    return monitor
+
+
+@pytest.fixture
+def gate(monitor):
+    return EchoGate(monitor, echo_gain=0.5)
+
+
+def test_not_playing_is_clean(gate):
+    assert gate.classify(5000.0, 9.0) == "clean"
+    assert gate.classify(5000.0, 11.0 + ECHO_TAIL + 0.01) == "clean"
+
+
+def test_reference_level(monitor):
+    assert monitor.reference_rms(10.5) == pytest.approx(2000, rel=0.02)
+    assert monitor.playing_at(11.0 + ECHO_TAIL / 2)
+
+
+def test_echo_and_user(gate):
+    # expected echo = 2000 * 0.5; user needs twice that
+    assert gate.classify(900.0, 10.5, learn=False) == "echo"
+    assert gate.classify(1900.0, 10.5, learn=False) == "echo"
+    assert gate.classify(2100.0, 10.5) == "user"
+
+
+def test_quiet_frames_are_never_user():
+    monitor = PlaybackMonitor()
+    monitor.started(Pcm(tone(1.0, 100), RATE, 1, 2), at=0.0)
+    gate = EchoGate(monitor, min_rms=300)
+    assert gate.classify(250.0, 0.5) == "echo"
+    assert gate.classify(350.0, 0.5) == "user"
+
+
+def test_unknown_reference_is_echo():
+    monitor = PlaybackMonitor()
+    monitor.started(None, at=0.0)   # pyttsx3: playing, but we never see the audio
+    gate = EchoGate(monitor)
+    assert gate.classify(30000.0, 0.5) == "echo"
+    monitor.finished(at=1.0)
+    assert gate.classify(30000.0, 1.0 + ECHO_TAIL + 0.01) == "clean"
+
+
+def test_echo_gain_learning(gate):
+    gate.classify(1500.0, 10.5, learn=False)
+    assert gate.echo_gain == 0.5
+    gate.classify(1500.0, 10.5)
+    assert 0.5 < gate.echo_gain < 0.75
+    learned = gate.echo_gain
+    gate.classify(5000.0, 10.5)   # the user: not echo, teaches nothing
+    assert gate.echo_gain == learned
+
+
+def test_filter_zeroes_echo_frames(gate):
+    frame = gate.frame_bytes
+    loud = tone(0.03, 4243)     # RMS ~3000: user
+    quiet = tone(0.03, 707)     # RMS ~500: echo
+    out, user = gate.filter(quiet + loud, 10.5, learn=False)
+    assert user == 1
+    assert out[:frame] == bytes(frame)
+    assert out[frame:] == loud
+    assert gate.stats()["frames_suppressed"] == 1
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from face_index import FaceIndex
+
+# -----------------------------------------
+# FaceIndex: name separators and half-finished enrollments
+# -----------------------------------------
+DIM = 4
+
+
+def face(i):
+    return np.full(DIM, i, dtype=np.float32)
+
+
+@pytest.fixture
+def index(tmp_path):
+    return FaceIndex(str(tmp_path), dim=DIM)
+
+
+def append(path, data):
+    with open(path, "ab") as f:
+        f.write(data)
+
+
+def test_add_and_match(index):
+    assert index.add_many(["ada", "obi"], [face(0), face(5)]) == [0, 1]
+    assert index.add("ngozi", face(9)) == 2
+    assert index.match(face(5.1)) == "obi"
+    assert [name for name, _, _ in index.top_k(face(8), 2)] == ["ngozi", "obi"]
+
+
+@pytest.mark.parametrize("name", ["ada\nobi", "ada\robi", "ada\r\n", "ada\x85", "ada\u2028obi"])
+def test_line_breaks_in_names_are_rejected(index, name):
+    with pytest.raises(ValueError):
+        index.add(name, face(1))
+    assert len(index) == 0
+
+
+def test_other_separators_on_disk_do_not_shift_rows(index, tmp_path):
+    # A names.txt edited by hand: \r and \u2028 are part of the name, not line ends
+    append(index.vectors_path, np.stack([face(1), face(2)]).tobytes())
+    append(index.names_path, "ada\r\nobi\u2028x\n".encode("utf-8"))
+    index.refresh()
+    assert index.names == ["ada\r", "obi\u2028x"]
+    assert index.match(face(2)) == "obi\u2028x"
+    assert len(FaceIndex(str(tmp_path), dim=DIM)) == 2
+
+
+def test_orphan_row_is_ignored_then_replaced(index, tmp_path):
+    index.add("ada", face(1))
+    append(index.vectors_path, face(7).tobytes())   # crashed before its name was written
+    assert len(FaceIndex(str(tmp_path), dim=DIM)) == 1
+    assert index.add("obi", face(2)) == 1
+    assert index.match(face(2)) == "obi"
+    assert index.match(face(7)) is None
+
+
+def test_half_written_name_waits_for_its_newline(index):
+    index.add("ada", face(1))
+    append(index.vectors_path, face(2).tobytes())
+    append(index.names_path, b"ob")
+    index.refresh()
+    assert index.names == ["ada"]
+    append(index.names_path, b"i\n")
+    index.refresh()
+    assert index.names == ["ada", "obi"]
+    assert index.match(face(2)) == "obi"
+
+
+def test_name_before_its_row_waits_for_the_row(index):
+    # Another process mid-write: a torn row must not be read as a face
+    index.add("ada", face(1))
+    append(index.names_path, b"obi\n")
+    append(index.vectors_path, face(2).tobytes()[:DIM * 2])
+    index.refresh()
+    assert index.names == ["ada"]
+    append(index.vectors_path, face(2).tobytes()[DIM * 2:])
+    index.refresh()
+    assert index.names == ["ada", "obi"]
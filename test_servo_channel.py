@@ -0,0 +1,88 @@
+import time
+
+import pytest
+
+from servo_channel import ServoChannel, decode_binary, encode_binary, encode_text
+
+# -----------------------------------------
+# ServoChannel framing, end to end through FakeArduino's parser
+# -----------------------------------------
+serial = pytest.importorskip("serial")
+fake_arduino = pytest.importorskip("fake_arduino")
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_text_frame():
+    assert encode_text({"pan": 92, "tilt": 90.7}) == b"pan:92\ntilt:90\n"
+
+
+def test_binary_round_trip():
+    frame = encode_binary({"pan": 92, "tilt": 0, "mouth": 180})
+    assert decode_binary(frame) == ([{"pan": 92, "tilt": 0, "mouth": 180}], len(frame), 0)
+
+
+def test_binary_angles_are_clamped():
+    frames, _, _ = decode_binary(encode_binary({"pan": -5, "tilt": 250}))
+    assert frames == [{"pan": 0, "tilt": 180}]
+
+
+def test_binary_partial_frame_is_kept_for_later():
+    frame = encode_binary({"pan": 10, "tilt": 20})
+    buf = b"noise" + frame + frame[:4]
+    frames, used, bad = decode_binary(buf)
+    assert frames == [{"pan": 10, "tilt": 20}] and bad == 0
+    assert decode_binary(buf[used:] + frame[4:])[0] == [{"pan": 10, "tilt": 20}]
+
+
+def test_binary_bad_checksum_is_skipped():
+    good = encode_binary({"mouth": 120})
+    corrupt = good[:-1] + bytes([good[-1] ^ 0xFF])
+    frames, used, bad = decode_binary(corrupt + good)
+    assert frames == [{"mouth": 120}]
+    assert bad == 1 and used == len(corrupt + good)
+
+
+@pytest.mark.parametrize("framing", ["text", "binary"])
+def test_channel_round_trip(framing):
+    fake = fake_arduino.FakeArduino(framing).start()
+    port = serial.Serial(fake.port, 9600, timeout=1)
+    channel = ServoChannel(port, framing=framing).start()
+    try:
+        channel.set_many({"pan": 80, "tilt": 95})
+        channel.set("mouth", 120)
+        channel.set("pan", 100)
+        want = {"pan": 100, "tilt": 95, "mouth": 120}
+        assert wait_for(lambda: fake.angles == want), fake.angles
+        assert fake.bad_frames == 0
+    finally:
+        channel.stop()
+        port.close()
+        fake.stop()
+
+
+def test_unchanged_angles_are_not_resent():
+    class Port:
+        def __init__(self):
+            self.writes = []
+
+        def write(self, data):
+            self.writes.append(data)
+
+    port = Port()
+    channel = ServoChannel(port, min_delta=2).start()
+    try:
+        channel.set("pan", 90)
+        assert wait_for(lambda: channel.frames == 1)
+        channel.set("pan", 91)
+        channel.set("pan", 90)
+        time.sleep(0.05)
+    finally:
+        channel.stop()
+    assert port.writes == [b"pan:90\n"]
+    assert channel.stats()["dropped"] == 2
@@ -0,0 +1,139 @@
+import threading
+
+import pytest
+
+from speech_worker import LOW, NORMAL, URGENT, SpeechWorker
+
+# -----------------------------------------
+# SpeechWorker with a fake engine that talks until interrupted
+# -----------------------------------------
+
+
+class FakeEngine:
+    def __init__(self):
+        self.said = []
+        self.started = threading.Event()
+        self.release = threading.Event()   # set to let the current utterance end normally
+        self.worker = None
+
+    def say(self, text, lang):
+        self.said.append(text)
+        self.started.set()
+        while not self.release.is_set() and not self.worker.interrupt.is_set():
+            self.release.wait(0.005)
+
+    def wait_started(self):
+        assert self.started.wait(2.0)
+        self.started.clear()
+
+
+@pytest.fixture
+def engine():
+    return FakeEngine()
+
+
+@pytest.fixture
+def worker(engine):
+    worker = SpeechWorker(engine.say).start()
+    engine.worker = worker
+    yield worker
+    engine.release.set()
+    worker.stop()
+
+
+def test_higher_priority_first_then_in_order(worker, engine):
+    first = worker.speak("first", "en", URGENT)   # nothing below preempts it
+    engine.wait_started()
+    low = worker.speak("low", "en", LOW)
+    normal_a = worker.speak("normal a", "en", NORMAL)
+    normal_b = worker.speak("normal b", "en", NORMAL)
+    engine.release.set()
+    assert worker.wait_idle(2.0)
+    assert engine.said == ["first", "normal a", "normal b", "low"]
+    assert [h.result() for h in (first, low, normal_a, normal_b)] == ["done"] * 4
+
+
+def test_urgent_preempts_and_is_not_resumed(worker, engine):
+    reply = worker.speak("a long reply", "en", NORMAL)
+    engine.wait_started()
+    alarm = worker.speak("battery low", "en", URGENT)
+    assert reply.result(2.0) == "preempted"
+    engine.wait_started()
+    engine.release.set()
+    assert alarm.result(2.0) == "done"
+    assert engine.said == ["a long reply", "battery low"]
+    assert worker.counts["preempted"] == 1
+
+
+def test_equal_priority_does_not_preempt(worker, engine):
+    reply = worker.speak("reply", "en", NORMAL)
+    engine.wait_started()
+    worker.speak("next", "en", NORMAL)
+    assert not reply.wait(0.05)
+    engine.release.set()
+    assert reply.result(2.0) == "done"
+
+
+def test_duplicates_coalesce(worker, engine):
+    playing = worker.speak("hello", "en")
+    engine.wait_started()
+    queued = worker.speak("the time is four", "en", LOW)
+    assert worker.speak("hello", "en") is playing
+    assert worker.speak("the time is four", "en", LOW) is queued
+    assert worker.speak("the time is four", "ig", LOW) is not queued
+    assert worker.counts["coalesced"] == 2
+    engine.release.set()
+    assert worker.wait_idle(2.0)
+    assert engine.said.count("the time is four") == 2   # once per language
+
+
+def test_coalesced_duplicate_raises_priority(worker, engine):
+    worker.speak("first", "en", NORMAL)
+    engine.wait_started()
+    chatter = worker.speak("chatter", "en", LOW)
+    reply = worker.speak("reply", "en", NORMAL)
+    assert worker.speak("chatter", "en", NORMAL) is chatter
+    assert chatter.priority == NORMAL
+    engine.release.set()
+    assert worker.wait_idle(2.0)
+    assert engine.said == ["first", "chatter", "reply"]
+    assert reply.result() == "done"
+
+
+def test_cancel_queued_and_playing(worker, engine):
+    playing = worker.speak("playing", "en")
+    engine.wait_started()
+    queued = worker.speak("queued", "en")
+    assert queued.cancel()
+    assert playing.cancel()
+    assert playing.result(2.0) == "cancelled" and queued.result() == "cancelled"
+    assert not queued.cancel()
+    assert worker.wait_idle(2.0)
+    assert engine.said == ["playing"]
+
+
+def test_external_interrupt_drops_queue_below_urgent(worker, engine):
+    reply = worker.speak("reply", "en", NORMAL)
+    engine.wait_started()
+    later = worker.speak("later", "en", NORMAL)
+    alarm = worker.speak("alarm", "en", URGENT)
+    assert reply.result(2.0) == "preempted"
+    engine.wait_started()
+    worker.speak("after the alarm", "en", URGENT)
+    worker.interrupt.set()   # barge-in: the user talks over the alarm
+    assert alarm.result(2.0) == "interrupted"
+    assert later.result(2.0) == "cancelled"
+    engine.release.set()
+    assert worker.wait_idle(2.0)
+    assert engine.said == ["reply", "alarm", "after the alarm"]
+
+
+def test_failed_say_is_reported(worker, engine):
+    def broken(text, lang):
+        raise RuntimeError("no audio device")
+
+    worker.say = broken
+    handle = worker.speak("hello", "en")
+    with pytest.raises(RuntimeError):
+        handle.result(2.0)
+    assert handle.status == "failed"
@@ -0,0 +1,174 @@
+import os
+import signal
+import sys
+import time
+
+import pytest
+
+import supervisor
+from supervisor import Service, Supervisor
+
+# -----------------------------------------
+# Supervisor tests with dummy children ("python3 -c ...")
+# -----------------------------------------
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+CRASH = """
+import sys, time
+time.sleep(0.1)
+with open(sys.argv[1], "w") as f:
+    f.write(repr(time.time()))
+raise SystemExit(3)
+"""
+
+# Exits at once for the first three runs, then lives past stable_after
+FLAKY = """
+import os, sys, time
+path = sys.argv[1]
+runs = int(open(path).read()) + 1 if os.path.exists(path) else 1
+with open(path, "w") as f:
+    f.write(str(runs))
+if runs > 3:
+    time.sleep(0.6)
+raise SystemExit(1)
+"""
+
+HANGS = """
+import signal, sys, time, supervisor
+if sys.argv[1] == "ignore-term":
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+supervisor.notify_ready()
+for _ in range(3):
+    supervisor.heartbeat(); time.sleep(0.1)
+time.sleep(3600)  # stuck: heartbeats stop
+"""
+
+LEGACY = """
+import time
+time.sleep(3)  # never beats
+"""
+
+READY_THEN_CRASH = """
+import time, supervisor
+time.sleep(0.2); supervisor.notify_ready()
+time.sleep(0.1)
+raise SystemExit(3)
+"""
+
+
+def child(code, *args, **kwargs):
+    kwargs.setdefault("backoff_base", 0.05)
+    return Service("child", [sys.executable, "-c", code, *args],
+                   env={"PYTHONPATH": HERE}, **kwargs)
+
+
+def run_until(sup, done, timeout, max_wait=0.05):
+    end = time.monotonic() + timeout
+    while not done():
+        assert time.monotonic() < end, f"timed out: {sup.stats()}"
+        sup.run_once(max_wait)
+
+
+@pytest.fixture
+def supervise():
+    sups = []
+
+    def make(service, use_pidfd=True):
+        sup = Supervisor([service])
+        if not use_pidfd:
+            sup._use_pidfd = False
+        sups.append(sup)
+        return sup.start()
+
+    yield make
+    for sup in sups:
+        sup.stop_all(grace=1.0)
+
+
+@pytest.fixture
+def no_jitter(monkeypatch):
+    monkeypatch.setattr(supervisor.random, "uniform", lambda lo, hi: hi)
+
+
+@pytest.fixture
+def backoffs(monkeypatch):
+    delays = []
+    backoff = Service.backoff
+
+    def spy(self):
+        delays.append(backoff(self))
+        return delays[-1]
+
+    monkeypatch.setattr(Service, "backoff", spy)
+    return delays
+
+
+@pytest.mark.parametrize("use_pidfd", [True, False], ids=["pidfd", "waiter-thread"])
+def test_crash_detected_promptly(supervise, tmp_path, use_pidfd):
+    if use_pidfd and not hasattr(os, "pidfd_open"):
+        pytest.skip("no pidfd on this platform")
+    exited = tmp_path / "exited"
+    service = child(CRASH, str(exited), backoff_base=10.0)
+    sup = supervise(service, use_pidfd)
+    # Nothing else is due, so only the exit notification can end the waits early
+    run_until(sup, lambda: service.last_exit is not None, timeout=4.0, max_wait=5.0)
+    lag = time.time() - float(exited.read_text())
+    assert service.last_exit == 3
+    assert service.state == "backoff"
+    assert lag < 0.5
+    assert sup._use_pidfd == use_pidfd
+
+
+def test_backoff_grows_then_resets_after_stable_run(supervise, tmp_path, no_jitter, backoffs):
+    service = child(FLAKY, str(tmp_path / "runs"), backoff_max=10.0, stable_after=0.4)
+    sup = supervise(service)
+    run_until(sup, lambda: len(backoffs) >= 4, timeout=10.0)
+    assert backoffs[:3] == pytest.approx([0.05, 0.1, 0.2])
+    # The fourth run outlived stable_after, so the backoff started over
+    assert service.failures == 1
+    assert backoffs[3] == pytest.approx(0.05)
+
+
+def test_backoff_is_capped_and_jittered():
+    service = Service("child", ["true"], backoff_base=1.0, backoff_max=4.0)
+    service.failures = 10
+    delays = [service.backoff() for _ in range(100)]
+    assert all(2.0 <= d <= 4.0 for d in delays)
+    assert len(set(delays)) > 1
+
+
+@pytest.mark.parametrize("mode,signum", [("sleep", signal.SIGTERM),
+                                         ("ignore-term", signal.SIGKILL)])
+def test_hung_child_is_stopped_and_restarted(supervise, monkeypatch, mode, signum):
+    monkeypatch.setattr(supervisor, "STOP_GRACE", 0.3)
+    service = child(HANGS, mode, heartbeat_timeout=0.5, start_timeout=5.0)
+    sup = supervise(service)
+    run_until(sup, lambda: service.state == "ready", timeout=5.0)
+    ready = time.monotonic()
+    run_until(sup, lambda: service.restarts >= 1, timeout=5.0)
+    # 3 beats 0.1 s apart, then quiet for heartbeat_timeout before the SIGTERM
+    assert time.monotonic() - ready >= 0.7
+    assert service.last_exit == -signum
+    assert service.time_to_ready is not None
+
+
+def test_legacy_child_without_heartbeats_is_left_alone(supervise):
+    service = child(LEGACY)
+    sup = supervise(service)
+    pid = service.proc.pid
+    run_until(sup, lambda: time.monotonic() - service.started_at >= 1.0, timeout=3.0)
+    assert service.state == "running"
+    assert service.proc is not None and service.proc.pid == pid
+    assert service.proc.poll() is None
+    assert service.restarts == 0
+    assert service.last_beat is None
+
+
+def test_stats_report_restarts_exit_and_ready_time(supervise):
+    service = child(READY_THEN_CRASH)
+    sup = supervise(service)
+    run_until(sup, lambda: service.restarts >= 2, timeout=10.0)
+    stats = sup.stats()["child"]
+    assert stats["restarts"] >= 2
+    assert stats["last_exit"] == 3
+    assert 0.15 <= stats["time_to_ready_s"] < 2.0
@@ -0,0 +1,301 @@
+import atexit
+import logging
+import os
+import struct
+import threading
+import time
+from collections import deque
+
+# -----------------------------------------
+# Per-interaction latency tracing
+#
+# Stage timings (wake, asr, match, tts, first_audio, ...) are recorded as
+# spans tagged with one interaction id: monotonic start + duration, kept
+# in an in-memory ring and appended to a compact binary trace file.
+#
+#   from tracing import tracer
+#   tracer.begin(at)                   # new interaction (e.g. on wake)
+#   tracer.record("wake", latency)     # already-measured duration
+#   tracer.heard(at)                   # user stopped talking (audio time)
+#   with tracer.span("tts"):
+#       ...
+#   tracer.since_heard("first_audio")  # once per interaction
+#
+# SONNY_TRACE=0 turns it off: span() then hands back one shared no-op
+# context manager and the other calls return straight away (a disabled
+# span costs a few hundred ns; "python3 tracing.py overhead" measures it).
+#
+# Trace file: a stream of records, each starting with a type byte
+#   b"B" <wall clock f64>                       -- a process starts writing
+#   b"S" <stage id u8> <name len u8> <name>     -- first use of a stage
+#   b"P" <interaction u32> <stage id u8> <start f64> <duration f32>
+# Interaction ids and stage ids are per run (B record), so several runs
+# can append to one file; rotated files start with a fresh B header.
+#
+# CLI:  python3 tracing.py summary [trace] [--last N] [--json]
+#       python3 tracing.py overhead
+# -----------------------------------------
+TRACE_ENV = "SONNY_TRACE"
+TRACE_FILE_ENV = "SONNY_TRACE_FILE"
+DEFAULT_TRACE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "traces", "sonny.trace")
+RING_SIZE = 4096
+FLUSH_BYTES = 4096          # write the pending buffer once it grows this big
+MAX_TRACE_BYTES = 16 * 1024 * 1024  # then rotate to <trace>.1
+
+SPAN = struct.Struct("<IBdf")
+RUN = struct.Struct("<d")
+PERCENTILES = (50, 95, 99)
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NO_SPAN = _NoSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "stage", "interaction", "start")
+
+    def __init__(self, tracer, stage, interaction):
+        self.tracer = tracer
+        self.stage = stage
+        self.interaction = interaction
+
+    def __enter__(self):
+        self.start = time.monotonic()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.monotonic()
+        self.tracer._add(self.interaction, self.stage, self.start, end - self.start)
+        return False
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def stage_summary(spans):
+    """{stage: {count, p50_ms, p95_ms, p99_ms, max_ms}} from (interaction, stage, start, duration)."""
+    by_stage = {}
+    for _, stage, _, duration in spans:
+        by_stage.setdefault(stage, []).append(duration)
+    summary = {}
+    for stage, durations in by_stage.items():
+        row = {"count": len(durations)}
+        for p in PERCENTILES:
+            row[f"p{p}_ms"] = round(percentile(durations, p) * 1000, 2)
+        row["max_ms"] = round(max(durations) * 1000, 2)
+        summary[stage] = row
+    return summary
+
+
+class Tracer:
+    def __init__(self, enabled=True, path=None, capacity=RING_SIZE):
+        self.enabled = enabled
+        self.path = path
+        self.ring = deque(maxlen=capacity)   # (interaction, stage, start, duration)
+        self.interaction = 0
+        self.heard_at = None
+        self._milestones = set()   # stages already recorded by since_heard() this interaction
+        self._stage_ids = {}
+        self._declared = None      # stage ids already written to the current file
+        self._pending = bytearray()
+        self._lock = threading.Lock()
+        if path:
+            atexit.register(self.flush)
+
+    def begin(self, at=None):
+        """Start a new interaction; ``at`` (monotonic) backdates it, e.g. to the wake audio."""
+        if not self.enabled:
+            return 0
+        self.interaction += 1
+        self._milestones = set()
+        self.heard(at)
+        return self.interaction
+
+    def heard(self, at=None):
+        """The user finished speaking at ``at``; since_heard() measures from here."""
+        if self.enabled:
+            self.heard_at = time.monotonic() if at is None else at
+
+    def span(self, stage):
+        if not self.enabled:
+            return NO_SPAN
+        return _Span(self, stage, self.interaction)
+
+    def record(self, stage, duration, start=None):
+        if not self.enabled:
+            return
+        if start is None:
+            start = time.monotonic() - duration
+        self._add(self.interaction, stage, start, duration)
+
+    def since_heard(self, stage):
+        """Record heard() -> now as ``stage``, once per interaction (e.g. first audio out)."""
+        if not self.enabled or self.heard_at is None or stage in self._milestones:
+            return
+        self._milestones.add(stage)
+        self._add(self.interaction, stage, self.heard_at, time.monotonic() - self.heard_at)
+
+    def summary(self):
+        with self._lock:
+            spans = list(self.ring)
+        return stage_summary(spans)
+
+    def flush(self):
+        if not self.path:
+            return
+        with self._lock:
+            self._write()
+
+    # -- internals --
+    def _add(self, interaction, stage, start, duration):
+        with self._lock:
+            self.ring.append((interaction, stage, start, duration))
+            if not self.path:
+                return
+            if self._declared is None:
+                self._pending += self._header()
+            sid = self._stage_ids.get(stage)
+            if sid is None:
+                sid = self._stage_ids[stage] = len(self._stage_ids) % 256
+            if sid not in self._declared:
+                self._pending += self._declare(stage, sid)
+            self._pending += b"P" + SPAN.pack(interaction, sid, start, duration)
+            if len(self._pending) >= FLUSH_BYTES:
+                self._write()
+
+    def _declare(self, stage, sid):
+        self._declared.add(sid)
+        name = stage.encode("utf-8")[:255]
+        return b"S" + bytes([sid, len(name)]) + name
+
+    def _header(self):
+        self._declared = set()
+        header = bytearray(b"B" + RUN.pack(time.time()))
+        for stage, sid in self._stage_ids.items():
+            header += self._declare(stage, sid)
+        return header
+
+    def _write(self):
+        if not self._pending:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            if os.path.exists(self.path) and os.path.getsize(self.path) > MAX_TRACE_BYTES:
+                os.replace(self.path, self.path + ".1")
+                self._pending[:0] = self._header()
+            with open(self.path, "ab") as f:
+                f.write(self._pending)
+        except OSError as e:
+            logging.warning(f"Trace write failed: {e}; tracing to memory only")
+            self.path = None
+        self._pending.clear()
+
+
+def read_trace(path):
+    """[((run, interaction), stage, start, duration), ...] from a trace file."""
+    with open(path, "rb") as f:
+        data = f.read()
+    names, spans, run, i = {}, [], 0, 0
+    while i < len(data):
+        kind = data[i:i + 1]
+        if kind == b"B" and i + 1 + RUN.size <= len(data):
+            run += 1
+            names = {}
+            i += 1 + RUN.size
+        elif kind == b"S" and i + 3 <= len(data):
+            sid, n = data[i + 1], data[i + 2]
+            names[sid] = data[i + 3:i + 3 + n].decode("utf-8", errors="replace")
+            i += 3 + n
+        elif kind == b"P" and i + 1 + SPAN.size <= len(data):
+            interaction, sid, start, duration = SPAN.unpack_from(data, i + 1)
+            spans.append(((run, interaction), names.get(sid, f"stage{sid}"), start, duration))
+            i += 1 + SPAN.size
+        else:
+            break  # truncated tail from a crash mid-write
+    return spans
+
+
+def _default_tracer():
+    enabled = os.environ.get(TRACE_ENV, "1").lower() not in ("0", "false", "off", "")
+    path = os.environ.get(TRACE_FILE_ENV, DEFAULT_TRACE_FILE) if enabled else None
+    return Tracer(enabled, path)
+
+
+# Shared by every module in the process
+tracer = _default_tracer()
+
+
+# -----------------------------------------
+# CLI
+# -----------------------------------------
+def _print_summary(spans, last, as_json):
+    import json
+
+    summary = stage_summary(spans)
+    interactions = {}
+    for interaction, stage, _, duration in spans:
+        interactions.setdefault(interaction, {})[stage] = round(duration * 1000, 1)
+    recent = [{"interaction": ".".join(map(str, k)) if isinstance(k, tuple) else k, **v}
+              for k, v in sorted(interactions.items())[-last:]] if last else []
+    if as_json:
+        print(json.dumps({"interactions": len(interactions), "stages": summary, "recent": recent}, indent=2))
+        return
+    print(f"{len(spans)} spans, {len(interactions)} interactions")
+    print(f"{'stage':<14}{'count':>7}" + "".join(f"{f'p{p} ms':>10}" for p in PERCENTILES) + f"{'max ms':>10}")
+    for stage, row in sorted(summary.items(), key=lambda kv: -kv[1]["p50_ms"]):
+        print(f"{stage:<14}{row['count']:>7}" + "".join(f"{row[f'p{p}_ms']:>10.1f}" for p in PERCENTILES)
+              + f"{row['max_ms']:>10.1f}")
+    for row in recent:
+        stages = ", ".join(f"{k} {v} ms" for k, v in row.items() if k != "interaction")
+        print(f"#{row['interaction']}: {stages}")
+
+
+def _overhead(n=200000):
+    results = {}
+    for label, t in (("disabled", Tracer(enabled=False)), ("memory", Tracer()),
+                     ("file", Tracer(path=os.devnull))):
+        start = time.perf_counter()
+        for _ in range(n):
+            with t.span("stage"):
+                pass
+        results[label] = round((time.perf_counter() - start) / n * 1e9)
+    start = time.perf_counter()
+    for _ in range(n):
+        pass
+    results["empty loop"] = round((time.perf_counter() - start) / n * 1e9)
+    for label, ns in results.items():
+        print(f"{label:<12}{ns:>7} ns/span")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Summarize Sonny latency traces")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("summary", help="per-stage p50/p95/p99 from a trace file")
+    s.add_argument("trace", nargs="?", default=os.environ.get(TRACE_FILE_ENV, DEFAULT_TRACE_FILE))
+    s.add_argument("--last", type=int, default=5, help="also show the last N interactions")
+    s.add_argument("--json", action="store_true")
+    sub.add_parser("overhead", help="cost of one span, enabled vs disabled")
+    args = ap.parse_args()
+
+    if args.cmd == "overhead":
+        _overhead()
+    else:
+        spans = read_trace(args.trace)
+        if os.path.exists(args.trace + ".1") and not spans:
+            spans = read_trace(args.trace + ".1")
+        _print_summary(spans, args.last, args.json)
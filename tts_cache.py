@@ -0,0 +1,126 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from speech_synth import Pcm, Phoneme
+
+# -----------------------------------------
+# Content-addressed cache of synthesized speech
+#
+# Key = hash of (text, lang, voice, rate). Each entry is raw PCM
+# (<key>.pcm) plus a JSON sidecar (<key>.json) holding the audio format,
+# the precomputed lip-sync envelope and espeak-ng phoneme timings (if any). Least-recently-played entries
+# are evicted once the cache grows past max_bytes. Recency is kept in
+# memory; a hit rewrites the sidecar's mtime (what survives restarts)
+# at most once per TOUCH_INTERVAL, not on every reply -- the cache lives
+# on the Pi's SD card.
+# -----------------------------------------
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tts_cache")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+TOUCH_INTERVAL = 3600.0  # s; min time between on-disk recency updates of one entry
+
+
+class SpeechCache:
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._used = {}   # key -> time.time() of the last hit in this process
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def key(text, lang, voice, rate):
+        raw = json.dumps([text, lang, voice, rate], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+    def _paths(self, key):
+        base = os.path.join(self.root, key)
+        return base + ".pcm", base + ".json"
+
+    def get(self, text, lang, voice, rate):
+        """Return (Pcm, envelope, phonemes) or None."""
+        key = self.key(text, lang, voice, rate)
+        pcm_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+                stored = os.fstat(f.fileno()).st_mtime
+            with open(pcm_path, "rb") as f:
+                data = f.read()
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        now = time.time()
+        with self._lock:
+            self.hits += 1
+            self._used[key] = now
+        if now - stored >= TOUCH_INTERVAL:
+            try:
+                os.utime(meta_path)
+            except OSError:
+                pass
+        phonemes = [Phoneme(*p) for p in meta.get("phonemes", ())]
+        return Pcm(data, meta["rate"], meta["channels"], meta["width"]), meta["envelope"], phonemes
+
+    def put(self, text, lang, voice, rate, pcm, envelope, phonemes=()):
+        key = self.key(text, lang, voice, rate)
+        pcm_path, meta_path = self._paths(key)
+        meta = {
+            "text": text, "lang": lang, "voice": voice, "speech_rate": rate,
+            "rate": pcm.rate, "channels": pcm.channels, "width": pcm.width,
+            "envelope": envelope,
+            "phonemes": [list(p) for p in phonemes],
+        }
+        with self._lock:
+            # Write-then-rename so a reader never sees half a file; the
+            # sidecar lands last, so its presence means the entry is complete
+            self._write_atomic(pcm_path, pcm.data)
+            self._write_atomic(meta_path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+            self.evict()
+
+    @staticmethod
+    def _write_atomic(path, payload):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(payload)
+        os.replace(tmp, path)
+
+    def entries(self):
+        """[(last_used, size_bytes, key), ...] for every complete entry."""
+        out = []
+        for name in os.listdir(self.root):
+            if not name.endswith(".json"):
+                continue
+            key = name[:-5]
+            pcm_path, meta_path = self._paths(key)
+            try:
+                size = os.path.getsize(pcm_path) + os.path.getsize(meta_path)
+                last_used = max(os.path.getmtime(meta_path), self._used.get(key, 0.0))
+                out.append((last_used, size, key))
+            except OSError:
+                continue
+        return out
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._used.pop(key, None)
+            total -= size
+            logging.info(f"TTS cache evicted {key} ({size} bytes)")
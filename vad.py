@@ -0,0 +1,129 @@
+from collections import deque
+
+import numpy as np
+
+from audio_capture import SAMPLE_RATE
+
+# -----------------------------------------
+# Energy VAD gate in front of Vosk
+#
+# Splits PCM into short frames and only forwards speech (plus a short
+# pre-roll so the first syllable survives, and a hangover so Vosk still
+# sees the trailing silence it needs to endpoint). Silent rooms cost a
+# NumPy RMS per frame instead of a Kaldi decode.
+# -----------------------------------------
+
+
+class EnergyVAD:
+    def __init__(self, rate=SAMPLE_RATE, frame_ms=30, min_rms=300.0,
+                 noise_ratio=3.0, hangover_ms=600, preroll_ms=300,
+                 onset_frames=2, use_zcr=True, zcr_min=0.25):
+        self.rate = rate
+        self.frame_samples = int(rate * frame_ms / 1000)
+        self.frame_bytes = self.frame_samples * 2
+        # Speech if RMS > max(min_rms, noise_floor * noise_ratio)
+        self.min_rms = min_rms
+        self.noise_ratio = noise_ratio
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.onset_frames = max(1, onset_frames)
+        # Unvoiced sounds ("s" in "sonny") are quiet but noisy: accept a
+        # half-threshold frame when its zero-crossing rate is high
+        self.use_zcr = use_zcr
+        self.zcr_min = zcr_min
+
+        self._preroll = deque(maxlen=max(1, preroll_ms // frame_ms))
+        self._pending = b""
+        self.noise_floor = min_rms / noise_ratio
+        self.in_speech = False
+        self._hang = 0
+        self._onset = 0
+
+        # counters
+        self.frames_total = 0
+        self.frames_forwarded = 0
+        self.segments = 0
+
+    @property
+    def frames_skipped(self):
+        return self.frames_total - self.frames_forwarded
+
+    @property
+    def threshold(self):
+        return max(self.min_rms, self.noise_floor * self.noise_ratio)
+
+    def reset(self):
+        self._preroll.clear()
+        self._pending = b""
+        self.in_speech = False
+        self._hang = 0
+        self._onset = 0
+
+    def stats(self):
+        return {
+            "frames_total": self.frames_total,
+            "frames_forwarded": self.frames_forwarded,
+            "frames_skipped": self.frames_skipped,
+            "segments": self.segments,
+            "noise_floor": round(self.noise_floor, 1),
+            "threshold": round(self.threshold, 1),
+        }
+
+    def _frame_is_speech(self, rms, zcr):
+        threshold = self.threshold
+        if rms > threshold:
+            return True
+        return self.use_zcr and rms > threshold * 0.5 and zcr > self.zcr_min
+
+    def process(self, data):
+        """Feed PCM, return the bytes that should go to the recognizer (may be b"")."""
+        buf = self._pending + bytes(data)
+        n_frames = len(buf) // self.frame_bytes
+        self._pending = buf[n_frames * self.frame_bytes:]
+        if not n_frames:
+            return b""
+
+        samples = np.frombuffer(buf, dtype=np.int16, count=n_frames * self.frame_samples)
+        frames = samples.reshape(n_frames, self.frame_samples).astype(np.float32)
+        rms = np.sqrt(np.mean(frames * frames, axis=1))
+        if self.use_zcr:
+            signs = np.signbit(frames)
+            zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / self.frame_samples
+        else:
+            zcr = np.zeros(n_frames)
+
+        out = []
+        self.frames_total += n_frames
+        for i in range(n_frames):
+            frame = buf[i * self.frame_bytes:(i + 1) * self.frame_bytes]
+            speech = self._frame_is_speech(rms[i], zcr[i])
+            if self.in_speech:
+                out.append(frame)
+                self.frames_forwarded += 1
+                if speech:
+                    self._hang = self.hangover_frames
+                else:
+                    self._hang -= 1
+                    if self._hang <= 0:
+                        self.in_speech = False
+                continue
+
+            if speech:
+                self._onset += 1
+            else:
+                self._onset = 0
+                # Track the room's noise level only while nobody is talking
+                self.noise_floor = 0.95 * self.noise_floor + 0.05 * float(rms[i])
+
+            if self._onset >= self.onset_frames:
+                self.in_speech = True
+                self.segments += 1
+                self._hang = self.hangover_frames
+                self._onset = 0
+                out.extend(self._preroll)
+                self.frames_forwarded += len(self._preroll)
+                self._preroll.clear()
+                out.append(frame)
+                self.frames_forwarded += 1
+            else:
+                self._preroll.append(frame)
+        return b"".join(out)
@@ -0,0 +1,382 @@
+import logging
+import os
+import threading
+import time
+
+import cv2
+
+# -----------------------------------------
+# Face tracking front end
+#
+# FrameGrabber: one thread drains the camera so its driver queue never
+# fills up; the tracker always gets the newest frame, never a stale
+# buffered one.
+#
+# FaceDetector: Haar cascade on a downscaled grayscale copy. After a hit
+# it only searches a region of interest (ROI) around the last face, with
+# a full-frame sweep every FULL_SWEEP_EVERY frames (and whenever the ROI
+# comes up empty) so new or fast-moving faces are still found.
+# Coordinates are always returned in full-resolution pixels.
+#
+# FaceFollower: detect-then-track. Once the cascade finds a face, a cheap
+# tracker (template matching by default, MOSSE/KCF with opencv-contrib)
+# follows it; the cascade only runs every detect_every frames or when the
+# tracker loses confidence. detect_every stretches when the CPU is busy
+# and shrinks again when it is idle.
+# -----------------------------------------
+DETECT_WIDTH = 320         # detection runs at this width; faces at a few metres still fit
+HAAR_SCALE_FACTOR = 1.2
+HAAR_MIN_NEIGHBORS = 5
+ROI_MARGIN = 0.75          # grow the last face box by this much of its size on each side
+FULL_SWEEP_EVERY = 10
+
+DETECT_EVERY = 10          # frames between cascade runs while a face is tracked
+DETECT_EVERY_MIN = 3       # also how often to look while nobody is in view
+DETECT_EVERY_MAX = 30
+TRACK_MIN_SCORE = 0.6      # template match (normalized correlation) below this = lost
+TRACK_SEARCH_MARGIN = 0.5
+CPU_HIGH = 0.85            # busy fraction that stretches detect_every
+CPU_LOW = 0.5              # ... and that lets it shrink back
+LOAD_CHECK_SECONDS = 1.0
+
+
+def load_face_cascade():
+    return cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+
+
+def scale_box(box, scale):
+    return tuple(int(round(v / scale)) for v in box)
+
+
+class FrameGrabber:
+    """Keeps only the newest frame from ``cap`` (anything with cv2's ``read()``)."""
+
+    def __init__(self, cap, name="camera", max_failures=30):
+        self.cap = cap
+        self.name = name
+        self.max_failures = max_failures
+        self.grabbed = 0
+        self.read_failures = 0
+        self._frame = None
+        self._seq = 0
+        self._stamp = 0.0
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-grabber", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+
+    @property
+    def running(self):
+        return self._running
+
+    def latest(self, after_seq=0, timeout=1.0):
+        """Wait for a frame newer than ``after_seq``.
+
+        Returns (seq, monotonic time grabbed, frame), or None on timeout or
+        once the source has stopped.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > after_seq or not self._running, timeout)
+            if self._seq <= after_seq:
+                return None
+            return self._seq, self._stamp, self._frame
+
+    def _run(self):
+        failures = 0
+        while self._running:
+            ok, frame = self.cap.read()
+            if not ok:
+                self.read_failures += 1
+                failures += 1
+                if failures >= self.max_failures:
+                    logging.warning(f"{self.name}: {failures} failed reads in a row; grabber stopped")
+                    break
+                time.sleep(0.01)
+                continue
+            failures = 0
+            with self._cond:
+                self._frame = frame
+                self._seq += 1
+                self._stamp = time.monotonic()
+                self.grabbed += 1
+                self._cond.notify_all()
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+
+class FaceDetector:
+    def __init__(self, cascade=None, detect_width=DETECT_WIDTH, scale_factor=HAAR_SCALE_FACTOR,
+                 min_neighbors=HAAR_MIN_NEIGHBORS, roi_margin=ROI_MARGIN,
+                 full_sweep_every=FULL_SWEEP_EVERY):
+        self.cascade = cascade if cascade is not None else load_face_cascade()
+        self.detect_width = detect_width
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.roi_margin = roi_margin
+        self.full_sweep_every = full_sweep_every
+        self.last = None          # last face in detection (downscaled) pixels
+        self._since_sweep = 0
+
+        # counters
+        self.frames = 0
+        self.full_sweeps = 0
+        self.roi_searches = 0
+        self.roi_misses = 0
+        self.faces_found = 0
+        self.detect_seconds = 0.0
+
+    def reset(self):
+        self.last = None
+        self._since_sweep = 0
+
+    def _search(self, gray, min_size=(24, 24), max_size=(0, 0)):
+        faces = self.cascade.detectMultiScale(gray, self.scale_factor, self.min_neighbors,
+                                              minSize=min_size, maxSize=max_size)
+        if len(faces) == 0:
+            return None
+        # Largest face = nearest person
+        return tuple(int(v) for v in max(faces, key=lambda f: f[2] * f[3]))
+
+    def _search_roi(self, small):
+        x, y, w, h = self.last
+        mx, my = int(w * self.roi_margin), int(h * self.roi_margin)
+        x0, y0 = max(0, x - mx), max(0, y - my)
+        x1, y1 = min(small.shape[1], x + w + mx), min(small.shape[0], y + h + my)
+        # The same person won't halve or double in size between frames
+        lo = max(24, int(w * 0.6))
+        face = self._search(small[y0:y1, x0:x1], (lo, lo), (int(w * 1.6), int(w * 1.6)))
+        if face is None:
+            return None
+        fx, fy, fw, fh = face
+        return fx + x0, fy + y0, fw, fh
+
+    def downscale(self, frame):
+        """Grayscale copy at detect_width, plus the factor that produced it."""
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        scale = min(1.0, self.detect_width / gray.shape[1])
+        if scale < 1.0:
+            size = (self.detect_width, int(round(gray.shape[0] * scale)))
+            gray = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+        return gray, scale
+
+    def detect(self, frame):
+        """Return the face as (x, y, w, h) in ``frame`` pixels, or None."""
+        small, scale = self.downscale(frame)
+        face = self.detect_small(small)
+        return None if face is None else scale_box(face, scale)
+
+    def detect_small(self, small):
+        """Same as detect() on an already downscaled frame, in its pixels."""
+        start = time.perf_counter()
+        face = None
+        if self.last is not None and self._since_sweep < self.full_sweep_every:
+            self.roi_searches += 1
+            self._since_sweep += 1
+            face = self._search_roi(small)
+            if face is None:
+                self.roi_misses += 1
+        if face is None:
+            self.full_sweeps += 1
+            self._since_sweep = 0
+            face = self._search(small)
+
+        self.last = face
+        self.frames += 1
+        self.detect_seconds += time.perf_counter() - start
+        if face is not None:
+            self.faces_found += 1
+        return face
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "faces_found": self.faces_found,
+            "full_sweeps": self.full_sweeps,
+            "roi_searches": self.roi_searches,
+            "roi_misses": self.roi_misses,
+            "detect_ms_avg": round(self.detect_seconds / self.frames * 1000, 2) if self.frames else 0.0,
+        }
+
+
+# -----------------------------------------
+# Trackers: init(gray, box) then update(gray) -> (box or None, score)
+# -----------------------------------------
+class TemplateTracker:
+    """Normalized cross-correlation of the face patch in a window around its last position."""
+
+    def __init__(self, search_margin=TRACK_SEARCH_MARGIN, refresh_score=0.85):
+        self.search_margin = search_margin
+        self.refresh_score = refresh_score
+        self.template = None
+        self.box = None
+
+    def init(self, gray, box):
+        x, y, w, h = box
+        self.template = gray[y:y + h, x:x + w].copy()
+        self.box = box
+
+    def update(self, gray):
+        x, y, w, h = self.box
+        mx, my = int(w * self.search_margin), int(h * self.search_margin)
+        x0, y0 = max(0, x - mx), max(0, y - my)
+        x1, y1 = min(gray.shape[1], x + w + mx), min(gray.shape[0], y + h + my)
+        window = gray[y0:y1, x0:x1]
+        if window.shape[0] < h or window.shape[1] < w:
+            return None, 0.0
+        result = cv2.matchTemplate(window, self.template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (bx, by) = cv2.minMaxLoc(result)
+        self.box = (x0 + bx, y0 + by, w, h)
+        if score >= self.refresh_score:
+            # Follow slow changes (lighting, head turn); low-score frames
+            # keep the old patch so the tracker doesn't drift onto background
+            self.template = gray[self.box[1]:self.box[1] + h, self.box[0]:self.box[0] + w].copy()
+        return self.box, score
+
+
+class CvTracker:
+    """Wraps an OpenCV tracker factory (MOSSE, KCF, ...). They report only ok/lost."""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.tracker = None
+
+    def init(self, gray, box):
+        self.tracker = self.factory()
+        self.tracker.init(gray, tuple(int(v) for v in box))
+
+    def update(self, gray):
+        ok, box = self.tracker.update(gray)
+        if not ok:
+            return None, 0.0
+        return tuple(int(v) for v in box), 1.0
+
+
+def make_tracker(kind="template"):
+    if kind != "template":
+        name = {"mosse": "TrackerMOSSE_create", "kcf": "TrackerKCF_create"}.get(kind)
+        # MOSSE/KCF live in opencv-contrib (cv2.legacy on 4.5+)
+        for module in (getattr(cv2, "legacy", None), cv2):
+            factory = getattr(module, name, None) if module is not None and name else None
+            if factory:
+                return CvTracker(factory)
+        logging.warning(f"OpenCV tracker '{kind}' not available; using template matching")
+    return TemplateTracker()
+
+
+class CpuLoad:
+    """System-wide busy fraction since the previous sample (/proc/stat, else load average)."""
+
+    def __init__(self):
+        self._last = self._read()
+
+    @staticmethod
+    def _read():
+        try:
+            with open("/proc/stat") as f:
+                fields = [int(v) for v in f.readline().split()[1:]]
+        except (OSError, ValueError):
+            return None
+        idle = fields[3] + (fields[4] if len(fields) > 4 else 0)  # idle + iowait
+        return sum(fields), idle
+
+    def sample(self):
+        now = self._read()
+        if now is None or self._last is None:
+            try:
+                return min(1.0, os.getloadavg()[0] / (os.cpu_count() or 1))
+            except (OSError, AttributeError):
+                return 0.0
+        total, idle = now[0] - self._last[0], now[1] - self._last[1]
+        self._last = now
+        return 1.0 - idle / total if total > 0 else 0.0
+
+
+class FaceFollower:
+    def __init__(self, detector=None, tracker="template", detect_every=DETECT_EVERY,
+                 min_every=DETECT_EVERY_MIN, max_every=DETECT_EVERY_MAX,
+                 min_score=TRACK_MIN_SCORE, cpu=None):
+        self.detector = detector or FaceDetector()
+        self.tracker = make_tracker(tracker)
+        self.detect_every = detect_every
+        self.min_every = min_every
+        self.max_every = max_every
+        self.min_score = min_score
+        self.cpu = cpu or CpuLoad()
+        self.box = None           # current face in detector (downscaled) pixels
+        self.load = 0.0
+        self.last_score = 0.0
+        self._since_detect = 0
+        self._load_checked = time.monotonic()
+
+        # counters
+        self.frames = 0
+        self.detections = 0
+        self.tracked = 0
+        self.lost = 0
+        self.process_seconds = 0.0
+
+    def process(self, frame):
+        """Return the face as (x, y, w, h) in ``frame`` pixels, or None."""
+        start = time.perf_counter()
+        self._adapt()
+        small, scale = self.detector.downscale(frame)
+        self.frames += 1
+        self._since_detect += 1
+
+        face = None
+        if self.box is not None and self._since_detect < self.detect_every:
+            box, self.last_score = self.tracker.update(small)
+            if box is not None and self.last_score >= self.min_score:
+                face = box
+                self.tracked += 1
+                # Re-detection searches around where the tracker left off
+                self.detector.last = face
+            else:
+                self.lost += 1
+
+        if face is None and (self.box is not None or self._since_detect >= self.min_every):
+            self._since_detect = 0
+            self.detections += 1
+            face = self.detector.detect_small(small)
+            if face is not None:
+                self.tracker.init(small, face)
+
+        self.box = face
+        self.process_seconds += time.perf_counter() - start
+        return None if face is None else scale_box(face, scale)
+
+    def _adapt(self):
+        now = time.monotonic()
+        if now - self._load_checked < LOAD_CHECK_SECONDS:
+            return
+        self._load_checked = now
+        self.load = self.cpu.sample()
+        if self.load > CPU_HIGH:
+            self.detect_every = min(self.max_every, int(self.detect_every * 1.5) + 1)
+        elif self.load < CPU_LOW:
+            self.detect_every = max(self.min_every, self.detect_every - 1)
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "detections": self.detections,
+            "tracked": self.tracked,
+            "tracker_lost": self.lost,
+            "detect_every": self.detect_every,
+            "cpu_load": round(self.load, 2),
+            "process_ms_avg": round(self.process_seconds / self.frames * 1000, 2) if self.frames else 0.0,
+            "detector": self.detector.stats(),
+        }
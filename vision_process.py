@@ -0,0 +1,370 @@
+import argparse
+import logging
+import os
+import struct
+import subprocess
+import sys
+import threading
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# -----------------------------------------
+# Face tracking in its own process
+#
+# The parent owns the camera and copies each frame into a shared-memory
+# ring (no pickling, no per-frame allocation). A worker process --
+# this file run as a script -- runs FaceFollower / FaceDetector on the
+# newest frame and sends back one fixed-size result record per frame over
+# its stdout pipe. The parent "pokes" the worker's stdin after every
+# frame; EOF on stdin tells the worker to exit.
+#
+# The worker is a plain subprocess rather than multiprocessing.Process:
+# "spawn" would re-import Control_Sonny (model load, audio stream) in the
+# child, and "fork" after the audio thread has started is unsafe.
+#
+# Detection then never holds the main interpreter's GIL, so audio reads,
+# Vosk decoding and lip-sync timing no longer stall behind it.
+#
+# on_result(result), if given, is called from the result thread with
+# every FaceResult, so a consumer can wait on its own queue instead of
+# polling latest(). frame_interval > 0 hands the worker at most one frame
+# per interval (the camera is still read at full rate, keeping frames
+# fresh): the caller turns it up while nobody is in view.
+#
+# A worker that dies is restarted on the same ring with a growing
+# backoff; after MAX_RESTARTS quick deaths in a row ``failed`` is set
+# and the caller should track in-process instead.
+# -----------------------------------------
+FRAME_SLOTS = 4
+RESTART_BACKOFF = 0.5       # s before the first restart, doubled per quick death
+MAX_RESTART_BACKOFF = 10.0
+MAX_RESTARTS = 5            # consecutive quick deaths before giving up
+HEALTHY_AFTER = 30.0        # s a worker must live for its death not to count as quick
+
+# seq, capture stamp (time.monotonic, shared across processes on Linux),
+# processing ms, x, y, w, h (w == 0: no face), frame width, frame height
+RESULT = struct.Struct("<qdd6i")
+
+FaceResult = namedtuple("FaceResult", "seq stamp box frame_size process_ms")
+
+
+class SharedFrameRing:
+    """Fixed-shape uint8 frames in shared memory, newest-wins.
+
+    Layout: latest seq | per-slot seq | per-slot stamp | frames. A slot's
+    seq is set to -1 while it is written, so readers can detect (and
+    retry) a frame that was overwritten mid-copy.
+    """
+
+    def __init__(self, shape, slots=FRAME_SLOTS, name=None):
+        self.shape = tuple(int(v) for v in shape)
+        self.slots = slots
+        self.owner = name is None
+        frame_bytes = int(np.prod(self.shape))
+        header = 8 * (1 + 2 * slots)
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=header + slots * frame_bytes)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            _untrack(self.shm)
+        buf = self.shm.buf
+        self._latest = np.ndarray((1,), np.int64, buf, 0)
+        self._slot_seq = np.ndarray((slots,), np.int64, buf, 8)
+        self._slot_stamp = np.ndarray((slots,), np.float64, buf, 8 + 8 * slots)
+        self._frames = np.ndarray((slots,) + self.shape, np.uint8, buf, header)
+        if self.owner:
+            self._latest[0] = 0
+            self._slot_seq[:] = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def latest_seq(self):
+        return int(self._latest[0])
+
+    def write(self, frame, stamp=None):
+        seq = int(self._latest[0]) + 1
+        slot = seq % self.slots
+        self._slot_seq[slot] = -1
+        self._frames[slot] = frame
+        self._slot_stamp[slot] = time.monotonic() if stamp is None else stamp
+        self._slot_seq[slot] = seq
+        self._latest[0] = seq
+        return seq
+
+    def read_latest(self, after_seq=0):
+        """Copy of the newest frame as (seq, stamp, frame), or None if nothing newer."""
+        for _ in range(3):
+            seq = int(self._latest[0])
+            if seq <= after_seq:
+                return None
+            slot = seq % self.slots
+            if self._slot_seq[slot] != seq:
+                continue
+            stamp = float(self._slot_stamp[slot])
+            frame = self._frames[slot].copy()
+            if self._slot_seq[slot] == seq:
+                return seq, stamp, frame
+        return None
+
+    def close(self):
+        # numpy views must go before the mapping can be closed
+        del self._latest, self._slot_seq, self._slot_stamp, self._frames
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _untrack(shm):
+    # Before 3.13 attaching registers the segment with this process's
+    # resource tracker, which would unlink it when the worker exits
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+
+class VisionProcess:
+    """Parent side: camera -> shared ring -> worker process -> FaceResults."""
+
+    def __init__(self, cap, mode="track", tracker="template", slots=FRAME_SLOTS,
+                 max_failures=30, on_result=None):
+        self.cap = cap
+        self.mode = mode
+        self.tracker = tracker
+        self.slots = slots
+        self.max_failures = max_failures
+        self.on_result = on_result
+        self.frame_interval = 0.0   # s; min time between frames sent to the worker
+        self.ring = None
+        self.proc = None
+        self._result = None
+        self._cond = threading.Condition()
+        self._running = False
+        self._threads = []
+        self.failed = False   # worker kept dying; no more results will come
+        self.camera_failed = False   # camera stopped delivering frames; same, and in-process too
+
+        # counters
+        self.restarts = 0
+        self.frames_written = 0
+        self.results = 0
+        self.faces = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def start(self):
+        ok, frame = self.cap.read()
+        if not ok:
+            raise RuntimeError("camera returned no frame")
+        self.ring = SharedFrameRing(frame.shape, self.slots)
+        self._spawn()
+        self._running = True
+        self._write(frame)
+        for target, name in ((self._capture, "vision-capture"), (self._collect, "vision-results")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logging.info(f"Vision worker started (pid {self.proc.pid}, {frame.shape[1]}x{frame.shape[0]})")
+        return self
+
+    def _spawn(self):
+        shape = self.ring.shape
+        self.proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--shm", self.ring.name,
+             "--shape", *map(str, shape), "--slots", str(self.slots),
+             "--mode", self.mode, "--tracker", self.tracker],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        )
+        # A busy worker must never block the capture thread
+        os.set_blocking(self.proc.stdin.fileno(), False)
+
+    def stop(self, timeout=2.0):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._threads[0].join(timeout)
+        if self.proc:
+            try:
+                self.proc.stdin.close()  # EOF: worker exits
+            except OSError:
+                pass
+            try:
+                self.proc.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+        for thread in self._threads[1:]:
+            thread.join(timeout)
+        if self.ring:
+            self.ring.close()
+            self.ring = None
+
+    def latest(self, after_seq=0, timeout=1.0):
+        """Wait for a result newer than ``after_seq``; None on timeout or shutdown."""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: (self._result and self._result.seq > after_seq) or not self._running,
+                timeout)
+            if self._result and self._result.seq > after_seq:
+                return self._result
+            return None
+
+    def stats(self):
+        return {
+            "restarts": self.restarts,
+            "failed": self.failed,
+            "camera_failed": self.camera_failed,
+            "frames_written": self.frames_written,
+            "results": self.results,
+            "faces": self.faces,
+            "frames_skipped": max(0, self.frames_written - self.results),
+            "result_latency_ms_avg": round(self.latency_total / self.results * 1000, 2) if self.results else 0.0,
+            "result_latency_ms_max": round(self.latency_max * 1000, 2),
+        }
+
+    def _write(self, frame):
+        if frame.shape != self.ring.shape:
+            logging.warning(f"Vision: dropping {frame.shape} frame (ring is {self.ring.shape})")
+            return
+        self.ring.write(frame)
+        self.frames_written += 1
+        try:
+            os.write(self.proc.stdin.fileno(), b"\x01")
+        except (BlockingIOError, BrokenPipeError, ValueError):
+            pass
+
+    def _capture(self):
+        failures, last_write = 0, 0.0
+        while self._running:
+            ok, frame = self.cap.read()
+            if not ok:
+                failures += 1
+                if failures >= self.max_failures:
+                    logging.error(f"Vision: {failures} failed camera reads in a row; capture stopped")
+                    self.camera_failed = True
+                    break
+                time.sleep(0.01)
+                continue
+            failures = 0
+            now = time.monotonic()
+            if now - last_write >= self.frame_interval:
+                last_write = now
+                self._write(frame)
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+            if self.camera_failed:
+                # No more frames: EOF lets the worker exit so _collect reaps it
+                try:
+                    self.proc.stdin.close()
+                except OSError:
+                    pass
+
+    def _collect(self):
+        backoff, quick_deaths = RESTART_BACKOFF, 0
+        while True:
+            proc, started = self.proc, time.monotonic()
+            self._read_results(proc.stdout)
+            try:
+                code = proc.wait(1.0)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                code = proc.wait()
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+            with self._cond:
+                if not self._running:
+                    return
+                if time.monotonic() - started >= HEALTHY_AFTER:
+                    backoff, quick_deaths = RESTART_BACKOFF, 0
+                quick_deaths += 1
+                if quick_deaths > MAX_RESTARTS:
+                    logging.error(f"Vision worker exited (code {code}) {quick_deaths} times in a row; "
+                                  f"giving up")
+                    self.failed = True
+                    self._running = False
+                    self._cond.notify_all()
+                    return
+                logging.error(f"Vision worker exited (code {code}); restarting in {backoff:.1f}s")
+                if self._cond.wait_for(lambda: not self._running, backoff):
+                    return
+                try:
+                    self._spawn()
+                except OSError as e:
+                    logging.error(f"Vision worker restart failed: {e}")
+                    continue
+                self.restarts += 1
+            backoff = min(backoff * 2, MAX_RESTART_BACKOFF)
+
+    def _read_results(self, out):
+        while True:
+            data = out.read(RESULT.size)
+            if len(data) < RESULT.size:
+                return
+            seq, stamp, process_ms, x, y, w, h, fw, fh = RESULT.unpack(data)
+            latency = time.monotonic() - stamp
+            result = FaceResult(seq, stamp, (x, y, w, h) if w else None, (fw, fh), process_ms)
+            with self._cond:
+                self._result = result
+                self.results += 1
+                self.faces += w > 0
+                self.latency_total += latency
+                self.latency_max = max(self.latency_max, latency)
+                self._cond.notify_all()
+            if self.on_result:
+                self.on_result(result)
+
+
+# -----------------------------------------
+# Worker process
+# -----------------------------------------
+def worker(args):
+    from vision import FaceDetector, FaceFollower
+
+    ring = SharedFrameRing(args.shape, args.slots, name=args.shm)
+    if args.mode == "track":
+        follower = FaceFollower(tracker=args.tracker)
+        find_face, stats = follower.process, follower.stats
+    else:
+        detector = FaceDetector()
+        find_face, stats = detector.detect, detector.stats
+
+    poke = sys.stdin.buffer.fileno()
+    out = sys.stdout.buffer
+    seq = 0
+    try:
+        while os.read(poke, 4096):  # b"" = parent closed the pipe
+            got = ring.read_latest(seq)
+            if got is None:
+                continue
+            seq, stamp, frame = got
+            start = time.perf_counter()
+            face = find_face(frame) or (0, 0, 0, 0)
+            process_ms = (time.perf_counter() - start) * 1000
+            out.write(RESULT.pack(seq, stamp, process_ms, *face, frame.shape[1], frame.shape[0]))
+            out.flush()
+    except (BrokenPipeError, KeyboardInterrupt):
+        pass
+    finally:
+        logging.info(f"Vision worker: {stats()}")
+        ring.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    ap = argparse.ArgumentParser(description="Face tracking worker (started by VisionProcess)")
+    ap.add_argument("--shm", required=True)
+    ap.add_argument("--shape", type=int, nargs="+", required=True)
+    ap.add_argument("--slots", type=int, default=FRAME_SLOTS)
+    ap.add_argument("--mode", default="track", choices=("track", "detect"))
+    ap.add_argument("--tracker", default="template")
+    worker(ap.parse_args())
@@ -1,15 +1,22 @@
 import logging
 import threading
 import time
-import difflib
-import json
 import random
 from datetime import datetime
 
 import pyttsx3
-from vosk import Model, KaldiRecognizer
 import pyaudio
 
+from asr_server import load_model
+from audio_capture import AudioCapture
+from command_matcher import CommandMatcher, PartialCommandTracker
+from commands import VOICE_COMMANDS, bind, grammar
+from echo_gate import EchoGate, GatedReader, PlaybackMonitor
+from recognizer import RecognizerSession, hypotheses
+from speech_stream import split_text
+from speech_worker import NORMAL, URGENT, SpeechWorker
+from vad import EnergyVAD
+
 # -----------------------------------------
 # Logging Setup
 # -----------------------------------------
@@ -23,20 +30,46 @@ engine.setProperty("rate", 150)
 engine.setProperty("volume", 1.0)
 voices = engine.getProperty("voices")
 current_voice_index = 0
+engine_voice_index = 0  # voice the engine is actually set to (speech thread only)
 
-# Prevent overlap between speech + listening
-speaking_lock = threading.Lock()
+last_speech_end = 0.0  # time.monotonic() when Sonny last stopped talking
+# pyttsx3 plays audio we never see, so every frame heard while it
+# talks counts as echo (no reference to compare against, no barge-in)
+playback = PlaybackMonitor()
 
-def text_to_speech(text):
+def say_now(text, lang=None):
+    # Blocking; only the speech worker thread touches the engine
+    global last_speech_end, engine_voice_index
     logging.info(f"Speaking: {text}")
-    with speaking_lock:
-        engine.say(text)
+    if engine_voice_index != current_voice_index:
+        engine.setProperty("voice", voices[current_voice_index].id)
+        engine_voice_index = current_voice_index
+    playback.started(None)
+    try:
+        # One utterance per sentence: the engine starts speaking after the
+        # first one is synthesized instead of the whole reply
+        for piece in split_text(text):
+            engine.say(piece)
         engine.runAndWait()
+    finally:
+        playback.finished()
+        last_speech_end = time.monotonic()
+
+def _stop_if_cancelled(name, location, length):
+    # pyttsx3 can only be stopped from its own callbacks
+    if speech.interrupt.is_set():
+        engine.stop()
+
+speech = SpeechWorker(say_now).start()
+engine.connect("started-word", _stop_if_cancelled)
+
+def text_to_speech(text, priority=NORMAL):
+    # Queues and returns a SpeechHandle; callers don't wait for the audio
+    return speech.speak(text, priority=priority)
 
 def change_voice():
     global current_voice_index
     current_voice_index = (current_voice_index + 1) % len(voices)
-    engine.setProperty("voice", voices[current_voice_index].id)
     text_to_speech("Voice changed.")
 
 # -----------------------------------------
@@ -139,40 +172,47 @@ def command_creator():
 # -----------------------------------------
 # Command Dictionary
 # -----------------------------------------
-command_dict = {
-    "what time is it": command_time,
-    "what is today's date": command_date,
-    "hello": command_talk_back,
-    "how are you": command_how_are_you,
-    "set timer": command_set_timer,
-    "change voice": command_change_voice,
-    "goodbye": command_exit,
-    "what is your name": command_name,
-    "tell me a joke": command_joke,
-    "make me laugh": command_joke,
-    "say something funny": command_joke,
-    "who made you": command_creator,
-    "who created you": command_creator,
-    "who built you": command_creator,
-}
+command_dict = bind(VOICE_COMMANDS, {
+    "time": command_time,
+    "date": command_date,
+    "talk_back": command_talk_back,
+    "how_are_you": command_how_are_you,
+    "set_timer": command_set_timer,
+    "change_voice": command_change_voice,
+    "exit": command_exit,
+    "name": command_name,
+    "joke": command_joke,
+    "creator": command_creator,
+})
+
+# Handlers that only speak: cancelling their reply undoes them completely,
+# so only these may run from a partial (see Early Dispatch). "change
+# voice" and "goodbye" change state and always wait for the final result.
+EARLY_SAFE_COMMANDS = {phrase for phrase, action in VOICE_COMMANDS.items()
+                       if action not in ("change_voice", "exit")}
 
 # -----------------------------------------
 # Text Cleaning & Matching
 # -----------------------------------------
+# Built once: token-boundary fillers + indexed candidate lookup
+command_matcher = CommandMatcher(command_dict.keys())
+
 def clean_command(text):
-    text = text.lower()
-    fillers = ["please", "can you", "could you", "would you", "hey", "sonny", "um"]
-    for f in fillers:
-        text = text.replace(f, "")
-    return " ".join(text.split()).strip()
+    return command_matcher.clean(text)
 
-def match_command(command_text):
+def match_command(command_text, result=None):
+    # Score every n-best hypothesis (weighted by confidence) when the full
+    # Vosk result is available; fall back to the 1-best text otherwise
+    hyps = hypotheses(result) if result else [(command_text, 1.0)]
     command_text = clean_command(command_text)
-    keys = list(command_dict.keys())
-    matches = difflib.get_close_matches(command_text, keys, n=1, cutoff=0.65)
-    if matches:
-        logging.info(f"Matched '{command_text}' -> '{matches[0]}'")
-        return command_dict[matches[0]]
+    match, needs_confirmation = command_matcher.decide(hyps, group=command_dict.get)
+    if match and needs_confirmation:
+        logging.info(f"Unsure about '{command_text}' -> '{match}'; confirming")
+        if not confirm_command(match):
+            match = None
+    if match:
+        logging.info(f"Matched '{command_text}' -> '{match}'")
+        return command_dict[match]
     logging.info(f"No matching command for '{command_text}'")
     return None
 
@@ -180,48 +220,136 @@ def match_command(command_text):
 # Vosk Speech Recognition Setup
 # -----------------------------------------
 vosk_model_path = "/home/Robo/Documents/Sonny/vosk-model-small-en-us-0.15"
-vosk_model = Model(vosk_model_path)
+vosk_model = load_model(vosk_model_path)  # shared ASR service if running
 
 pa = pyaudio.PyAudio()
 stream = pa.open(format=pyaudio.paInt16, channels=1, rate=16000,
                  input=True, frames_per_buffer=4096)
 stream.start_stream()
 
+# Capture runs continuously; listeners read from the ring buffer
+capture = AudioCapture(stream).start()
+mic = GatedReader(capture.reader("listen"), EchoGate(playback))
+
 # Grammar helps Vosk focus on your known commands
-command_phrases = [clean_command(cmd) for cmd in command_dict.keys()] + ["cancel"]
-grammar = json.dumps(command_phrases)
+command_phrases = grammar(command_dict, command_matcher)
+
+# One long-lived recognizer per listening mode, reset between utterances.
+# Each sits behind an energy VAD so silence never reaches Kaldi.
+sessions = {
+    "wake": RecognizerSession(vosk_model, "wake", command_phrases, vad=EnergyVAD()),
+    "command": RecognizerSession(vosk_model, "command", command_phrases, vad=EnergyVAD(),
+                                 alternatives=5, words=True),
+    "yes_no": RecognizerSession(vosk_model, "yes_no", ["yes", "no", "[unk]"], vad=EnergyVAD()),
+}
 
-def listen_for_phrase_vosk(prompt="Listening...", timeout=6):
+def listen_for_phrase_vosk(prompt="Listening...", timeout=6, mode="command"):
     # IMPORTANT: don't speak the prompt (prevents mic feedback)
     logging.info(prompt)
 
-    # Wait until we are not currently speaking
-    while speaking_lock.locked():
-        time.sleep(0.05)
-
-    rec = KaldiRecognizer(vosk_model, 16000, grammar)
-    result_text = ""
-    start_time = time.time()
+    # No waiting for speech to finish: frames heard while speaking are
+    # gated to silence and the recognizer picks up the moment it ends
+    mic.skip_until(last_speech_end)
 
-    while time.time() - start_time < timeout:
-        data = stream.read(4096, exception_on_overflow=False)
-        if rec.AcceptWaveform(data):
-            result_dict = json.loads(rec.Result())
-            result_text = result_dict.get("text", "")
-            break
-
-    return result_text
+    # timeout bounds waiting for speech; a started phrase runs to its end
+    return sessions[mode].listen(mic, timeout=timeout)
 
 def listen_for_wake_word_vosk(timeout=12):
-    heard = listen_for_phrase_vosk("Listening for wake word...", timeout)
+    heard = listen_for_phrase_vosk("Listening for wake word...", timeout, mode="wake")
     logging.info(f"Heard for wake: {heard}")
+    logging.debug(f"Wake VAD: {sessions['wake'].vad.stats()}")
     return "hello" in heard.lower()
 
 def listen_for_command_vosk(timeout=12):
-    heard = listen_for_phrase_vosk("Listening for command...", timeout)
+    heard = listen_for_phrase_vosk("Listening for command...", timeout, mode="command")
     logging.info(f"Heard command: {heard}")
     return heard
 
+def listen_for_yes_no_vosk(timeout=8):
+    heard = listen_for_phrase_vosk("Listening for yes/no...", timeout, mode="yes_no")
+    logging.info(f"Heard answer: {heard}")
+    return {"yes": True, "no": False}.get(heard.strip())
+
+def confirm_command(phrase):
+    # One short yes/no instead of a full "repeat that" round trip
+    text_to_speech(f"Did you mean {phrase}?")
+    return listen_for_yes_no_vosk() is True
+
+# -----------------------------------------
+# Early Dispatch (opt-in)
+#   Fire a command from a stable, unambiguous partial instead of waiting
+#   for Vosk's endpointing silence. If the final result disagrees, the
+#   early reply is cancelled and the final command is dispatched instead.
+#   Only EARLY_SAFE_COMMANDS fire early; others go through the final.
+# -----------------------------------------
+EARLY_DISPATCH = False
+early_stats = {"fired": 0, "held": 0, "confirmed": 0, "cancelled": 0, "saved_ms_total": 0.0}
+
+def _run_handler(func, outcome):
+    try:
+        func()
+    except SystemExit:
+        outcome["exit"] = True
+
+def listen_and_dispatch_early(timeout=12):
+    # Returns (cmd_text, handled); handled=True when a handler already ran
+    logging.info("Listening for command (early dispatch)...")
+    mic.skip_until(last_speech_end)
+
+    session = sessions["command"]
+    tracker = PartialCommandTracker(command_matcher)
+    fired, fired_time, final = None, None, None
+    outcome = {}
+    events = session.stream(mic, timeout=timeout, all_partials=True)
+    try:
+        for event in events:
+            if event.kind == "final":
+                final = event
+                break
+            if fired is None:
+                fired = tracker.update(event.text)
+                if fired and fired not in EARLY_SAFE_COMMANDS:
+                    # Side effects can't be taken back; wait for the final
+                    early_stats["held"] += 1
+                    logging.info(f"'{fired}' is not early-safe; waiting for the final result")
+                    fired = None
+                elif fired:
+                    fired_time = event.audio_time
+                    early_stats["fired"] += 1
+                    logging.info(f"Early dispatch on partial '{event.text}' -> '{fired}'")
+                    # Handlers only queue speech, so this returns at once
+                    _run_handler(command_dict[fired], outcome)
+            elif speech.busy:
+                # Sonny is already answering; the mic now hears our own voice
+                break
+    finally:
+        events.close()
+    if final is None and session.in_utterance:
+        final = session.flush(time.monotonic())
+
+    cmd_text = final.text if final else ""
+    logging.info(f"Heard command: {cmd_text}")
+    if not fired:
+        return cmd_text, False
+
+    final_phrase = command_matcher.match(cmd_text) if cmd_text else fired
+    if final_phrase != fired:
+        early_stats["cancelled"] += 1
+        logging.info(f"Final '{cmd_text}' disagrees with early '{fired}'; cancelling")
+        speech.cancel_all()
+        return cmd_text, False
+
+    early_stats["confirmed"] += 1
+    if final and final.audio_time and fired_time:
+        saved_ms = max(0.0, (final.audio_time - fired_time) * 1000)
+        early_stats["saved_ms_total"] += saved_ms
+        logging.info(f"Early dispatch saved {saved_ms:.0f} ms "
+                     f"(avg {early_stats['saved_ms_total'] / early_stats['confirmed']:.0f} ms "
+                     f"over {early_stats['confirmed']} commands)")
+    if outcome.get("exit"):
+        raise SystemExit
+    return cmd_text, True
+
 # -----------------------------------------
 # Command Processing Loop
 # -----------------------------------------
@@ -233,7 +361,13 @@ def process_commands():
             fail_count = 0
 
             while True:
-                cmd_text = listen_for_command_vosk(timeout=30)
+                if EARLY_DISPATCH:
+                    try:
+                        cmd_text, handled = listen_and_dispatch_early(timeout=30)
+                    except SystemExit:
+                        return
+                else:
+                    cmd_text, handled = listen_for_command_vosk(timeout=30), False
 
                 # Nothing heard
                 if not cmd_text:
@@ -245,11 +379,14 @@ def process_commands():
 
                 fail_count = 0
 
+                if handled:
+                    continue
+
                 if "cancel" in cmd_text.lower():
                     text_to_speech("Exiting command mode.")
                     break
 
-                func = match_command(cmd_text)
+                func = match_command(cmd_text, sessions["command"].last_result)
                 if func:
                     try:
                         func()
@@ -269,11 +406,14 @@ def main():
     try:
         while thread.is_alive():
             time.sleep(0.5)
+        speech.wait_idle(10)  # finish the goodbye
     except KeyboardInterrupt:
-        text_to_speech("Shutting down. Goodbye!")
+        text_to_speech("Shutting down. Goodbye!", URGENT).wait(10)
         logging.info("Assistant shutdown via KeyboardInterrupt.")
     finally:
         try:
+            speech.stop()
+            capture.stop()
             stream.stop_stream()
             stream.close()
             pa.terminate()
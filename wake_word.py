@@ -0,0 +1,62 @@
+import logging
+import time
+from collections import namedtuple
+
+from audio_capture import SAMPLE_WIDTH
+from recognizer import RecognizerSession
+
+# -----------------------------------------
+# Stage 1: grammar-restricted wake-word spotter
+#
+# A tiny grammar keeps the decoder cheap enough to run continuously and
+# stops ordinary sentences containing "hello" from waking Sonny. On a hit
+# the caller hands the shared audio reader straight to the full command
+# recognizer (stage 2), starting just after the wake phrase.
+# -----------------------------------------
+WAKE_PHRASES = ("hello sonny", "sonny")
+WAKE_CHUNK_FRAMES = 1600   # 100 ms: small chunks keep wake latency low
+HANDOFF_REWIND = 0.2       # seconds re-read by stage 2; "sonny" is a filler there
+
+# phrase: what matched; audio_time: monotonic time of the audio that fired;
+# handoff_pos: ring position stage 2 should start reading from;
+# latency: detection delay after that audio was captured (seconds)
+WakeHit = namedtuple("WakeHit", "phrase audio_time handoff_pos latency")
+
+
+class WakeWordSpotter:
+    def __init__(self, model, phrases=WAKE_PHRASES, vad=None):
+        self.phrases = tuple(phrases)
+        self.session = RecognizerSession(model, "wake", list(self.phrases) + ["[unk]"], vad=vad)
+        self.hits = 0
+
+    def match(self, text):
+        words = text.replace("[unk]", " ").split()
+        heard = " ".join(words)
+        # Longest phrase first so "hello sonny" wins over "sonny"
+        for phrase in sorted(self.phrases, key=len, reverse=True):
+            if f" {phrase} " in f" {heard} ":
+                return phrase
+        return None
+
+    def wait(self, reader, timeout=5):
+        """Listen until the wake phrase is heard; returns a WakeHit or None."""
+        events = self.session.stream(reader, timeout=timeout,
+                                     chunk_bytes=WAKE_CHUNK_FRAMES * SAMPLE_WIDTH)
+        try:
+            for event in events:
+                phrase = self.match(event.text)
+                if not phrase:
+                    continue
+                # Fire on the partial: with this grammar it is already
+                # unambiguous, and waiting for the endpoint would swallow
+                # a command spoken in the same breath.
+                self.hits += 1
+                latency = time.monotonic() - event.audio_time if event.audio_time else 0.0
+                rewind = int(HANDOFF_REWIND * reader.ring.bytes_per_second)
+                rewind -= rewind % reader.ring.sample_width
+                handoff = max(reader.ring.oldest_pos, reader.pos - rewind)
+                logging.info(f"Wake word '{phrase}' ({event.kind}, {latency * 1000:.0f} ms)")
+                return WakeHit(phrase, event.audio_time, handoff, latency)
+        finally:
+            events.close()
+        return None
@@ -0,0 +1,96 @@
+import time
+import wave
+
+import numpy as np
+
+from audio_capture import AudioRing, CHUNK_FRAMES, SAMPLE_RATE, SAMPLE_WIDTH
+
+# -----------------------------------------
+# WAV-backed stand-in for the PyAudio input stream
+#
+# Lets recorded audio drive AudioCapture / the recognizers without a
+# microphone. Anything that isn't 16 kHz mono int16 is downmixed and
+# resampled on load.
+# -----------------------------------------
+
+
+def load_wav(path, rate=SAMPLE_RATE):
+    """Return the file as 16-bit mono PCM bytes at ``rate``."""
+    with wave.open(path, "rb") as w:
+        if w.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV is supported")
+        channels = w.getnchannels()
+        src_rate = w.getframerate()
+        samples = np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16)
+
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    if src_rate != rate and len(samples):
+        n_out = int(len(samples) * rate / src_rate)
+        positions = np.arange(n_out) * (src_rate / rate)
+        samples = np.interp(positions, np.arange(len(samples)), samples)
+    return np.asarray(samples).astype(np.int16).tobytes()
+
+
+def ring_from_wav(path, rate=SAMPLE_RATE):
+    """Load a clip into a closed AudioRing, timestamped in audio seconds from 0.
+
+    Readers drain it as fast as the consumer can go, which makes offline
+    benchmarks both faster than real time and deterministic.
+    """
+    pcm = load_wav(path, rate)
+    bytes_per_second = rate * SAMPLE_WIDTH
+    ring = AudioRing(seconds=len(pcm) / bytes_per_second + 1, rate=rate)
+    step = CHUNK_FRAMES * SAMPLE_WIDTH
+    for i in range(0, len(pcm), step):
+        chunk = pcm[i:i + step]
+        ring.write(chunk, timestamp=(i + len(chunk)) / bytes_per_second)
+    ring.close()
+    return ring
+
+
+class WavStream:
+    """Mimics ``pyaudio.Stream.read`` over one or more WAV files.
+
+    ``realtime=True`` paces reads like a real microphone; ``speed`` > 1
+    plays faster than real time. Returns b"" once the audio runs out.
+    """
+
+    def __init__(self, paths, rate=SAMPLE_RATE, realtime=False, speed=1.0,
+                 gap_seconds=0.0):
+        if isinstance(paths, str):
+            paths = [paths]
+        silence = bytes(int(gap_seconds * rate) * 2)
+        self.pcm = silence.join(load_wav(p, rate) for p in paths) + silence
+        self.rate = rate
+        self.realtime = realtime
+        self.speed = speed
+        self.pos = 0
+        self._started = None
+
+    @property
+    def duration(self):
+        return len(self.pcm) / (self.rate * 2)
+
+    def read(self, frames, exception_on_overflow=True):
+        nbytes = frames * 2
+        data = self.pcm[self.pos:self.pos + nbytes]
+        self.pos += len(data)
+        if self.realtime and data:
+            if self._started is None:
+                self._started = time.monotonic()
+            due = self._started + self.pos / (self.rate * 2) / self.speed
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return data
+
+    # enough of the PyAudio stream API for callers that manage lifetime
+    def start_stream(self):
+        pass
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        pass